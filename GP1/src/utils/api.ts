@@ -403,6 +403,22 @@ export const workOrdersAPI = {
     }
   },
 
+  // İş emirleri + aşamalar + metrikler tek istekte
+  async getWorkOrdersOverview(params?: {
+    machine_id?: number;
+    product_code?: string;
+    cursor?: number;
+    limit?: number;
+  }) {
+    try {
+      const response = await apiClient.get('/workorders/overview', { params });
+      return response.data;
+    } catch (error: any) {
+      console.error('Error getting work orders overview:', error);
+      throw new Error(error.response?.data?.detail || error.message || 'İş emirleri yüklenemedi');
+    }
+  },
+
   async createWorkOrder(data: {
     product_code: string;
     lot_no: string;
@@ -448,6 +464,24 @@ export const machinesAPI = {
     }
   },
 
+  async getMachineReadingsDownsampled(machineId: number, params: {
+    reading_type: string;
+    start?: string;
+    end?: string;
+    bucket?: 'minute' | 'hour' | 'day' | 'week';
+  }) {
+    try {
+      const response = await apiClient.get(
+        `/machines/${machineId}/readings/downsample`,
+        { params }
+      );
+      return response.data;
+    } catch (error: any) {
+      console.error('Error getting downsampled machine readings:', error);
+      throw new Error(error.response?.data?.detail || error.message || 'Makine okumaları yüklenemedi');
+    }
+  },
+
   async createMachine(data: {
     name: string;
     machine_type: string;
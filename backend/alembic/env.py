@@ -23,7 +23,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import Base and models
 from app.db import Base
-from app.models import User, WorkOrder, WorkOrderStage, Issue, Machine, MachineReading, Notification
+from app.models import User, WorkOrder, WorkOrderStage, Issue, Machine, MachineReading, ReadingType, Notification
 
 # this is the Alembic Config object
 config = context.config
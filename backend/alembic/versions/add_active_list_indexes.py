@@ -0,0 +1,47 @@
+"""add partial indexes on active products and molds
+
+Revision ID: active_list_indexes
+Revises: name_key_columns
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'active_list_indexes'
+down_revision = 'name_key_columns'
+branch_labels = None
+depends_on = None
+
+# Liste endpoint'lerinin sıralama anahtarları; sadece deleted_at IS NULL satırlar
+INDEXES = [
+    ('products', ['id']),
+    ('products', ['code']),
+    ('products', ['name', 'id']),
+    ('products', ['material', 'id']),
+    ('products', ['created_at', 'id']),
+    ('molds', ['id']),
+    ('molds', ['code']),
+    ('molds', ['name', 'id']),
+    ('molds', ['status', 'id']),
+]
+
+
+def _name(table: str, columns) -> str:
+    return f'ix_{table}_active_{columns[0]}'
+
+
+def upgrade() -> None:
+    where = sa.text('deleted_at IS NULL')
+    for table, columns in INDEXES:
+        op.create_index(
+            _name(table, columns), table, columns,
+            postgresql_where=where, sqlite_where=where,
+        )
+
+
+def downgrade() -> None:
+    for table, columns in reversed(INDEXES):
+        op.drop_index(_name(table, columns), table_name=table)
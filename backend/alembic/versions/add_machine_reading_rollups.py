@@ -0,0 +1,51 @@
+"""add machine reading rollup tables (1m / 1h / 1d) and rollup state
+
+Revision ID: machine_reading_rollups
+Revises: typed_machine_readings
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'machine_reading_rollups'
+down_revision = 'typed_machine_readings'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ('machine_readings_1m', 'machine_readings_1h', 'machine_readings_1d')
+
+
+def upgrade() -> None:
+    for table in ROLLUP_TABLES:
+        op.create_table(
+            table,
+            sa.Column('machine_id', sa.Integer(), sa.ForeignKey('machines.id'), primary_key=True),
+            sa.Column('reading_type_id', sa.Integer(), sa.ForeignKey('reading_types.id'), primary_key=True),
+            sa.Column('bucket_start', sa.DateTime(), primary_key=True),
+            sa.Column('sample_count', sa.Integer(), nullable=False),
+            sa.Column('value_min', sa.Float(), nullable=True),
+            sa.Column('value_max', sa.Float(), nullable=True),
+            sa.Column('value_sum', sa.Float(), nullable=True),
+        )
+        op.create_index(f'ix_{table}_bucket_start', table, ['bucket_start'])
+
+    op.create_table(
+        'telemetry_rollup_state',
+        sa.Column('resolution', sa.String(), primary_key=True),
+        sa.Column('rolled_up_to', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+    # Rollup ve retention taramaları zamana göre yapılır
+    op.create_index('ix_machine_readings_timestamp', 'machine_readings', ['timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_machine_readings_timestamp', table_name='machine_readings')
+    op.drop_table('telemetry_rollup_state')
+    for table in reversed(ROLLUP_TABLES):
+        op.drop_index(f'ix_{table}_bucket_start', table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,66 @@
+"""add normalized lookup keys: users.username_key, products.name_key
+
+Revision ID: name_key_columns
+Revises: training_jobs
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = 'name_key_columns'
+down_revision = 'training_jobs'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# app.utils.text_keys ile aynı normalizasyon (migration sabit kalsın diye kopyalandı)
+_TR_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+
+
+def _username_key(value):
+    return value.strip().lower() if value is not None else None
+
+
+def _product_name_key(value):
+    return " ".join(value.translate(_TR_UPPER).lower().split()) if value is not None else None
+
+
+def _backfill(bind, table, source, target, normalize):
+    last_id = 0
+    while True:
+        rows = bind.execute(text(f"""
+            SELECT id, {source} AS value FROM {table}
+            WHERE id > :last_id ORDER BY id LIMIT :batch
+        """), {"last_id": last_id, "batch": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            text(f"UPDATE {table} SET {target} = :key WHERE id = :id"),
+            [{"id": row.id, "key": normalize(row.value)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # ilike sorguları B-tree index kullanamıyordu; eşitlik için normalize edilmiş anahtar kolonları
+    op.add_column('users', sa.Column('username_key', sa.String(), nullable=True))
+    op.add_column('products', sa.Column('name_key', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    _backfill(bind, 'users', 'username', 'username_key', _username_key)
+    _backfill(bind, 'products', 'name', 'name_key', _product_name_key)
+
+    op.create_index('ix_users_username_key', 'users', ['username_key'])
+    op.create_index('ix_products_name_key', 'products', ['name_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_name_key', table_name='products')
+    op.drop_index('ix_users_username_key', table_name='users')
+    op.drop_column('products', 'name_key')
+    op.drop_column('users', 'username_key')
@@ -0,0 +1,34 @@
+"""add table_versions counters for catalog ETags
+
+Revision ID: table_versions
+Revises: active_list_indexes
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'table_versions'
+down_revision = 'active_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    table_versions = op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    # Satırlar önceden açılır; sayaç ilk yazmada da sadece UPDATE olur
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 1}
+        for name in ('products', 'molds', 'machines')
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
@@ -0,0 +1,38 @@
+"""add training_jobs table for background AI training
+
+Revision ID: training_jobs
+Revises: machine_reading_rollups
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'training_jobs'
+down_revision = 'machine_reading_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'training_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('job_type', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('requested_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('request_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_training_jobs_type_status', 'training_jobs', ['job_type', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_training_jobs_type_status', table_name='training_jobs')
+    op.drop_table('training_jobs')
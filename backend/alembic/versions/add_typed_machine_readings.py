@@ -0,0 +1,117 @@
+"""typed machine_readings: reading_types lookup, numeric value, (machine_id, timestamp) index
+
+Revision ID: typed_machine_readings
+Revises: stage_events
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+# revision identifiers, used by Alembic.
+revision = 'typed_machine_readings'
+down_revision = 'stage_events'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _parse_number(value):
+    if value is None:
+        return None
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reading_types',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(length=50), nullable=False, unique=True),
+        sa.Column('unit', sa.String(length=20), nullable=True),
+    )
+    op.add_column('machine_readings', sa.Column('reading_type_id', sa.Integer(), nullable=True))
+    op.add_column('machine_readings', sa.Column('value_num', sa.Float(), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'fk_machine_readings_reading_type_id',
+            'machine_readings', 'reading_types',
+            ['reading_type_id'], ['id']
+        )
+
+    # Mevcut okuma tiplerini lookup tablosuna taşı
+    bind.execute(text("""
+        INSERT INTO reading_types (code)
+        SELECT DISTINCT lower(trim(reading_type)) FROM machine_readings
+        WHERE reading_type IS NOT NULL AND trim(reading_type) <> ''
+    """))
+    bind.execute(text("""
+        UPDATE machine_readings
+        SET reading_type_id = (
+            SELECT id FROM reading_types
+            WHERE reading_types.code = lower(trim(machine_readings.reading_type))
+        )
+        WHERE reading_type IS NOT NULL
+    """))
+
+    # Sayısal string değerleri value_num'a taşı (batch'ler halinde)
+    last_id = 0
+    while True:
+        rows = bind.execute(text("""
+            SELECT id, value FROM machine_readings
+            WHERE id > :last_id ORDER BY id LIMIT :batch
+        """), {"last_id": last_id, "batch": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            number = _parse_number(row.value)
+            if number is not None:
+                updates.append({"id": row.id, "value_num": number})
+        if updates:
+            bind.execute(
+                text("UPDATE machine_readings SET value_num = :value_num, value = NULL WHERE id = :id"),
+                updates
+            )
+        last_id = rows[-1].id
+
+    op.drop_column('machine_readings', 'reading_type')
+    op.create_index(
+        'ix_machine_readings_machine_timestamp', 'machine_readings',
+        ['machine_id', 'timestamp']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_machine_readings_machine_timestamp', table_name='machine_readings')
+    op.add_column('machine_readings', sa.Column('reading_type', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    bind.execute(text("""
+        UPDATE machine_readings
+        SET reading_type = (
+            SELECT code FROM reading_types
+            WHERE reading_types.id = machine_readings.reading_type_id
+        )
+    """))
+    bind.execute(text("""
+        UPDATE machine_readings
+        SET value = CAST(value_num AS VARCHAR)
+        WHERE value IS NULL AND value_num IS NOT NULL
+    """))
+
+    if bind.dialect.name != 'sqlite':
+        op.drop_constraint('fk_machine_readings_reading_type_id', 'machine_readings', type_='foreignkey')
+    op.drop_column('machine_readings', 'value_num')
+    op.drop_column('machine_readings', 'reading_type_id')
+    op.drop_table('reading_types')
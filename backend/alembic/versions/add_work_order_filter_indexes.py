@@ -0,0 +1,29 @@
+"""add filter indexes to work_orders
+
+Revision ID: work_order_filter_idx
+Revises: add_machine_id_wo
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'work_order_filter_idx'
+down_revision = 'add_machine_id_wo'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # list_work_orders filtreleri (machine_id, product_code, planned_start aralığı) için index'ler
+    op.create_index('ix_work_orders_machine_id', 'work_orders', ['machine_id'])
+    op.create_index('ix_work_orders_product_code', 'work_orders', ['product_code'])
+    op.create_index('ix_work_orders_planned_start', 'work_orders', ['planned_start'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_work_orders_planned_start', table_name='work_orders')
+    op.drop_index('ix_work_orders_product_code', table_name='work_orders')
+    op.drop_index('ix_work_orders_machine_id', table_name='work_orders')
@@ -0,0 +1,38 @@
+"""add work_order_metrics summary table
+
+Revision ID: work_order_metrics
+Revises: work_order_filter_idx
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'work_order_metrics'
+down_revision = 'work_order_filter_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # İş emri başına materialized metrik özeti
+    # Mevcut veriler için: python scripts/backfill_work_order_metrics.py
+    op.create_table(
+        'work_order_metrics',
+        sa.Column('work_order_id', sa.Integer(), sa.ForeignKey('work_orders.id'), primary_key=True),
+        sa.Column('total_stages', sa.Integer(), nullable=True),
+        sa.Column('planned_count', sa.Integer(), nullable=True),
+        sa.Column('in_progress_count', sa.Integer(), nullable=True),
+        sa.Column('paused_count', sa.Integer(), nullable=True),
+        sa.Column('done_count', sa.Integer(), nullable=True),
+        sa.Column('first_actual_start', sa.DateTime(), nullable=True),
+        sa.Column('last_actual_end', sa.DateTime(), nullable=True),
+        sa.Column('paused_seconds', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('work_order_metrics')
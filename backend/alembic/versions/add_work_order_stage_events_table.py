@@ -0,0 +1,43 @@
+"""add work_order_stage_events log table
+
+Revision ID: stage_events
+Revises: work_order_stage_idx
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'stage_events'
+down_revision = 'work_order_stage_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Append-only aşama geçiş log'u (start / pause / resume / done)
+    op.create_table(
+        'work_order_stage_events',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('work_order_stage_id', sa.Integer(), sa.ForeignKey('work_order_stages.id'), nullable=False),
+        sa.Column('work_order_id', sa.Integer(), sa.ForeignKey('work_orders.id'), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+    )
+    op.create_index(
+        'ix_stage_events_stage_created', 'work_order_stage_events',
+        ['work_order_stage_id', 'created_at']
+    )
+    op.create_index(
+        'ix_stage_events_wo_stage_created', 'work_order_stage_events',
+        ['work_order_id', 'work_order_stage_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stage_events_wo_stage_created', table_name='work_order_stage_events')
+    op.drop_index('ix_stage_events_stage_created', table_name='work_order_stage_events')
+    op.drop_table('work_order_stage_events')
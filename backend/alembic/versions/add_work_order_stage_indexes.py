@@ -0,0 +1,28 @@
+"""add indexes to work_order_stages for aggregate metrics
+
+Revision ID: work_order_stage_idx
+Revises: work_order_metrics
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'work_order_stage_idx'
+down_revision = 'work_order_metrics'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Aşamaları iş emrine göre toplu çekmek (IN sorguları) ve join'ler için
+    op.create_index('ix_work_order_stages_work_order_id', 'work_order_stages', ['work_order_id'])
+    # /metrics/aggregate: status = 'done' AND actual_end aralığı
+    op.create_index('ix_work_order_stages_status_actual_end', 'work_order_stages', ['status', 'actual_end'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_work_order_stages_status_actual_end', table_name='work_order_stages')
+    op.drop_index('ix_work_order_stages_work_order_id', table_name='work_order_stages')
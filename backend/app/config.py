@@ -23,6 +23,10 @@ SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# verify_token kullanıcı cache'i (0 = devre dışı)
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
 # ============================================
 # DATABASE CONFIGURATION
 # ============================================
@@ -46,6 +50,49 @@ DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 
+# ============================================
+# AI TRAINING JOBS
+# ============================================
+AI_TRAINING_WORKERS = int(os.getenv("AI_TRAINING_WORKERS", "1"))  # Eğitim process sayısı
+AI_TRAINING_STALE_SECONDS = int(os.getenv("AI_TRAINING_STALE_SECONDS", "600"))  # Sahipsiz pending iş zaman aşımı
+AI_MODEL_KEEP_VERSIONS = int(os.getenv("AI_MODEL_KEEP_VERSIONS", "10"))  # Saklanacak model versiyonu sayısı
+AI_MODEL_MMAP_MODE = os.getenv("AI_MODEL_MMAP_MODE", "r") or None  # joblib.load mmap_mode (boş: kapalı)
+AI_MODEL_RELOAD_CHECK_SECONDS = float(os.getenv("AI_MODEL_RELOAD_CHECK_SECONDS", "5"))  # Aktif versiyon kontrol aralığı
+AI_BATCH_PREDICT_MAX_ITEMS = int(os.getenv("AI_BATCH_PREDICT_MAX_ITEMS", "1000"))  # Toplu tahmin isteği başına ürün
+AI_PREDICTION_CACHE_SIZE = int(os.getenv("AI_PREDICTION_CACHE_SIZE", "4096"))  # Tahmin cache kayıt sayısı (0: kapalı)
+AI_PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("AI_PREDICTION_CACHE_TTL_SECONDS", "300"))  # Diğer process'lerdeki değişiklikler için üst sınır
+AI_AUTO_RETRAIN_ENABLED = os.getenv("AI_AUTO_RETRAIN_ENABLED", "true").lower() == "true"  # Ürün değişikliklerinde otomatik eğitim
+AI_RETRAIN_DEBOUNCE_SECONDS = float(os.getenv("AI_RETRAIN_DEBOUNCE_SECONDS", "30"))  # Son değişiklikten sonra bekleme
+AI_RETRAIN_MAX_WAIT_SECONDS = float(os.getenv("AI_RETRAIN_MAX_WAIT_SECONDS", "300"))  # Sürekli değişiklikte en fazla gecikme
+AI_RETRAIN_MIN_CHANGES = int(os.getenv("AI_RETRAIN_MIN_CHANGES", "10"))  # Eğitim için gereken değişen ürün sayısı
+PRODUCT_NAME_INDEX_REFRESH_SECONDS = float(os.getenv("PRODUCT_NAME_INDEX_REFRESH_SECONDS", "300"))  # Ürün adı indeksi yeniden kurulum aralığı (0: kapalı)
+
+# ============================================
+# PRODUCT CSV IMPORT
+# ============================================
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "1000"))  # Upsert başına satır
+PRODUCT_IMPORT_COMMIT_EVERY = int(os.getenv("PRODUCT_IMPORT_COMMIT_EVERY", "1"))  # Kaç chunk'ta bir commit
+
+# ============================================
+# EVENT STREAM (SSE) SETTINGS
+# ============================================
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))  # Last-Event-ID ile tekrar gönderilebilecek event sayısı
+EVENT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "500"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+
+# ============================================
+# MACHINE READINGS INGESTION
+# ============================================
+READINGS_BULK_MAX_ITEMS = int(os.getenv("READINGS_BULK_MAX_ITEMS", "20000"))
+MACHINE_ID_CACHE_TTL_SECONDS = float(os.getenv("MACHINE_ID_CACHE_TTL_SECONDS", "60"))
+
+# Telemetri rollup (1m / 1h / 1d) ve ham veri saklama süresi
+TELEMETRY_ROLLUP_ENABLED = os.getenv("TELEMETRY_ROLLUP_ENABLED", "true").lower() == "true"
+TELEMETRY_ROLLUP_INTERVAL_SECONDS = float(os.getenv("TELEMETRY_ROLLUP_INTERVAL_SECONDS", "60"))
+TELEMETRY_ROLLUP_LATENESS_SECONDS = int(os.getenv("TELEMETRY_ROLLUP_LATENESS_SECONDS", "120"))
+TELEMETRY_RAW_RETENTION_DAYS = int(os.getenv("TELEMETRY_RAW_RETENTION_DAYS", "90"))  # 0 = sınırsız
+TELEMETRY_PURGE_BATCH_SIZE = int(os.getenv("TELEMETRY_PURGE_BATCH_SIZE", "5000"))
+
 # ============================================
 # CORS CONFIGURATION
 # ============================================
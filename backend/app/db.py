@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import DATABASE_URL
@@ -24,6 +25,33 @@ else:
 # Session oluştur (veritabanı işlemleri için)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """Senkron veritabanı URL'ini async sürücülü karşılığına çevirir."""
+    if url.startswith("sqlite+aiosqlite") or url.startswith("postgresql+asyncpg"):
+        return url
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":"):]
+    if url.startswith("postgresql") or url.startswith("postgres"):
+        return "postgresql+asyncpg" + url[url.index(":"):]
+    raise ValueError(f"Async sürücüsü olmayan veritabanı URL'i: {url}")
+
+
+# Async engine - event loop'u bloklamadan sorgu yapan async endpoint'ler için
+if DATABASE_URL.startswith("sqlite"):
+    async_engine = create_async_engine(to_async_url(DATABASE_URL), echo=False)
+else:
+    async_engine = create_async_engine(
+        to_async_url(DATABASE_URL),
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        echo=False
+    )
+
+# expire_on_commit=False: commit sonrası attribute erişimi lazy IO tetiklemesin
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Base sınıfı (model tanımları için)
 Base = declarative_base()
 
@@ -34,3 +62,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -5,10 +5,12 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.db import engine, Base
-from app.routers import stages, auth, work_orders, metrics, issues, machines, products, molds, ai
-from app.config import CORS_ORIGINS
+from app.db import engine, Base, SessionLocal
+from app.routers import stages, auth, work_orders, metrics, issues, machines, products, molds, ai, events
+from app.config import CORS_ORIGINS, TELEMETRY_ROLLUP_ENABLED
 from app.logging_config import logger
+from app.utils.telemetry_rollup import TelemetryRollupWorker
+from app.utils.training_jobs import retrain_scheduler, training_queue
 
 app = FastAPI(
     title="Üretim Planlama API",
@@ -60,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Sonraki sayfa cursor'ı ve koşullu GET
 )
 
 # ✅ Global exception handler
@@ -140,6 +143,23 @@ def hello():
 # Base.metadata.create_all(bind=engine)  # Kaldırıldı - Alembic kullanıyoruz
 
 
+# ✅ Arka plan işleri: makine telemetrisi rollup + retention, AI eğitim kuyruğu
+telemetry_worker = TelemetryRollupWorker(SessionLocal)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    if TELEMETRY_ROLLUP_ENABLED:
+        telemetry_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    telemetry_worker.stop()
+    retrain_scheduler.cancel()
+    training_queue.shutdown()
+
+
 # ✅ Router'lar
 app.include_router(stages.router)
 app.include_router(auth.router)
@@ -150,6 +170,7 @@ app.include_router(machines.router)
 app.include_router(products.router)
 app.include_router(molds.router)
 app.include_router(ai.router)  # AI Üretim Tahmini
+app.include_router(events.router)  # Canlı event akışı (SSE)
 
 
 
@@ -1,7 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index, Text, text
+from sqlalchemy.orm import declared_attr, relationship, validates
 from datetime import datetime, timezone
 from .db import Base
+from .utils.text_keys import product_name_key, username_key
+
+
+def active_index(table: str, *columns: str) -> Index:
+    """Sadece aktif (deleted_at IS NULL) satırları kapsayan kısmi index."""
+    return Index(
+        f"ix_{table}_active_{columns[0]}",
+        *columns,
+        postgresql_where=text("deleted_at IS NULL"),
+        sqlite_where=text("deleted_at IS NULL"),
+    )
 
 
 # 👤 Kullanıcı tablosu
@@ -9,31 +20,41 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True)
+    username_key = Column(String, index=True)  # Küçük harfli arama anahtarı (login/register eşitlik sorgusu)
     password_hash = Column(String)  # Şifre hash olarak saklanacak
     email = Column(String, unique=True, index=True, nullable=True)  # Email adresi
     phone = Column(String, nullable=True)  # Telefon numarası
     role = Column(String, default="worker")  # admin / manager / worker
 
+    @validates("username")
+    def _set_username_key(self, key, value):
+        self.username_key = username_key(value)
+        return value
+
 
 # 🧾 İş Emri tablosu
 class WorkOrder(Base):
     __tablename__ = "work_orders"
     id = Column(Integer, primary_key=True)
-    product_code = Column(String)
+    product_code = Column(String, index=True)
     lot_no = Column(String)
     qty = Column(Integer)  # Hedef ürün sayısı
     produced_qty = Column(Integer, default=0)  # Mevcut üretilen ürün sayısı
-    planned_start = Column(DateTime, nullable=True)
+    planned_start = Column(DateTime, nullable=True, index=True)
     planned_end = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # Work order'ı oluşturan kullanıcı
-    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=True)  # Üretim için seçilen makine
+    machine_id = Column(Integer, ForeignKey("machines.id"), nullable=True, index=True)  # Üretim için seçilen makine
 
 
 # 🔄 İş Emri Aşamaları tablosu
 class WorkOrderStage(Base):
     __tablename__ = "work_order_stages"
+    __table_args__ = (
+        # Aggregate metrikler: tamamlanmış aşamalar actual_end aralığında taranır
+        Index("ix_work_order_stages_status_actual_end", "status", "actual_end"),
+    )
     id = Column(Integer, primary_key=True)
-    work_order_id = Column(Integer, ForeignKey("work_orders.id"))
+    work_order_id = Column(Integer, ForeignKey("work_orders.id"), index=True)
     stage_name = Column(String)
     planned_start = Column(DateTime, nullable=True)
     planned_end = Column(DateTime, nullable=True)
@@ -44,6 +65,37 @@ class WorkOrderStage(Base):
     resumed_at = Column(DateTime, nullable=True)  # Devam ettirilme zamanı
 
 
+# 🕒 Aşama Event Log tablosu (append-only: start / pause / resume / done)
+class WorkOrderStageEvent(Base):
+    __tablename__ = "work_order_stage_events"
+    __table_args__ = (
+        # Net çalışma süresi hesapları tek index range scan ile okunur
+        Index("ix_stage_events_stage_created", "work_order_stage_id", "created_at"),
+        Index("ix_stage_events_wo_stage_created", "work_order_id", "work_order_stage_id", "created_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    work_order_stage_id = Column(Integer, ForeignKey("work_order_stages.id"), nullable=False)
+    work_order_id = Column(Integer, ForeignKey("work_orders.id"), nullable=False)
+    event_type = Column(String, nullable=False)  # start / pause / resume / done
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+
+# 📈 İş Emri Metrik Özeti (aşama geçişlerinde güncellenir)
+class WorkOrderMetrics(Base):
+    __tablename__ = "work_order_metrics"
+    work_order_id = Column(Integer, ForeignKey("work_orders.id"), primary_key=True)
+    total_stages = Column(Integer, default=0)
+    planned_count = Column(Integer, default=0)
+    in_progress_count = Column(Integer, default=0)
+    paused_count = Column(Integer, default=0)
+    done_count = Column(Integer, default=0)
+    first_actual_start = Column(DateTime, nullable=True)  # İlk başlayan aşamanın actual_start'ı
+    last_actual_end = Column(DateTime, nullable=True)  # Son biten aşamanın actual_end'i
+    paused_seconds = Column(Float, default=0)  # Toplam duraklatma süresi (tüm aşamalar)
+    updated_at = Column(DateTime, nullable=True)
+
+
 # ⚠️ Arıza Bildirimleri tablosu
 class Issue(Base):
     __tablename__ = "issues"
@@ -72,12 +124,75 @@ class Machine(Base):
 # 📊 Makine Okumaları tablosu
 class MachineReading(Base):
     __tablename__ = "machine_readings"
+    __table_args__ = (
+        # Makine bazlı zaman aralığı sorguları ve sıralama için
+        Index("ix_machine_readings_machine_timestamp", "machine_id", "timestamp"),
+        # Rollup ve retention taramaları için
+        Index("ix_machine_readings_timestamp", "timestamp"),
+    )
     id = Column(Integer, primary_key=True)
     machine_id = Column(Integer, ForeignKey("machines.id"))
-    reading_type = Column(String)  # örn: temperature, pressure, speed
-    value = Column(String)  # Reading değeri (string olarak saklanır, farklı tipler için)
+    reading_type_id = Column(Integer, ForeignKey("reading_types.id"))
+    value_num = Column(Float, nullable=True)  # Sayısal değer (min/max/avg sorguları için)
+    value = Column(String, nullable=True)  # Sadece sayısal olmayan değerler için ham metin
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
+    reading_type_ref = relationship("ReadingType", lazy="joined")
+
+    @property
+    def reading_type(self):
+        return self.reading_type_ref.code if self.reading_type_ref else None
+
+
+# 📊 Makine okuma rollup tabloları (1 dakika / 1 saat / 1 gün)
+# Ortalama = value_sum / sample_count (toplam tutulur ki kovalar birleştirilebilsin)
+class ReadingRollupMixin:
+    @declared_attr
+    def machine_id(cls):
+        return Column(Integer, ForeignKey("machines.id"), primary_key=True)
+
+    @declared_attr
+    def reading_type_id(cls):
+        return Column(Integer, ForeignKey("reading_types.id"), primary_key=True)
+
+    bucket_start = Column(DateTime, primary_key=True)
+    sample_count = Column(Integer, nullable=False)
+    value_min = Column(Float)
+    value_max = Column(Float)
+    value_sum = Column(Float)
+
+    @declared_attr
+    def __table_args__(cls):
+        return (Index(f"ix_{cls.__tablename__}_bucket_start", "bucket_start"),)
+
+
+class MachineReading1m(ReadingRollupMixin, Base):
+    __tablename__ = "machine_readings_1m"
+
+
+class MachineReading1h(ReadingRollupMixin, Base):
+    __tablename__ = "machine_readings_1h"
+
+
+class MachineReading1d(ReadingRollupMixin, Base):
+    __tablename__ = "machine_readings_1d"
+
+
+# ⏱️ Rollup ilerleme durumu (çözünürlük başına watermark)
+class TelemetryRollupState(Base):
+    __tablename__ = "telemetry_rollup_state"
+    resolution = Column(String, primary_key=True)  # minute, hour, day
+    rolled_up_to = Column(DateTime, nullable=False)  # Bu zamandan önceki kovalar kapandı
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+# 📏 Okuma tipi lookup tablosu (temperature, pressure, speed, ...)
+class ReadingType(Base):
+    __tablename__ = "reading_types"
+    id = Column(Integer, primary_key=True)
+    code = Column(String(50), unique=True, nullable=False)
+    unit = Column(String(20), nullable=True)  # örn: °C, bar, rpm
+
 
 # 🔔 Manager Notification tablosu (DB tabanlı bildirimler)
 class Notification(Base):
@@ -94,9 +209,18 @@ class Notification(Base):
 # 📦 Ürün tablosu
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Liste endpoint'i: aktif ürünler sıralama anahtarlarına göre (keyset pagination)
+        active_index("products", "id"),
+        active_index("products", "code"),
+        active_index("products", "name", "id"),
+        active_index("products", "material", "id"),
+        active_index("products", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True)
     code = Column(String, unique=True, index=True)  # Ürün kodu (örn: PRD-001)
     name = Column(String)  # Ürün adı
+    name_key = Column(String, index=True)  # Küçük harfli arama anahtarı (ad ile eşitlik sorgusu)
     description = Column(String, nullable=True)  # Açıklama
     
     # Molds'tan taşınan alanlar (Excel kolonları)
@@ -109,13 +233,26 @@ class Product(Base):
     hourly_production = Column(Integer, nullable=True)  # Saatlik Üretim (adet)
     
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, nullable=True)
+    # AI eğitimi değişiklik takibi için her UPDATE'te set edilir (açıkça verilmediyse)
+    updated_at = Column(DateTime, nullable=True, onupdate=lambda: datetime.now(timezone.utc))
     deleted_at = Column(DateTime, nullable=True)  # Soft delete: Silinme tarihi (NULL = aktif)
 
+    @validates("name")
+    def _set_name_key(self, key, value):
+        self.name_key = product_name_key(value)
+        return value
+
 
 # 🔧 Kalıp tablosu
 class Mold(Base):
     __tablename__ = "molds"
+    __table_args__ = (
+        # Liste endpoint'i: aktif kalıplar sıralama anahtarlarına göre (keyset pagination)
+        active_index("molds", "id"),
+        active_index("molds", "code"),
+        active_index("molds", "name", "id"),
+        active_index("molds", "status", "id"),
+    )
     id = Column(Integer, primary_key=True)
     code = Column(String, unique=True, index=True)  # Kalıp kodu (örn: MOLD-001)
     name = Column(String)  # Kalıp adı (sadece kalıp ismi)
@@ -131,3 +268,30 @@ class Mold(Base):
     deleted_at = Column(DateTime, nullable=True)  # Soft delete: Silinme tarihi (NULL = aktif)
 
 
+# 🧠 AI eğitim işleri (arka plan iş kuyruğu, durum sorgulama için kalıcı)
+class TrainingJob(Base):
+    __tablename__ = "training_jobs"
+    __table_args__ = (
+        Index("ix_training_jobs_type_status", "job_type", "status"),
+    )
+    id = Column(Integer, primary_key=True)
+    job_type = Column(String, default="ai_train")
+    status = Column(String, default="pending")  # pending, running, done, failed
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    request_count = Column(Integer, default=1)  # Birleştirilen (coalesce) istek sayısı
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)  # JSON: skorlar, ürün sayısı
+    error = Column(Text, nullable=True)
+
+
+# 🔖 Tablo versiyon sayaçları (katalog endpoint'lerinde ETag / koşullu GET için)
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Her yazma transaction'ında artar
+
+
+# Sayaçları artıran session event'lerini kaydet (tüm modeller tanımlandıktan sonra)
+from .utils import table_versions as _table_versions  # noqa: E402,F401
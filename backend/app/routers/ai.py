@@ -6,18 +6,38 @@ Endpoints:
 - GET /api/urunler → Benzersiz ürün isimlerini listele
 - POST /api/recete → Ürün adına göre reçete döndür (önce DB, sonra AI)
 - POST /api/ai/tahmin → Malzeme bazlı AI tahmini (yeni ürünler için)
-- POST /api/ai/train → Modeli eğit
+- POST /api/ai/urun-tahmin/toplu → Ürün adı modeliyle toplu tahmin (tek predict çağrısı)
+- POST /api/ai/train → Model eğitimini kuyruğa al (job id döner)
+- GET /api/ai/train/jobs/{job_id} → Eğitim işinin durumu
+- GET /api/ai/train/changes → Son eğitimden beri değişen ürünler ve planlı eğitim
+- GET /api/ai/models → Model versiyonları ve aktif versiyon
+- POST /api/ai/models/{versiyon}/rollback → Önceki bir versiyona geri dön
 - GET /api/ai/status → Model durumunu kontrol et
+- GET /api/ai/cache → Tahmin cache'i hit/miss sayaçları
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db import get_db
-from app.ai_model import ai_model
-from app.models import Product
+from app.config import AI_BATCH_PREDICT_MAX_ITEMS
+from app.db import get_db, get_async_db
+from app.ai_model import ai_model, normalize_malzeme
+from app.models import Product, TrainingJob
+from app.routers.auth import require_roles
+from app.utils.etag import conditional_response
+from app.utils.name_index import product_name_index
+from app.utils.prediction_cache import NAMESPACE_MALZEME, prediction_cache
+from app.utils.table_versions import read_versions_async
+from app.utils.text_keys import product_name_key
+from app.utils.training_data import degisen_urun_sayisi
+from app.utils.training_jobs import JOB_TYPE_AI_TRAIN, retrain_scheduler, serialize_job, training_queue
 
 router = APIRouter(prefix="/api", tags=["AI - Üretim Tahmini"])
 
@@ -41,13 +61,27 @@ class MalzemeBazliTahminRequest(BaseModel):
     malzeme: str = Field(..., description="Malzeme tipi (PP, ABS, PA6, PC, vb.)")
     parca_agirligi_g: float = Field(..., ge=0, description="Parça ağırlığı (gram) - Zorunlu")
     goz_adedi: int = Field(..., ge=1, description="Göz adedi - Zorunlu")
+    saatlik_uretim: Optional[int] = Field(None, ge=1, description="Saatlik üretim (adet) - Boşsa malzeme ortalaması")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "malzeme": "PP",
                 "parca_agirligi_g": 10,
-                "goz_adedi": 4
+                "goz_adedi": 4,
+                "saatlik_uretim": 240
+            }
+        }
+
+
+class TopluTahminRequest(BaseModel):
+    """Ürün adı modeliyle toplu tahmin isteği"""
+    urun_adlari: List[str] = Field(..., min_length=1, max_length=AI_BATCH_PREDICT_MAX_ITEMS)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "urun_adlari": ["Elektrik Prizi", "Anahtar Kapağı"]
             }
         }
 
@@ -72,16 +106,16 @@ class ReceteResponse(BaseModel):
     # Ürün bulunamadığında
     oneri: Optional[str] = None
     benzer_urunler: Optional[List[str]] = None
+    benzer_urun_skorlari: Optional[List[dict]] = None  # [{"urun_adi", "skor"}], skora göre azalan
 
 
-class TrainResponse(BaseModel):
-    """Model eğitim yanıtı"""
+class TrainJobResponse(BaseModel):
+    """Model eğitim işi yanıtı"""
     success: bool
     message: str
-    urun_sayisi: Optional[int] = None
-    train_score: Optional[float] = None
-    test_score: Optional[float] = None
-    urunler: Optional[List[str]] = None
+    job_id: int
+    status: str
+    coalesced: bool = False  # Bekleyen bir işe birleştirildi mi
 
 
 class UrunListesiResponse(BaseModel):
@@ -100,85 +134,141 @@ class ModelStatusResponse(BaseModel):
 
 # ==================== Helper Functions ====================
 
-def urun_ara_veritabaninda(db: Session, urun_adi: str) -> Optional[Product]:
+async def urun_ara_veritabaninda(db: AsyncSession, urun_adi: str) -> Optional[Product]:
     """Ürünü veritabanında ara (büyük/küçük harf duyarsız)"""
-    return db.query(Product).filter(
-        Product.name.ilike(urun_adi),
-        Product.deleted_at.is_(None)
-    ).first()
+    result = await db.execute(
+        select(Product).filter(
+            Product.name_key == product_name_key(urun_adi),
+            Product.deleted_at.is_(None)
+        ).limit(1)
+    )
+    return result.scalars().first()
 
 
-def benzer_urunleri_bul(db: Session, urun_adi: str, limit: int = 5) -> List[str]:
-    """Benzer ürünleri bul (basit kelime eşleşmesi)"""
-    kelimeler = urun_adi.lower().split()
-    benzerler = []
-    
-    products = db.query(Product.name).filter(
-        Product.deleted_at.is_(None),
-        Product.name.isnot(None)
-    ).all()
+_indeks_kilidi = asyncio.Lock()
+
+
+async def urun_adi_indeksini_hazirla(db: AsyncSession) -> None:
+    """
+    Ürün adı trigram indeksini gerekiyorsa (ilk kullanım / yenileme süresi dolmuş)
+    veritabanından kurar. Başka bir istek kurarken eldeki indeks kullanılır.
+    """
+    if not product_name_index.needs_build():
+        return
+    if _indeks_kilidi.locked() and product_name_index.has_data:
+        return
+    async with _indeks_kilidi:
+        if not product_name_index.needs_build():
+            return
+        marker = product_name_index.change_marker()
+        result = await db.execute(
+            select(Product.id, Product.name).filter(
+                Product.deleted_at.is_(None),
+                Product.name.isnot(None)
+            )
+        )
+        await run_in_threadpool(product_name_index.build, result.all(), marker)
+
+
+async def benzer_urunleri_bul(db: AsyncSession, urun_adi: str, limit: int = 5) -> List[dict]:
+    """
+    Benzer ürünleri trigram benzerliğine göre sıralı döndürür.
+    Türkçe büyük/küçük harf ve aksan farkları (İ/ı, ş, ğ, ...) yok sayılır.
+    """
+    await urun_adi_indeksini_hazirla(db)
+    # Arama CPU işidir (numpy sayımı); event loop'u bloklamasın
+    sonuclar = await run_in_threadpool(product_name_index.search, urun_adi, limit)
+    return [{"urun_adi": name, "skor": skor} for name, skor in sonuclar]
+
+
+async def mevcut_malzemeleri_getir(db: AsyncSession) -> List[str]:
+    """Aktif ürünlerde kullanılan malzemeleri sıralı döndürür."""
+    result = await db.execute(
+        select(Product.material).filter(
+            Product.deleted_at.is_(None),
+            Product.material.isnot(None)
+        ).distinct()
+    )
+    return sorted(set(m for m in result.scalars() if m))
+
+
+async def malzeme_bazli_tahmin(
+    db: AsyncSession,
+    malzeme: str,
+    parca_agirligi: float,
+    goz_adedi: int,
+    saatlik_uretim: Optional[int] = None
+) -> dict:
+    """
+    Yeni ürün için malzeme bazlı tahmin.
     
-    for p in products:
-        if p.name:
-            p_lower = p.name.lower()
-            for kelime in kelimeler:
-                if len(kelime) >= 3 and kelime in p_lower:
-                    benzerler.append(p.name)
-                    break
+    Eğitilmiş malzeme modeli varsa tahmin bellekte yapılır (veritabanına gidilmez).
+    Model henüz eğitilmemişse malzeme ortalamaları tek bir aggregate sorgusuyla
+    alınıp eski ayarlama katsayıları uygulanır. Her iki sonuç da cache'lenir.
+    """
+    sonuc = await run_in_threadpool(
+        ai_model.malzeme_tahmin_yap, malzeme, parca_agirligi, goz_adedi, saatlik_uretim
+    )
+    if sonuc is not None:
+        return sonuc
     
-    return benzerler[:limit]
+    anahtar = (NAMESPACE_MALZEME, None, normalize_malzeme(malzeme), parca_agirligi, goz_adedi)
+    sonuc = prediction_cache.get(anahtar)
+    if sonuc is None:
+        sonuc = await malzeme_ortalamasi_hesapla(db, malzeme, parca_agirligi, goz_adedi)
+        prediction_cache.put(anahtar, sonuc)
+    elif "malzeme" in sonuc:
+        sonuc["malzeme"] = malzeme
+    return sonuc
 
 
-def malzeme_bazli_tahmin(db: Session, malzeme: str, parca_agirligi: float, goz_adedi: int) -> dict:
+async def malzeme_ortalamasi_hesapla(db: AsyncSession, malzeme: str, parca_agirligi: float, goz_adedi: int) -> dict:
     """
-    Malzeme bazlı ortalama değerler hesapla.
-    Aynı malzemeyi kullanan ürünlerin ortalamasını al.
+    Malzeme bazlı ortalama değerler hesapla (model yokken yedek yöntem).
+    Aynı malzemeyi kullanan ürünlerin ortalaması veritabanında alınır.
     Parça ağırlığı ve göz adedine göre ayarlama yap.
     """
-    # Aynı malzemeyi kullanan ürünleri bul
-    query = db.query(Product).filter(
-        Product.deleted_at.is_(None),
-        Product.material.ilike(f"%{malzeme}%"),
-        Product.injection_temp_c.isnot(None),
-        Product.mold_temp_c.isnot(None),
-        Product.cycle_time_sec.isnot(None)
+    result = await db.execute(
+        select(
+            func.count(Product.id).label("n"),
+            func.avg(Product.injection_temp_c).label("ort_enj"),
+            func.avg(Product.mold_temp_c).label("ort_kalip"),
+            func.avg(Product.cycle_time_sec).label("ort_cevrim"),
+            # 0 değerleri ortalamaya katılmaz (NULL gibi)
+            func.avg(func.nullif(Product.part_weight_g, 0)).label("agirlik_ortalamasi"),
+            func.avg(func.nullif(Product.cavity_count, 0)).label("goz_ortalamasi"),
+        ).filter(
+            Product.deleted_at.is_(None),
+            Product.material.ilike(f"%{malzeme}%"),
+            Product.injection_temp_c.isnot(None),
+            Product.mold_temp_c.isnot(None),
+            Product.cycle_time_sec.isnot(None)
+        )
     )
+    ozet = result.one()
+    n = ozet.n
     
-    products = query.all()
-    
-    if not products:
+    if not n:
         return {
             "success": False,
             "message": f"'{malzeme}' malzemesi için kayıtlı ürün bulunamadı."
         }
     
-    # Ortalama hesapla
-    toplam_enj = sum(p.injection_temp_c for p in products)
-    toplam_kalip = sum(p.mold_temp_c for p in products)
-    toplam_cevrim = sum(p.cycle_time_sec for p in products)
-    n = len(products)
-    
-    ort_enj = toplam_enj / n
-    ort_kalip = toplam_kalip / n
-    ort_cevrim = toplam_cevrim / n
+    ort_enj = float(ozet.ort_enj)
+    ort_kalip = float(ozet.ort_kalip)
+    ort_cevrim = float(ozet.ort_cevrim)
     
     # Parça ağırlığına göre çevrim süresini ayarla
-    agirlik_listesi = [p.part_weight_g for p in products if p.part_weight_g]
-    if agirlik_listesi:
-        agirlik_ortalamasi = sum(agirlik_listesi) / len(agirlik_listesi)
-        if agirlik_ortalamasi > 0:
-            agirlik_faktoru = parca_agirligi / agirlik_ortalamasi
-            # Ağır parçalar daha uzun süre gerektirir
-            ort_cevrim = ort_cevrim * (0.7 + 0.3 * agirlik_faktoru)
+    if ozet.agirlik_ortalamasi:
+        agirlik_faktoru = parca_agirligi / float(ozet.agirlik_ortalamasi)
+        # Ağır parçalar daha uzun süre gerektirir
+        ort_cevrim = ort_cevrim * (0.7 + 0.3 * agirlik_faktoru)
     
     # Göz adedine göre saatlik üretim ve çevrim süresini ayarla
-    goz_listesi = [p.cavity_count for p in products if p.cavity_count]
-    if goz_listesi:
-        goz_ortalamasi = sum(goz_listesi) / len(goz_listesi)
-        if goz_ortalamasi > 0:
-            goz_faktoru = goz_adedi / goz_ortalamasi
-            # Daha fazla göz = daha uzun çevrim ama daha fazla ürün
-            ort_cevrim = ort_cevrim * (0.8 + 0.2 * goz_faktoru)
+    if ozet.goz_ortalamasi:
+        goz_faktoru = goz_adedi / float(ozet.goz_ortalamasi)
+        # Daha fazla göz = daha uzun çevrim ama daha fazla ürün
+        ort_cevrim = ort_cevrim * (0.8 + 0.2 * goz_faktoru)
     
     return {
         "success": True,
@@ -192,23 +282,31 @@ def malzeme_bazli_tahmin(db: Session, malzeme: str, parca_agirligi: float, goz_a
         "girilen_degerler": {
             "parca_agirligi_g": parca_agirligi,
             "goz_adedi": goz_adedi
-        }
+        },
+        "yontem": "ortalama"
     }
 
 
 # ==================== Endpoints ====================
 
 @router.get("/urunler", response_model=UrunListesiResponse)
-async def urunleri_listele(db: Session = Depends(get_db)):
+async def urunleri_listele(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Veritabanındaki tüm ürün isimlerini listeler.
+    
+    ETag döner; `If-None-Match` ile gönderilirse ve ürünler değişmediyse 304 döner.
     """
-    products = db.query(Product.name).filter(
-        Product.deleted_at.is_(None),
-        Product.name.isnot(None)
-    ).distinct().all()
+    not_modified = conditional_response(request, response, await read_versions_async(db, ["products"]))
+    if not_modified is not None:
+        return not_modified
+    result = await db.execute(
+        select(Product.name).filter(
+            Product.deleted_at.is_(None),
+            Product.name.isnot(None)
+        ).distinct()
+    )
     
-    urunler = sorted([p.name for p in products if p.name])
+    urunler = sorted([name for name in result.scalars() if name])
     
     return UrunListesiResponse(
         success=True,
@@ -218,7 +316,7 @@ async def urunleri_listele(db: Session = Depends(get_db)):
 
 
 @router.post("/recete")
-async def recete_getir(request: ReceteRequest, db: Session = Depends(get_db)):
+async def recete_getir(request: ReceteRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Ürün adına göre reçete döndürür.
     
@@ -232,7 +330,7 @@ async def recete_getir(request: ReceteRequest, db: Session = Depends(get_db)):
     urun_adi = request.urun_adi.strip()
     
     # 1. Veritabanında ara
-    product = urun_ara_veritabaninda(db, urun_adi)
+    product = await urun_ara_veritabaninda(db, urun_adi)
     
     if product:
         # Ürün bulundu - gerçek değerleri döndür
@@ -265,7 +363,7 @@ async def recete_getir(request: ReceteRequest, db: Session = Depends(get_db)):
             }
     
     # 2. Ürün bulunamadı - benzer ürünleri öner
-    benzerler = benzer_urunleri_bul(db, urun_adi)
+    benzerler = await benzer_urunleri_bul(db, urun_adi)
     
     return {
         "success": False,
@@ -273,31 +371,40 @@ async def recete_getir(request: ReceteRequest, db: Session = Depends(get_db)):
         "urun_adi": urun_adi,
         "message": f"'{urun_adi}' veritabanında bulunamadı.",
         "oneri": "Yeni ürün için POST /api/ai/tahmin endpoint'ini malzeme bilgisiyle kullanın.",
-        "benzer_urunler": benzerler if benzerler else None
+        "benzer_urunler": [b["urun_adi"] for b in benzerler] if benzerler else None,
+        "benzer_urun_skorlari": benzerler if benzerler else None
     }
 
 
 @router.post("/ai/tahmin")
-async def malzeme_bazli_ai_tahmin(request: MalzemeBazliTahminRequest, db: Session = Depends(get_db)):
+async def malzeme_bazli_ai_tahmin(request: MalzemeBazliTahminRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Malzeme bazlı AI tahmini yapar (yeni ürünler için).
     
     **Nasıl çalışır:**
-    - Aynı malzemeyi kullanan kayıtlı ürünlerin ortalamasını alır
-    - Parça ağırlığına göre çevrim süresini ayarlar
+    - Malzeme (one-hot), parça ağırlığı, göz adedi ve saatlik üretim ile
+      eğitilmiş malzeme modeli bellekte tahmin yapar
+    - Saatlik üretim verilmezse malzemenin ortalaması kullanılır
+    - Model henüz eğitilmemişse aynı malzemeyi kullanan ürünlerin
+      ortalaması alınıp parça ağırlığı ve göz adedine göre ayarlanır
     
     **Örnek:**
     - Malzeme: PP → PP kullanan ürünlerin ortalama değerleri
     - Malzeme: ABS → ABS kullanan ürünlerin ortalama değerleri
     """
-    sonuc = malzeme_bazli_tahmin(
+    sonuc = await malzeme_bazli_tahmin(
         db=db,
         malzeme=request.malzeme,
         parca_agirligi=request.parca_agirligi_g,
-        goz_adedi=request.goz_adedi
+        goz_adedi=request.goz_adedi,
+        saatlik_uretim=request.saatlik_uretim
     )
     
     if sonuc["success"]:
+        if sonuc.get("yontem") == "model":
+            message = f"{sonuc['kaynak_urun_sayisi']} adet {request.malzeme} malzemeli ürünle eğitilen modelden tahmin edildi."
+        else:
+            message = f"{sonuc['kaynak_urun_sayisi']} adet {request.malzeme} malzemeli ürünün ortalaması alındı."
         return {
             "success": True,
             "kaynak": "ai_tahmin",
@@ -313,16 +420,13 @@ async def malzeme_bazli_ai_tahmin(request: MalzemeBazliTahminRequest, db: Sessio
                 "cevrim_suresi": "saniye"
             },
             "kaynak_urun_sayisi": sonuc["kaynak_urun_sayisi"],
-            "message": f"{sonuc['kaynak_urun_sayisi']} adet {request.malzeme} malzemeli ürünün ortalaması alındı."
+            "yontem": sonuc["yontem"],
+            "model_versiyonu": sonuc.get("model_versiyonu"),
+            "message": message
         }
     else:
         # Mevcut malzemeleri listele
-        malzemeler = db.query(Product.material).filter(
-            Product.deleted_at.is_(None),
-            Product.material.isnot(None)
-        ).distinct().all()
-        
-        mevcut_malzemeler = sorted(set(m.material for m in malzemeler if m.material))
+        mevcut_malzemeler = await mevcut_malzemeleri_getir(db)
         
         return {
             "success": False,
@@ -331,36 +435,150 @@ async def malzeme_bazli_ai_tahmin(request: MalzemeBazliTahminRequest, db: Sessio
         }
 
 
-@router.post("/ai/train", response_model=TrainResponse)
-async def model_egit(db: Session = Depends(get_db)):
+# Tahmin CPU-bound olduğu için `def`: threadpool'da çalışır, event loop bloklanmaz.
+@router.post("/ai/urun-tahmin/toplu")
+def toplu_urun_tahmini(request: TopluTahminRequest):
+    """
+    Eğitilmiş ürün adı modeliyle birden çok ürünü tek seferde tahmin eder.
+    
+    Tüm bilinen ürünler tek bir `predict` çağrısında işlenir; sonuçlar
+    istekteki sırayla döner. Bilinmeyen ürünler için `success: false` ve
+    varsa benzer ürün önerisi (`oneri`) döner.
     """
-    AI modelini veritabanındaki verilerle eğitir.
+    sonuclar = ai_model.toplu_tahmin_yap([u.strip() for u in request.urun_adlari])
+    
+    return {
+        "success": True,
+        "model_versiyonu": ai_model.model_versiyonu,
+        "toplam": len(sonuclar),
+        "basarili": sum(1 for s in sonuclar if s["success"]),
+        "sonuclar": sonuclar
+    }
+
+
+# Eğitim kuyruğu senkron Session kullanır; bu endpoint'ler `def` olduğu
+# için FastAPI tarafından threadpool'da çalıştırılır (event loop bloklanmaz).
+@router.post("/ai/train", response_model=TrainJobResponse, status_code=202)
+def model_egit(db: Session = Depends(get_db)):
+    """
+    AI model eğitimini arka plan kuyruğuna alır ve hemen job id döndürür.
+    Durum `GET /api/ai/train/jobs/{job_id}` ile sorgulanır.
+    
+    Zaten bekleyen bir eğitim varsa yeni iş açılmaz, istek ona birleştirilir.
     
     **Not:** Yeni sistem veritabanından direkt değer çektiği için
     bu endpoint artık opsiyoneldir.
     """
-    sonuc = ai_model.model_egit(db)
+    job, coalesced = training_queue.submit(db)
     
-    return TrainResponse(
-        success=sonuc["success"],
-        message=sonuc["message"],
-        urun_sayisi=sonuc.get("urun_sayisi"),
-        train_score=sonuc.get("train_score"),
-        test_score=sonuc.get("test_score"),
-        urunler=sonuc.get("urunler")
+    return TrainJobResponse(
+        success=True,
+        message="Bekleyen eğitime eklendi." if coalesced else "Eğitim kuyruğa alındı.",
+        job_id=job.id,
+        status=job.status,
+        coalesced=coalesced
     )
 
 
+@router.get("/ai/train/jobs/{job_id}")
+def egitim_isi_durumu(job_id: int, db: Session = Depends(get_db)):
+    """
+    Eğitim işinin durumunu döndürür: pending, running, done veya failed.
+    İş tamamlandığında `result` eğitim skorlarını içerir.
+    """
+    job = db.query(TrainingJob).filter(TrainingJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Eğitim işi bulunamadı.")
+    return serialize_job(job)
+
+
+@router.get("/ai/train/jobs")
+def egitim_islerini_listele(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Son eğitim işlerini en yeniden eskiye listeler."""
+    jobs = db.query(TrainingJob).filter(
+        TrainingJob.job_type == JOB_TYPE_AI_TRAIN
+    ).order_by(TrainingJob.id.desc()).limit(limit).all()
+    return {
+        "total": len(jobs),
+        "data": [serialize_job(job) for job in jobs]
+    }
+
+
+@router.get("/ai/train/changes")
+def egitim_degisiklikleri(db: Session = Depends(get_db)):
+    """
+    Aktif modelin veri filigranından beri değişen ürün sayısını ve
+    otomatik eğitim zamanlayıcısının durumunu döndürür.
+    """
+    filigran = ai_model.veri_filigrani()
+    return {
+        "veri_filigrani": filigran,
+        "degisen_urun": degisen_urun_sayisi(db, filigran),
+        "esik": retrain_scheduler.min_changes,
+        "otomatik_egitim": retrain_scheduler.enabled,
+        "planli": retrain_scheduler.pending,
+    }
+
+
+@router.get("/ai/models")
+def model_versiyonlarini_listele():
+    """
+    Registry'deki model versiyonlarını (yeniden eskiye) ve aktif versiyonu listeler.
+    Her versiyonun metadata'sı eğitim satır sayısı, skorlar ve feature setini içerir.
+    """
+    registry = ai_model.registry
+    versiyonlar = registry.list_metadata()
+    return {
+        "aktif_versiyon": registry.current_version(),
+        "yuklu_versiyon": ai_model.model_versiyonu,
+        "total": len(versiyonlar),
+        "data": versiyonlar
+    }
+
+
+@router.post("/ai/models/{versiyon}/rollback")
+def model_versiyonuna_don(
+    versiyon: str,
+    current_user: dict = Depends(require_roles("admin"))  # ✅ Sadece admin
+):
+    """
+    Aktif model pointer'ını önceki bir versiyona çevirir ve modeli yeniden yükler.
+    Diğer worker'lar değişikliği bir sonraki tahminde algılar.
+    
+    **Yetki:** Sadece admin
+    """
+    registry = ai_model.registry
+    if not registry.exists(versiyon):
+        raise HTTPException(status_code=404, detail="Model versiyonu bulunamadı.")
+    
+    onceki = registry.current_version()
+    if not ai_model.versiyona_don(versiyon):
+        raise HTTPException(status_code=500, detail="Model versiyonu yüklenemedi.")
+    
+    return {
+        "success": True,
+        "message": f"Model {versiyon} versiyonuna döndürüldü.",
+        "onceki_versiyon": onceki,
+        "aktif_versiyon": versiyon,
+        "metadata": registry.read_metadata(versiyon)
+    }
+
+
 @router.get("/ai/status", response_model=ModelStatusResponse)
-async def model_durumu(db: Session = Depends(get_db)):
+async def model_durumu(db: AsyncSession = Depends(get_async_db)):
     """
     Sistem durumunu kontrol eder.
     """
     # Veritabanındaki ürün sayısı
-    urun_sayisi = db.query(Product).filter(
-        Product.deleted_at.is_(None),
-        Product.injection_temp_c.isnot(None)
-    ).count()
+    urun_sayisi = await db.scalar(
+        select(func.count(Product.id)).filter(
+            Product.deleted_at.is_(None),
+            Product.injection_temp_c.isnot(None)
+        )
+    )
     
     return ModelStatusResponse(
         model_hazir=True,  # Artık her zaman hazır (veritabanı kullanıyoruz)
@@ -369,19 +587,27 @@ async def model_durumu(db: Session = Depends(get_db)):
     )
 
 
+@router.get("/ai/cache")
+def tahmin_cache_durumu():
+    """
+    Tahmin cache'inin boyutunu ve hit/miss sayaçlarını döndürür
+    (toplam ve namespace bazında: urun, malzeme).
+    """
+    return prediction_cache.stats()
+
+
 @router.get("/ai/malzemeler")
-async def malzemeleri_listele(db: Session = Depends(get_db)):
+async def malzemeleri_listele(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Veritabanındaki tüm malzeme tiplerini listeler.
     
     Yeni ürün tahmini yaparken kullanılabilecek malzemeleri gösterir.
+    ETag döner; `If-None-Match` ile gönderilirse ve ürünler değişmediyse 304 döner.
     """
-    malzemeler = db.query(Product.material).filter(
-        Product.deleted_at.is_(None),
-        Product.material.isnot(None)
-    ).distinct().all()
-    
-    mevcut_malzemeler = sorted(set(m.material for m in malzemeler if m.material))
+    not_modified = conditional_response(request, response, await read_versions_async(db, ["products"]))
+    if not_modified is not None:
+        return not_modified
+    mevcut_malzemeler = await mevcut_malzemeleri_getir(db)
     
     return {
         "success": True,
@@ -10,6 +10,8 @@ from typing import List
 from app.db import get_db
 from app.models import User
 from app.schemas import UserResponse, RoleUpdate, UserCreate
+from app.utils.text_keys import username_key
+from app.utils.user_cache import user_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -82,15 +84,32 @@ def verify_token(authorization: str = Header(None), db: Session = Depends(get_db
                 detail="Token geçersiz."
             )
 
-        # Kullanıcıyı veritabanından çek (case-insensitive - güvenlik için)
-        user = db.query(User).filter(User.username.ilike(username)).first()
-        if not user:
-            raise HTTPException(
-                status_code=401,
-                detail="Kullanıcı bulunamadı."
-            )
+        token_user_id = payload.get("user_id")
+
+        # Önce cache'e bak - her istekte users tablosuna gitmeyelim
+        cache_key = user_cache.make_key(username, token_user_id)
+        identity = user_cache.get(cache_key)
+
+        if identity is None:
+            # Kullanıcıyı veritabanından çek (case-insensitive: indeksli username_key eşitliği)
+            user = db.query(User).filter(User.username_key == username_key(username)).first()
+            if not user:
+                raise HTTPException(
+                    status_code=401,
+                    detail="Kullanıcı bulunamadı."
+                )
 
-        return {"username": user.username, "role": role, "user_id": user.id}
+            # Token başka (silinmiş) bir kullanıcı için üretilmişse reddet
+            if token_user_id is not None and user.id != token_user_id:
+                raise HTTPException(
+                    status_code=401,
+                    detail="Kullanıcı bulunamadı."
+                )
+
+            identity = {"username": user.username, "user_id": user.id}
+            user_cache.set(cache_key, identity)
+
+        return {"username": identity["username"], "role": role, "user_id": identity["user_id"]}
 
     except JWTError:
         raise HTTPException(
@@ -158,8 +177,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     username = form_data.username.strip().lower()
     
     # Veritabanında kullanıcıyı ara (case-insensitive)
-    # PostgreSQL için ilike, SQLite için lower() kullanılabilir
-    user = db.query(User).filter(User.username.ilike(username)).first()
+    # ilike index kullanamaz; normalize edilmiş username_key üzerinde eşitlik aranır
+    user = db.query(User).filter(User.username_key == username_key(username)).first()
 
     if not user:
         raise HTTPException(status_code=401, detail="Geçersiz kullanıcı adı veya şifre.")
@@ -170,7 +189,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
     # Token oluştur - token'da orijinal username kullan (veritabanındaki)
     access_token = create_access_token(
-        data={"sub": user.username, "role": user.role}
+        data={"sub": user.username, "role": user.role, "user_id": user.id}
     )
 
     return {
@@ -193,7 +212,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     normalized_username = user_data.username.strip().lower()
     
     # Case-insensitive kontrol - aynı kullanıcı adı var mı?
-    existing = db.query(User).filter(User.username.ilike(normalized_username)).first()
+    existing = db.query(User).filter(User.username_key == username_key(normalized_username)).first()
     if existing:
         raise HTTPException(status_code=400, detail="Bu kullanıcı adı zaten kayıtlı.")
 
@@ -219,7 +238,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Kayıt sonrası otomatik login için token oluştur
     # Token'da veritabanındaki username kullanılır (normalize edilmiş)
     access_token = create_access_token(
-        data={"sub": new_user.username, "role": new_user.role}
+        data={"sub": new_user.username, "role": new_user.role, "user_id": new_user.id}
     )
 
     # UserResponse schema'sına uygun user objesi oluştur
@@ -307,6 +326,9 @@ def change_user_role(
     db.commit()
     db.refresh(user)
     
+    # Cache'teki kimlik kaydını düşür
+    user_cache.invalidate_user(user_id=user.id, username=user.username)
+    
     return {
         "ok": True,
         "user_id": user.id,
@@ -352,6 +374,9 @@ def delete_user(
     db.delete(user)
     db.commit()
     
+    # Silinen kullanıcının token'ları artık cache'ten doğrulanmasın
+    user_cache.invalidate_user(user_id=user_id, username=deleted_username)
+    
     return {
         "ok": True,
         "message": "Kullanıcı başarıyla silindi.",
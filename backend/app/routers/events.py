@@ -0,0 +1,121 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.config import EVENT_KEEPALIVE_SECONDS
+from app.routers.auth import get_current_user
+from app.utils.event_bus import event_bus, Event
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def format_sse(event: Event) -> str:
+    """Event'i Server-Sent Events formatına çevirir."""
+    payload = {
+        "id": event.id,
+        "type": event.type,
+        "data": event.data,
+        "created_at": event.created_at,
+    }
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+# ---------------------------------------------------------
+# ✅ Event Stream (SSE): Tüm roller
+# ---------------------------------------------------------
+@router.get("/stream")
+async def event_stream(
+    request: Request,
+    types: Optional[str] = Query(None, description="Virgülle ayrılmış event tipleri (örn: stage.started,issue.reported)"),
+    last_event_id: Optional[int] = Query(None, ge=0, description="Bu id'den sonraki event'lerden devam et"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Aşama geçişleri, arıza bildirimleri ve notification'lar için
+    Server-Sent Events akışı. Polling yerine kullanılır.
+
+    - Kullanıcı sadece kendi rolüne gönderilen event'leri alır
+    - Bağlantı koparsa tarayıcı/istemci `Last-Event-ID` header'ı ile
+      (veya `last_event_id` parametresiyle) kaldığı yerden devam eder
+    - Kaçırılan event'ler buffer'dan düşmüşse önce `stream.reset`
+      event'i gönderilir; istemci verisini baştan çekmelidir
+
+    **Event tipleri:** stage.started, stage.paused, stage.resumed, stage.done,
+    issue.reported, issue.status_changed, notification.created
+
+    **Yetki:** Tüm roller
+    """
+    # Uzun süren bağlantı boyunca DB connection'ı tutma
+    db.close()
+
+    type_filter = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    resume_from = last_event_id if last_event_id is not None else last_event_id_header
+
+    sub, replay, gap = event_bus.subscribe(
+        role=current_user["role"],
+        types=type_filter,
+        last_event_id=resume_from,
+    )
+
+    async def generator():
+        sent_id = resume_from or 0
+        try:
+            yield "retry: 3000\n\n"
+            if gap:
+                yield "event: stream.reset\ndata: {}\n\n"
+            for event in replay:
+                sent_id = event.id
+                yield format_sse(event)
+
+            while not sub.overflow:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event.id <= sent_id:
+                    continue  # Replay ile zaten gönderildi
+                sent_id = event.id
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------------------------------------------------------
+# ✅ Son Event'ler (SSE desteklemeyen istemciler için)
+# ---------------------------------------------------------
+@router.get("/recent")
+def recent_events(
+    after: int = Query(0, ge=0, description="Bu id'den sonraki event'ler"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Buffer'daki event'leri döndürür. SSE kullanamayan istemciler
+    `after=<son id>` ile ucuz bir delta sorgusu yapabilir (DB'ye gitmez).
+
+    **Yetki:** Tüm roller
+    """
+    role = current_user["role"]
+    events = [e for e in event_bus.history(after) if role in e.roles]
+    return {
+        "last_event_id": event_bus.last_event_id,
+        "total": len(events),
+        "data": [
+            {"id": e.id, "type": e.type, "data": e.data, "created_at": e.created_at}
+            for e in events
+        ]
+    }
@@ -6,6 +6,7 @@ from typing import Optional, List
 from app.db import get_db
 from app.models import Issue, Notification, User
 from app.routers.auth import require_roles, get_current_user
+from app.utils.event_bus import event_bus
 
 router = APIRouter(prefix="/issues", tags=["Issues"])
 
@@ -83,6 +84,7 @@ def update_issue_status(
     db.refresh(issue)
     
     # ✅ DB tabanlı notification oluştur (manager'lara bildir)
+    notifications = []
     if new_status == "acknowledged":
         # Manager'lara (admin, planner) bildirim gönder
         for role in ["admin", "planner"]:
@@ -92,6 +94,7 @@ def update_issue_status(
                 message=f"Issue #{issue.id} acknowledged by {current_user['username']}"
             )
             db.add(notification)
+            notifications.append(notification)
     elif new_status == "resolved":
         # Manager'lara çözüldü bildirimi
         for role in ["admin", "planner"]:
@@ -101,9 +104,25 @@ def update_issue_status(
                 message=f"Issue #{issue.id} resolved by {current_user['username']}"
             )
             db.add(notification)
+            notifications.append(notification)
     
     db.commit()
     
+    # ✅ Canlı akışa yayınla
+    event_bus.publish("issue.status_changed", {
+        "issue_id": issue.id,
+        "work_order_stage_id": issue.work_order_stage_id,
+        "old_status": old_status,
+        "new_status": issue.status,
+        "by": current_user["username"],
+    })
+    for notification in notifications:
+        event_bus.publish("notification.created", {
+            "notification_id": notification.id,
+            "issue_id": issue.id,
+            "message": notification.message,
+        }, roles=(notification.recipient_role,))
+    
     return {
         "ok": True,
         "issue_id": issue.id,
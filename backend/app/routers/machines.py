@@ -1,16 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import threading
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Set, Tuple, Union
+from datetime import datetime, timedelta
 
 from app.db import get_db
+from app.config import READINGS_BULK_MAX_ITEMS, MACHINE_ID_CACHE_TTL_SECONDS
 from app.models import Machine, MachineReading
 from app.routers.auth import get_current_user
+from app.utils.machine_readings import (
+    choose_bucket, downsample_readings, normalize_reading_type, parse_value,
+    reading_type_cache, serialize_reading,
+)
+from app.utils.etag import conditional_response
+from app.utils.sql_time import BUCKET_UNITS
+from app.utils.table_versions import read_versions
 
 router = APIRouter(prefix="/machines", tags=["Machines"])
 
 
+class MachineIdCache:
+    """
+    Geçerli makine id'lerinin TTL'li bellek içi kümesi.
+    Bilinmeyen bir id gelirse küme (TTL dolmamış olsa da) en fazla
+    saniyede bir kez yenilenir; böylece yeni makineler hemen tanınır.
+    """
+
+    def __init__(self, ttl_seconds: float = MACHINE_ID_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._ids: Set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self, db: Session) -> None:
+        self._ids = {row.id for row in db.query(Machine.id).all()}
+        self._loaded_at = time.monotonic()
+
+    def valid_ids(self, db: Session, wanted: Set[int]) -> Set[int]:
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            if age > self.ttl_seconds or (not wanted <= self._ids and age > 1.0):
+                self._refresh(db)
+            return wanted & self._ids
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+
+machine_id_cache = MachineIdCache()
+
+
 # Schemas
 class MachineCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -21,7 +66,14 @@ class MachineCreate(BaseModel):
 
 class MachineReadingCreate(BaseModel):
     reading_type: str = Field(..., min_length=1, max_length=50)
-    value: str = Field(..., min_length=1)
+    value: Union[float, str]  # Sayısal değerler value_num kolonuna yazılır
+    timestamp: Optional[datetime] = None
+
+
+class MachineReadingBulkItem(BaseModel):
+    machine_id: int
+    reading_type: str = Field(..., min_length=1, max_length=50)
+    value: Union[float, str]
     timestamp: Optional[datetime] = None
 
 
@@ -30,14 +82,21 @@ class MachineReadingCreate(BaseModel):
 # ---------------------------------------------------------
 @router.get("/")
 def list_machines(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Tüm makineleri listeler.
     
+    ETag döner; `If-None-Match` ile gönderilirse ve makineler değişmediyse 304 döner.
+    
     **Yetki:** Tüm roller
     """
+    not_modified = conditional_response(request, response, read_versions(db, ["machines"]))
+    if not_modified is not None:
+        return not_modified
     machines = db.query(Machine).all()
     return {
         "total": len(machines),
@@ -73,6 +132,7 @@ def create_machine(
     db.add(machine)
     db.commit()
     db.refresh(machine)
+    machine_id_cache.invalidate()
     
     return {
         "ok": True,
@@ -81,6 +141,118 @@ def create_machine(
     }
 
 
+def parse_bulk_readings(body: bytes, content_type: str) -> List:
+    """
+    Toplu okuma gövdesini ham dict listesine çevirir.
+    
+    - application/x-ndjson: her satırda bir JSON nesnesi
+    - application/json: liste veya {"readings": [...]}
+    """
+    text = body.decode("utf-8")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                items.append({"_parse_error": f"line {line_no}: invalid JSON"})
+        return items
+    
+    payload = json.loads(text) if text.strip() else []
+    if isinstance(payload, dict):
+        payload = payload.get("readings", [])
+    if not isinstance(payload, list):
+        raise ValueError("Body must be a JSON list or {\"readings\": [...]}")
+    return payload
+
+
+def ingest_readings(db: Session, raw_items: List) -> dict:
+    """Okumaları doğrular ve tek bir executemany INSERT ile yazar."""
+    rejected = []
+    valid: List[Tuple[int, MachineReadingBulkItem]] = []
+    for index, raw in enumerate(raw_items):
+        if isinstance(raw, dict) and "_parse_error" in raw:
+            rejected.append({"index": index, "error": raw["_parse_error"]})
+            continue
+        try:
+            valid.append((index, MachineReadingBulkItem.model_validate(raw)))
+        except ValidationError as e:
+            rejected.append({"index": index, "error": e.errors()[0]["msg"]})
+    
+    known = machine_id_cache.valid_ids(db, {item.machine_id for _, item in valid})
+    valid_known = [item for _, item in valid if item.machine_id in known]
+    type_ids = reading_type_cache.resolve(db, {item.reading_type for item in valid_known})
+    now = datetime.utcnow()
+    rows = []
+    for index, item in valid:
+        if item.machine_id not in known:
+            rejected.append({"index": index, "machine_id": item.machine_id, "error": "Makine bulunamadı."})
+            continue
+        value_num, value = parse_value(item.value)
+        if value_num is None and not value:
+            rejected.append({"index": index, "machine_id": item.machine_id, "error": "Boş değer."})
+            continue
+        rows.append({
+            "machine_id": item.machine_id,
+            "reading_type_id": type_ids[normalize_reading_type(item.reading_type)],
+            "value_num": value_num,
+            "value": value,
+            "timestamp": item.timestamp or now,
+        })
+    
+    if rows:
+        db.execute(insert(MachineReading), rows)
+        db.commit()
+    
+    rejected.sort(key=lambda r: r["index"])
+    return {
+        "ok": True,
+        "accepted": len(rows),
+        "rejected": len(rejected),
+        "errors": rejected[:50],  # İlk 50 hata (istekteki sırayla)
+    }
+
+
+# ---------------------------------------------------------
+# ✅ Bulk Machine Readings (JSON / NDJSON)
+# ---------------------------------------------------------
+@router.post("/readings/bulk")
+async def post_machine_readings_bulk(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Birden fazla makineye ait okumaları tek istekte kaydeder.
+    
+    **Body:** JSON liste, `{"readings": [...]}` veya NDJSON
+    (`Content-Type: application/x-ndjson`). Her öğe:
+    `{"machine_id": 1, "reading_type": "temperature", "value": 215.5, "timestamp": "..."}`
+    
+    Geçersiz öğeler ve bilinmeyen makineler reddedilir, geri kalanlar
+    tek bir toplu INSERT ile yazılır.
+    
+    **Yetki:** Tüm roller (production'da sadece sistem servisleri)
+    """
+    body = await request.body()
+    try:
+        raw_items = parse_bulk_readings(body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Geçersiz body: {str(e)}")
+    
+    if len(raw_items) > READINGS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Tek istekte en fazla {READINGS_BULK_MAX_ITEMS} okuma gönderilebilir."
+        )
+    
+    # DB işlemleri event loop'u bloklamasın
+    return await run_in_threadpool(ingest_readings, db, raw_items)
+
+
 # ---------------------------------------------------------
 # ✅ Post Machine Reading (Mock)
 # ---------------------------------------------------------
@@ -105,10 +277,15 @@ def post_machine_reading(
     if not machine:
         raise HTTPException(status_code=404, detail="Makine bulunamadı.")
     
+    value_num, value = parse_value(reading_data.value)
+    if value_num is None and not value:
+        raise HTTPException(status_code=400, detail="Okuma değeri boş olamaz.")
+    
     reading = MachineReading(
         machine_id=machine_id,
-        reading_type=reading_data.reading_type,
-        value=reading_data.value,
+        reading_type_id=reading_type_cache.get_id(db, reading_data.reading_type),
+        value_num=value_num,
+        value=value,
         timestamp=reading_data.timestamp or datetime.utcnow()
     )
     
@@ -116,12 +293,14 @@ def post_machine_reading(
     db.commit()
     db.refresh(reading)
     
+    data = serialize_reading(reading)
     return {
         "ok": True,
         "reading_id": reading.id,
         "machine_id": machine_id,
-        "reading_type": reading.reading_type,
-        "value": reading.value,
+        "reading_type": data["reading_type"],
+        "value": data["value"],
+        "value_num": data["value_num"],
         "timestamp": reading.timestamp
     }
 
@@ -133,11 +312,15 @@ def post_machine_reading(
 def get_machine_readings(
     machine_id: int,
     limit: int = 100,
+    reading_type: Optional[str] = Query(None, description="Okuma tipi (örn: temperature)"),
+    start: Optional[datetime] = Query(None, description="timestamp >= start"),
+    end: Optional[datetime] = Query(None, description="timestamp < end"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Makine okumalarını getirir.
+    Makine okumalarını en yeniden eskiye getirir.
+    Grafikler için ham satırlar yerine `/readings/downsample` kullanın.
     
     **Yetki:** Tüm roller
     """
@@ -145,16 +328,80 @@ def get_machine_readings(
     if not machine:
         raise HTTPException(status_code=404, detail="Makine bulunamadı.")
     
-    readings = db.query(MachineReading).filter(
-        MachineReading.machine_id == machine_id
-    ).order_by(MachineReading.timestamp.desc()).limit(limit).all()
+    query = db.query(MachineReading).filter(MachineReading.machine_id == machine_id)
+    if reading_type:
+        type_id = reading_type_cache.lookup(db, reading_type)
+        if type_id is None:
+            query = query.filter(False)
+        else:
+            query = query.filter(MachineReading.reading_type_id == type_id)
+    if start:
+        query = query.filter(MachineReading.timestamp >= start)
+    if end:
+        query = query.filter(MachineReading.timestamp < end)
+    
+    # (machine_id, timestamp) index'i üzerinden sıralı okunur
+    readings = query.order_by(MachineReading.timestamp.desc()).limit(limit).all()
     
     return {
         "machine_id": machine_id,
         "machine_name": machine.name,
         "total": len(readings),
-        "data": readings
+        "data": [serialize_reading(r) for r in readings]
     }
 
 
-
+# ---------------------------------------------------------
+# ✅ Downsampled Machine Readings (Grafikler için)
+# ---------------------------------------------------------
+@router.get("/{machine_id}/readings/downsample")
+def get_machine_readings_downsampled(
+    machine_id: int,
+    reading_type: str = Query(..., description="Okuma tipi (örn: temperature)"),
+    start: Optional[datetime] = Query(None, description="Varsayılan: end - 24 saat"),
+    end: Optional[datetime] = Query(None, description="Varsayılan: şimdi"),
+    bucket: Optional[str] = Query(None, description="minute, hour, day veya week (boşsa aralığa göre seçilir)"),
+    max_points: int = Query(500, ge=1, le=5000, description="Otomatik seçimde en fazla kova sayısı"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Sayısal okumaları zaman kovalarına bölerek kova başına
+    count / min / max / avg döndürür. Hesaplama veritabanında,
+    mümkün olduğunca 1m / 1h / 1d rollup tablolarından yapılır.
+    
+    `bucket` verilmezse aralığı `max_points` kovayı aşmadan gösterebilen
+    çözünürlük seçilir (örn. 1 yıl için week, 1 hafta için hour).
+    
+    **Yetki:** Tüm roller
+    """
+    if bucket is not None and bucket not in BUCKET_UNITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid bucket. Must be one of: {', '.join(BUCKET_UNITS)}"
+        )
+    
+    machine = db.query(Machine).filter(Machine.id == machine_id).first()
+    if not machine:
+        raise HTTPException(status_code=404, detail="Makine bulunamadı.")
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start, end'den önce olmalı.")
+    
+    bucket = bucket or choose_bucket(start, end, max_points)
+    type_id = reading_type_cache.lookup(db, reading_type)
+    data = []
+    if type_id is not None:
+        data = downsample_readings(db, machine_id, type_id, start, end, bucket)
+    
+    return {
+        "machine_id": machine_id,
+        "reading_type": reading_type,
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "total": len(data),
+        "data": data
+    }
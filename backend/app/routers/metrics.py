@@ -1,87 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from app.db import get_db
-from app.models import WorkOrder, WorkOrderStage
+from app.models import WorkOrder, WorkOrderStage, WorkOrderMetrics, Machine
 from app.routers.auth import get_current_user
+from app.utils.metrics_summary import as_utc, get_summary, summary_from_stages
+from app.utils.sql_time import seconds_between, time_bucket, bucket_to_str
+from app.utils.stage_events import stage_run_times, work_order_run_times
 
 router = APIRouter(prefix="/metrics", tags=["Metrics"])
 
 
-# ---------------------------------------------------------
-# ✅ Work Order Metrics
-# ---------------------------------------------------------
-@router.get("/workorders/{wo_id}")
-def get_work_order_metrics(
-    wo_id: int,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user)
-):
+def metrics_from_summary(
+    wo: WorkOrder,
+    summary: WorkOrderMetrics,
+    run_times: Optional[Tuple[float, float]] = None,
+) -> dict:
     """
-    İş emri için verimlilik metriklerini hesaplar.
+    İş emri metriklerini work_order_metrics özetinden hesaplar (O(1)).
+    Hem /metrics/workorders/{id} hem de /workorders/overview tarafından kullanılır.
     
-    **Yetki:** Tüm roller
+    run_times: aşama event log'undan (net çalışma, duraklatma) saniyeleri.
+    Verilirse verimlilik duraklatmalar hariç net çalışma süresiyle hesaplanır.
     """
-    wo = db.query(WorkOrder).filter(WorkOrder.id == wo_id).first()
-    if not wo:
-        raise HTTPException(status_code=404, detail="Work order bulunamadı.")
-    
     # Planned duration
     if wo.planned_start and wo.planned_end:
         planned_duration = (wo.planned_end - wo.planned_start).total_seconds() / 60  # minutes
     else:
         planned_duration = None
     
-    # Get all stages
-    stages = db.query(WorkOrderStage).filter(
-        WorkOrderStage.work_order_id == wo_id
-    ).all()
-    
     # Calculate actual duration from stages
     actual_duration = None
-    if stages:
-        started_stages = [s for s in stages if s.actual_start]
-        completed_stages = [s for s in stages if s.actual_end]
-        
-        if started_stages and completed_stages:
-            first_start = min(s.actual_start for s in started_stages)
-            last_end = max(s.actual_end for s in completed_stages)
-            actual_duration = (last_end - first_start).total_seconds() / 60  # minutes
+    if summary.first_actual_start and summary.last_actual_end:
+        actual_duration = (
+            as_utc(summary.last_actual_end) - as_utc(summary.first_actual_start)
+        ).total_seconds() / 60  # minutes
     
     # Calculate delay and efficiency
     delay_minutes = None
     efficiency_percent = None
     on_time = None
     
+    # Net çalışma süresi (event log varsa)
+    net_run_minutes = None
+    paused_minutes = round((summary.paused_seconds or 0) / 60, 2)
+    if run_times is not None:
+        net_run_minutes = round(run_times[0] / 60, 2)
+        paused_minutes = round(run_times[1] / 60, 2)
+    
     if planned_duration and actual_duration:
         delay_minutes = actual_duration - planned_duration
-        efficiency_percent = (planned_duration / actual_duration * 100) if actual_duration > 0 else 0
+        effective_duration = net_run_minutes if net_run_minutes is not None else actual_duration
+        efficiency_percent = (planned_duration / effective_duration * 100) if effective_duration > 0 else 0
         on_time = delay_minutes <= 0
     
-    # Stage statistics
-    total_stages = len(stages)
-    completed_stages = len([s for s in stages if s.status == "done"])
-    in_progress_stages = len([s for s in stages if s.status == "in_progress"])
-    planned_stages = len([s for s in stages if s.status == "planned"])
-    
     return {
-        "work_order_id": wo_id,
+        "work_order_id": wo.id,
         "planned_duration_minutes": planned_duration,
         "actual_duration_minutes": actual_duration,
+        "net_run_minutes": net_run_minutes,
+        "paused_minutes": paused_minutes,
         "delay_minutes": delay_minutes,
         "efficiency_percent": round(efficiency_percent, 2) if efficiency_percent else None,
         "on_time": on_time,
         "stages": {
-            "total": total_stages,
-            "completed": completed_stages,
-            "in_progress": in_progress_stages,
-            "planned": planned_stages
+            "total": summary.total_stages or 0,
+            "completed": summary.done_count or 0,
+            "in_progress": summary.in_progress_count or 0,
+            "paused": summary.paused_count or 0,
+            "planned": summary.planned_count or 0
         }
     }
 
 
+def compute_work_order_metrics(
+    wo: WorkOrder,
+    stages: List[WorkOrderStage],
+    run_times: Optional[Tuple[float, float]] = None,
+) -> dict:
+    """Özet tablosu olmadan, verilen aşamalardan metrik hesaplar."""
+    return metrics_from_summary(wo, summary_from_stages(wo.id, stages), run_times)
+
+
+# ---------------------------------------------------------
+# ✅ Work Order Metrics
+# ---------------------------------------------------------
+@router.get("/workorders/{wo_id}")
+def get_work_order_metrics(
+    wo_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    İş emri için verimlilik metriklerini hesaplar.
+    
+    **Yetki:** Tüm roller
+    """
+    wo = db.query(WorkOrder).filter(WorkOrder.id == wo_id).first()
+    if not wo:
+        raise HTTPException(status_code=404, detail="Work order bulunamadı.")
+    
+    # Aşamaları taramak yerine materialized özetten oku
+    summary = get_summary(db, wo_id)
+    run_times = work_order_run_times(db, [wo_id]).get(wo_id)
+    
+    return metrics_from_summary(wo, summary, run_times)
+
+
 # ---------------------------------------------------------
 # ✅ Stage Metrics
 # ---------------------------------------------------------
@@ -110,6 +138,14 @@ def get_stage_metrics(
     if stage.actual_start and stage.actual_end:
         actual_duration = (stage.actual_end - stage.actual_start).total_seconds() / 60  # minutes
     
+    # Net çalışma ve duraklatma süreleri (event log'dan, duraklatmalar hariç)
+    net_run_minutes = None
+    paused_minutes = None
+    run_times = stage_run_times(db, wos_id)
+    if run_times is not None:
+        net_run_minutes = round(run_times[0] / 60, 2)
+        paused_minutes = round(run_times[1] / 60, 2)
+    
     # Calculate delay and efficiency
     delay_minutes = None
     efficiency_percent = None
@@ -117,7 +153,8 @@ def get_stage_metrics(
     
     if planned_duration and actual_duration:
         delay_minutes = actual_duration - planned_duration
-        efficiency_percent = (planned_duration / actual_duration * 100) if actual_duration > 0 else 0
+        effective_duration = net_run_minutes if net_run_minutes is not None else actual_duration
+        efficiency_percent = (planned_duration / effective_duration * 100) if effective_duration > 0 else 0
         on_time = delay_minutes <= 0
     
     return {
@@ -126,6 +163,8 @@ def get_stage_metrics(
         "status": stage.status,
         "planned_duration_minutes": planned_duration,
         "actual_duration_minutes": actual_duration,
+        "net_run_minutes": net_run_minutes,
+        "paused_minutes": paused_minutes,
         "delay_minutes": delay_minutes,
         "efficiency_percent": round(efficiency_percent, 2) if efficiency_percent else None,
         "on_time": on_time,
@@ -136,4 +175,104 @@ def get_stage_metrics(
     }
 
 
+# ---------------------------------------------------------
+# ✅ Aggregate Metrics (Fabrika geneli)
+# ---------------------------------------------------------
+AGGREGATE_GROUPS = ("machine", "product_code", "stage_name", "day", "week")
+
 
+@router.get("/aggregate")
+def get_aggregate_metrics(
+    group_by: str = Query("machine", description="machine, product_code, stage_name, day veya week"),
+    start: Optional[datetime] = Query(None, description="actual_end >= start"),
+    end: Optional[datetime] = Query(None, description="actual_end < end"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Tamamlanmış aşamalar üzerinden gruplanmış verimlilik metrikleri.
+    
+    Hesaplama tamamen veritabanında GROUP BY ile yapılır; sadece
+    grup başına bir satır döner.
+    
+    - **efficiency_percent:** toplam planlanan süre / toplam gerçek süre * 100
+    - **avg_delay_minutes:** ortalama (gerçek - planlanan) süre
+    - **on_time_rate:** gerçek süresi planlanan süreyi aşmayan aşama oranı
+    
+    **Yetki:** Tüm roller
+    """
+    if group_by not in AGGREGATE_GROUPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid group_by. Must be one of: {', '.join(AGGREGATE_GROUPS)}"
+        )
+    
+    planned_sec = seconds_between(db, WorkOrderStage.planned_end, WorkOrderStage.planned_start)
+    actual_sec = seconds_between(db, WorkOrderStage.actual_end, WorkOrderStage.actual_start)
+    
+    if group_by == "machine":
+        key = WorkOrder.machine_id
+        extra = [Machine.name.label("machine_name")]
+    elif group_by == "product_code":
+        key = WorkOrder.product_code
+        extra = []
+    elif group_by == "stage_name":
+        key = WorkOrderStage.stage_name
+        extra = []
+    else:
+        key = time_bucket(db, WorkOrderStage.actual_end, group_by)
+        extra = []
+    key = key.label("group_key")
+    
+    query = db.query(
+        key,
+        *extra,
+        func.count(WorkOrderStage.id).label("stage_count"),
+        func.sum(planned_sec).label("planned_sec"),
+        func.sum(actual_sec).label("actual_sec"),
+        func.avg(actual_sec - planned_sec).label("avg_delay_sec"),
+        func.avg(case((actual_sec <= planned_sec, 1.0), else_=0.0)).label("on_time_rate"),
+    ).join(
+        WorkOrder, WorkOrder.id == WorkOrderStage.work_order_id
+    ).filter(
+        WorkOrderStage.status == "done",
+        WorkOrderStage.actual_start.isnot(None),
+        WorkOrderStage.actual_end.isnot(None),
+        WorkOrderStage.planned_start.isnot(None),
+        WorkOrderStage.planned_end.isnot(None),
+    )
+    
+    if group_by == "machine":
+        query = query.outerjoin(Machine, Machine.id == WorkOrder.machine_id)
+    if start:
+        query = query.filter(WorkOrderStage.actual_end >= start)
+    if end:
+        query = query.filter(WorkOrderStage.actual_end < end)
+    
+    group_columns = [key] + ([Machine.name] if group_by == "machine" else [])
+    rows = query.group_by(*group_columns).order_by(key).all()
+    
+    data = []
+    for row in rows:
+        planned_min = (row.planned_sec or 0) / 60
+        actual_min = (row.actual_sec or 0) / 60
+        item = {
+            "key": bucket_to_str(row.group_key),
+            "stage_count": row.stage_count,
+            "planned_minutes": round(planned_min, 2),
+            "actual_minutes": round(actual_min, 2),
+            "efficiency_percent": round(planned_min / actual_min * 100, 2) if actual_min > 0 else None,
+            "avg_delay_minutes": round(row.avg_delay_sec / 60, 2) if row.avg_delay_sec is not None else None,
+            "on_time_rate": round(row.on_time_rate, 4) if row.on_time_rate is not None else None,
+        }
+        if group_by == "machine":
+            item["machine_name"] = row.machine_name
+        data.append(item)
+    
+    return {
+        "group_by": group_by,
+        "start": start,
+        "end": end,
+        "total": len(data),
+        "data": data
+    }
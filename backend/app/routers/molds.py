@@ -1,31 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
 from app.db import get_db
 from app.models import Mold, Product
-from app.schemas import MoldCreate, MoldUpdate, MoldResponse
+from app.schemas import MoldCreate, MoldUpdate, MoldResponse, MoldListItem
 from app.routers.auth import get_current_user, require_roles
+from app.utils.etag import conditional_response
+from app.utils.list_query import keyset_page, like_pattern, parse_fields, parse_sort
+from app.utils.table_versions import read_versions
 
 router = APIRouter(prefix="/molds", tags=["Molds"])
 
+MOLD_FIELDS = list(MoldListItem.model_fields)
+MOLD_SORT_KEYS = ["id", "code", "name", "status", "created_at"]
+
 
 # ---------------------------------------------------------
 # ✅ Kalıp Listesi: Tüm roller görebilir (sadece aktif olanlar)
 # ---------------------------------------------------------
-@router.get("/", response_model=List[MoldResponse])
+@router.get("/", response_model=List[MoldListItem], response_model_exclude_unset=True)
 def list_molds(
+    request: Request,
+    response: Response,
+    code: Optional[str] = Query(None, description="Kalıp kodu ile başlayanlar"),
+    name: Optional[str] = Query(None, description="Adında geçenler (büyük/küçük harf duyarsız)"),
+    status: Optional[str] = Query(None, description="Durum: active / maintenance / inactive"),
+    product_id: Optional[int] = Query(None, description="Ürün ID'sine göre filtrele"),
+    sort: Optional[str] = Query("id", description=f"Sıralama: {', '.join(MOLD_SORT_KEYS)}; azalan için '-' öneki"),
+    fields: Optional[str] = Query(None, description="Virgülle ayrılmış alanlar (boşsa tümü)"),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın X-Next-Cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Sayfa boyutu (boşsa tümü)"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)  # ✅ Tüm giriş yapmış kullanıcılar
 ):
     """
     Aktif kalıpları listeler (silinmemiş olanlar).
     
+    - `fields` verilirse sadece o kolonlar veritabanından okunur ve döner
+    - `limit` verilirse en fazla `limit` kayıt döner; devamı için
+      `X-Next-Cursor` yanıt başlığındaki değer `cursor` parametresiyle gönderilir
+    - Yanıt her zaman kalıp listesidir (parametresiz çağrı eskisi gibi tüm kalıpları döner)
+    - Yanıtta ETag döner; `If-None-Match` ile gönderilirse ve kalıplar
+      değişmediyse 304 döner
+    
     **Yetki:** Tüm roller (worker, planner, admin)
     """
+    # Veri değişmediyse (If-None-Match) sorgu ve serileştirme atlanır
+    not_modified = conditional_response(request, response, read_versions(db, ["molds"]))
+    if not_modified is not None:
+        return not_modified
     # Soft delete: Sadece deleted_at IS NULL olanları getir
-    molds = db.query(Mold).filter(Mold.deleted_at.is_(None)).all()
-    return molds
+    filters = [Mold.deleted_at.is_(None)]
+    if code:
+        filters.append(Mold.code.like(like_pattern(code, prefix_only=True), escape="\\"))
+    if name:
+        filters.append(Mold.name.ilike(like_pattern(name.strip()), escape="\\"))
+    if status:
+        filters.append(Mold.status == status)
+    if product_id is not None:
+        filters.append(Mold.product_id == product_id)
+
+    try:
+        sort_key, descending = parse_sort(sort, MOLD_SORT_KEYS)
+        rows, next_cursor = keyset_page(
+            db, Mold, parse_fields(fields, MOLD_FIELDS),
+            sort_key, descending, filters, cursor, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 
 # ---------------------------------------------------------
@@ -1,31 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timezone
+from app.config import PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_IMPORT_COMMIT_EVERY
 from app.db import get_db
 from app.models import Product
-from app.schemas import ProductCreate, ProductUpdate, ProductResponse, ProductUpsert
+from app.schemas import ProductCreate, ProductUpdate, ProductResponse, ProductListItem, ProductUpsert
 from app.routers.auth import get_current_user, require_roles
+from app.utils.etag import conditional_response
+from app.utils.list_query import keyset_page, like_pattern, parse_fields, parse_sort
+from app.utils.name_index import product_name_index
+from app.utils.prediction_cache import NAMESPACE_MALZEME, prediction_cache
+from app.utils.product_import import ProductImporter
+from app.utils.table_versions import read_versions
+from app.utils.text_keys import product_name_key
+from app.utils.training_jobs import retrain_scheduler
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+PRODUCT_FIELDS = list(ProductListItem.model_fields)
+PRODUCT_SORT_KEYS = ["id", "code", "name", "material", "created_at", "updated_at"]
+
+
+def _urun_degisti(product: Product, silindi: bool = False) -> None:
+    """Commit sonrası: malzeme tahmin cache'ini temizle, ad indeksini güncelle, eğitimi planla."""
+    prediction_cache.invalidate(NAMESPACE_MALZEME)
+    retrain_scheduler.notify()
+    if silindi:
+        product_name_index.remove(product.id)
+    else:
+        product_name_index.upsert(product.id, product.name)
+
 
 # ---------------------------------------------------------
 # ✅ Ürün Listesi: Tüm roller görebilir (sadece aktif olanlar)
 # ---------------------------------------------------------
-@router.get("/", response_model=List[ProductResponse])
+@router.get("/", response_model=List[ProductListItem], response_model_exclude_unset=True)
 def list_products(
+    request: Request,
+    response: Response,
+    code: Optional[str] = Query(None, description="Ürün kodu ile başlayanlar"),
+    name: Optional[str] = Query(None, description="Adında geçenler (büyük/küçük harf duyarsız)"),
+    material: Optional[str] = Query(None, description="Malzemesinde geçenler"),
+    sort: Optional[str] = Query("id", description=f"Sıralama: {', '.join(PRODUCT_SORT_KEYS)}; azalan için '-' öneki"),
+    fields: Optional[str] = Query(None, description="Virgülle ayrılmış alanlar (boşsa tümü)"),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın X-Next-Cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Sayfa boyutu (boşsa tümü)"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)  # ✅ Tüm giriş yapmış kullanıcılar
 ):
     """
     Aktif ürünleri listeler (silinmemiş olanlar).
     
+    - `fields` verilirse sadece o kolonlar veritabanından okunur ve döner
+    - `limit` verilirse en fazla `limit` kayıt döner; devamı için
+      `X-Next-Cursor` yanıt başlığındaki değer `cursor` parametresiyle gönderilir
+    - Yanıt her zaman ürün listesidir (parametresiz çağrı eskisi gibi tüm ürünleri döner)
+    - Yanıtta ETag döner; `If-None-Match` ile gönderilirse ve ürünler
+      değişmediyse 304 döner
+    
     **Yetki:** Tüm roller (worker, planner, admin)
     """
+    # Veri değişmediyse (If-None-Match) sorgu ve serileştirme atlanır
+    not_modified = conditional_response(request, response, read_versions(db, ["products"]))
+    if not_modified is not None:
+        return not_modified
     # Soft delete: Sadece deleted_at IS NULL olanları getir
-    products = db.query(Product).filter(Product.deleted_at.is_(None)).all()
-    return products
+    filters = [Product.deleted_at.is_(None)]
+    if code:
+        filters.append(Product.code.like(like_pattern(code, prefix_only=True), escape="\\"))
+    if name:
+        filters.append(Product.name_key.like(like_pattern(product_name_key(name)), escape="\\"))
+    if material:
+        filters.append(Product.material.ilike(like_pattern(material.strip()), escape="\\"))
+
+    try:
+        sort_key, descending = parse_sort(sort, PRODUCT_SORT_KEYS)
+        rows, next_cursor = keyset_page(
+            db, Product, parse_fields(fields, PRODUCT_FIELDS),
+            sort_key, descending, filters, cursor, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 
 # ---------------------------------------------------------
@@ -88,6 +150,7 @@ def create_product(
     
     db.add(product)
     db.commit()
+    _urun_degisti(product)
     db.refresh(product)
     
     return product
@@ -109,13 +172,15 @@ def upsert_product(
     - **Ürün adı yoksa:** Yeni ürün oluşturur
     
     Bu endpoint AI modeli eğitimi için idealdir.
-    `auto_train: true` gönderilirse güncelleme sonrası model otomatik eğitilir.
+    `auto_train: true` gönderilirse model, değişiklikler durulduktan sonra
+    (AI_RETRAIN_DEBOUNCE_SECONDS) tek bir eğitimle güncellenir; art arda gelen
+    upsert'ler aynı eğitimde birleşir.
     
     **Yetki:** "planner", "admin" veya "worker" rolü
     """
-    # Ürün adına göre ara (büyük/küçük harf duyarsız)
+    # Ürün adına göre ara (büyük/küçük harf duyarsız, indeksli name_key eşitliği)
     existing = db.query(Product).filter(
-        Product.name.ilike(product_data.name),
+        Product.name_key == product_name_key(product_data.name),
         Product.deleted_at.is_(None)
     ).first()
     
@@ -142,6 +207,7 @@ def upsert_product(
         
         existing.updated_at = datetime.now(timezone.utc)
         db.commit()
+        _urun_degisti(existing)
         db.refresh(existing)
         product = existing
     else:
@@ -168,16 +234,19 @@ def upsert_product(
         )
         db.add(product)
         db.commit()
+        _urun_degisti(product)
         db.refresh(product)
     
-    # Otomatik AI eğitimi
+    # Otomatik AI eğitimi (debounce: toplu upsert'ler tek eğitime iner)
     train_result = None
     if product_data.auto_train:
-        try:
-            from app.ai_model import ai_model
-            train_result = ai_model.model_egit(db)
-        except Exception as e:
-            train_result = {"success": False, "message": str(e)}
+        retrain_scheduler.notify(force=True)
+        train_result = {
+            "success": True,
+            "status": "scheduled",
+            "debounce_seconds": retrain_scheduler.debounce_seconds,
+            "message": "Eğitim planlandı. İşler: GET /api/ai/train/jobs"
+        }
     
     return {
         "ok": True,
@@ -195,6 +264,61 @@ def upsert_product(
     }
 
 
+# ---------------------------------------------------------
+# ✅ CSV İçe Aktarma: Sadece planner veya admin
+# ---------------------------------------------------------
+@router.post("/import")
+def import_products(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(PRODUCT_IMPORT_CHUNK_SIZE, ge=1, le=50000),
+    commit_every: int = Query(PRODUCT_IMPORT_COMMIT_EVERY, ge=1),
+    auto_train: bool = True,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_roles("planner", "admin"))
+):
+    """
+    uretim_verisi.csv formatındaki bir dosyadan ürünleri toplu yükler.
+
+    - Dosya akış halinde okunur, `chunk_size` satırlık parçalar halinde
+      ürün koduna göre upsert edilir (INSERT ... ON CONFLICT (code) DO UPDATE)
+    - Commit her `commit_every` chunk'ta bir yapılır; hata olursa son
+      commit'ten sonraki chunk'lar geri alınır
+    - Ürün adı boş olan satırlar atlanır ve özette raporlanır
+    - `auto_train: true` ise değişiklik varsa tek bir AI eğitimi planlanır
+
+    **Yetki:** "planner" veya "admin" rolü
+    """
+    ozet = None
+    try:
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        ozet = ProductImporter(db, chunk_size, commit_every).run(csv.DictReader(stream))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV dosyası UTF-8 olmalıdır.")
+    except Exception as e:
+        print(f"❌ CSV içe aktarma hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"CSV içe aktarılırken hata oluştu: {str(e)}")
+    finally:
+        # Hata durumunda da önceki chunk'lar commit edilmiş olabilir
+        prediction_cache.invalidate(NAMESPACE_MALZEME)
+        product_name_index.clear()
+
+    train_result = None
+    if auto_train and ozet.eklenen + ozet.guncellenen > 0:
+        retrain_scheduler.notify(force=True)
+        train_result = {
+            "success": True,
+            "status": "scheduled",
+            "debounce_seconds": retrain_scheduler.debounce_seconds,
+            "message": "Eğitim planlandı. İşler: GET /api/ai/train/jobs"
+        }
+
+    return {
+        "ok": True,
+        **ozet.to_dict(),
+        "ai_training": train_result
+    }
+
+
 # ---------------------------------------------------------
 # ✅ Ürün Güncelle: Sadece planner veya admin
 # ---------------------------------------------------------
@@ -239,6 +363,7 @@ def update_product(
     product.updated_at = datetime.now(timezone.utc)
     
     db.commit()
+    _urun_degisti(product)
     db.refresh(product)
     
     return product
@@ -284,6 +409,7 @@ def delete_product(
     product.deleted_at = datetime.now(timezone.utc)
     product.updated_at = datetime.now(timezone.utc)
     db.commit()
+    _urun_degisti(product, silindi=True)
     db.refresh(product)
     
     return {
@@ -322,6 +448,7 @@ def restore_product(
     product.deleted_at = None
     product.updated_at = datetime.now(timezone.utc)
     db.commit()
+    _urun_degisti(product)
     db.refresh(product)
     
     return product
@@ -7,9 +7,25 @@ from app.models import WorkOrderStage, Issue, Notification
 from app.schemas import StartDoneResponse, IssueCreate
 from app.routers.auth import require_roles
 from app.utils.state_machine import validate_state_transition
+from app.utils.event_bus import event_bus
+from app.utils.metrics_summary import as_utc, record_stage_transition
+from app.utils.stage_events import log_stage_event
 
 router = APIRouter(prefix="/stages", tags=["stages"])
 
+MANAGER_ROLES = ("admin", "planner")
+
+
+def publish_stage_event(event_type: str, stage: WorkOrderStage, current_user: dict) -> None:
+    """Aşama geçişini event bus'a yayınlar (SSE abonelerine gider)."""
+    event_bus.publish(event_type, {
+        "work_order_stage_id": stage.id,
+        "work_order_id": stage.work_order_id,
+        "stage_name": stage.stage_name,
+        "status": stage.status,
+        "by": current_user["username"],
+    })
+
 
 # ---------------------------------------------------------
 # ✅ Stage Başlat: Worker veya Planner
@@ -39,12 +55,16 @@ def start_stage(
     if s.actual_start is None:
         try:
             validate_state_transition(s.status, "in_progress")
-            s.actual_start = datetime.now(timezone.utc)
+            now = datetime.now(timezone.utc)
+            s.actual_start = now
             s.status = "in_progress"
+            record_stage_transition(db, s, "planned", now)
+            log_stage_event(db, s, "start", now, current_user["user_id"])
             db.commit()
             db.refresh(s)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        publish_stage_event("stage.started", s, current_user)
 
     return {
         "ok": True,
@@ -86,12 +106,16 @@ def done_stage(
     if s.actual_end is None:
         try:
             validate_state_transition(s.status, "done")
-            s.actual_end = datetime.now(timezone.utc)
+            now = datetime.now(timezone.utc)
+            s.actual_end = now
             s.status = "done"
+            record_stage_transition(db, s, "in_progress", now)
+            log_stage_event(db, s, "done", now, current_user["user_id"])
             db.commit()
             db.refresh(s)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        publish_stage_event("stage.done", s, current_user)
 
     return {
         "ok": True,
@@ -133,16 +157,35 @@ def report_issue(
     db.refresh(issue)
 
     # ✅ DB tabanlı notification oluştur (manager'lara bildir)
-    for role in ["admin", "planner"]:
+    notifications = []
+    for role in MANAGER_ROLES:
         notification = Notification(
             issue_id=issue.id,
             recipient_role=role,
             message=f"New issue #{issue.id} reported: {payload.type} - {payload.description or 'No description'}"
         )
         db.add(notification)
+        notifications.append(notification)
     
     db.commit()
 
+    # ✅ Canlı akışa yayınla
+    event_bus.publish("issue.reported", {
+        "issue_id": issue.id,
+        "work_order_stage_id": wos_id,
+        "work_order_id": s.work_order_id,
+        "type": issue.type,
+        "description": issue.description,
+        "status": issue.status,
+        "by": current_user["username"],
+    })
+    for notification in notifications:
+        event_bus.publish("notification.created", {
+            "notification_id": notification.id,
+            "issue_id": issue.id,
+            "message": notification.message,
+        }, roles=(notification.recipient_role,))
+
     return {
         "ok": True, 
         "issue_id": issue.id,
@@ -181,12 +224,16 @@ def pause_stage(
 
     try:
         validate_state_transition(s.status, "paused")
-        s.paused_at = datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+        s.paused_at = now
         s.status = "paused"
+        record_stage_transition(db, s, "in_progress", now)
+        log_stage_event(db, s, "pause", now, current_user["user_id"])
         db.commit()
         db.refresh(s)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    publish_stage_event("stage.paused", s, current_user)
 
     return {
         "ok": True,
@@ -228,12 +275,17 @@ def resume_stage(
 
     try:
         validate_state_transition(s.status, "in_progress")
-        s.resumed_at = datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+        paused_seconds = (now - as_utc(s.paused_at)).total_seconds() if s.paused_at else 0.0
+        s.resumed_at = now
         s.status = "in_progress"
+        record_stage_transition(db, s, "paused", now, paused_seconds=paused_seconds)
+        log_stage_event(db, s, "resume", now, current_user["user_id"])
         db.commit()
         db.refresh(s)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    publish_stage_event("stage.resumed", s, current_user)
 
     return {
         "ok": True,
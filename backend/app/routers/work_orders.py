@@ -1,10 +1,16 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app.db import get_db
-from app.models import WorkOrder, WorkOrderStage, User
-from app.schemas import WorkOrderCreate
+from app.models import Machine, WorkOrder, WorkOrderMetrics, WorkOrderStage, User
+from app.schemas import WorkOrderBulkCreate, WorkOrderCreate
 from app.routers.auth import require_roles, get_current_user
+from app.routers.metrics import compute_work_order_metrics, metrics_from_summary
+from app.utils.metrics_summary import get_summaries, rebuild_summary
+from app.utils.sql_time import dialect_name
+from app.utils.stage_events import work_order_run_times
 
 router = APIRouter(prefix="/workorders", tags=["Work Orders"])
 
@@ -15,6 +21,73 @@ DEFAULT_STAGES = [
 ]
 
 
+def to_aware_datetime(value) -> datetime:
+    """ISO string veya datetime değerini timezone-aware datetime'a çevirir (naive ise UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def plan_stages(
+    planned_start: datetime,
+    planned_end: datetime,
+    stage_count: Optional[int] = None,
+    stage_names: Optional[List[str]] = None,
+) -> List[Tuple[str, datetime, datetime]]:
+    """
+    İş emri süresini aşamalara eşit böler: (aşama adı, başlangıç, bitiş) listesi.
+    Son aşama iş emrinin bitişinde biter; hiçbir aşama bitişi geçmez.
+    """
+    # Kullanıcının belirttiği aşama sayısını kullan, yoksa varsayılan 2
+    num_stages = stage_count if stage_count else 2
+    
+    # Toplam süreyi aşamalara eşit olarak böl
+    total_duration = (planned_end - planned_start).total_seconds() / 60  # dakika cinsinden
+    stage_duration = total_duration / num_stages  # Her aşama için süre
+    
+    # Aşama isimleri oluştur
+    if stage_names and len(stage_names) == num_stages:
+        # Kullanıcı aşama isimleri girdiyse onları kullan
+        names = stage_names
+    elif num_stages == 1:
+        names = ["Üretim"]
+    elif num_stages == 2:
+        names = ["Enjeksiyon", "Montaj"]
+    else:
+        # 3 veya daha fazla aşama için genel isimler
+        names = [f"Aşama {i+1}" for i in range(num_stages)]
+    
+    stages = []
+    current_start = planned_start
+    for i in range(num_stages):
+        # Son aşama için kalan tüm süreyi kullan
+        if i == num_stages - 1:
+            stage_end = planned_end
+        else:
+            stage_end = current_start + timedelta(minutes=stage_duration)
+            # Son stage'in bitişi work order'ın bitişini geçmemeli
+            if stage_end > planned_end:
+                stage_end = planned_end
+        stages.append((names[i], current_start, stage_end))
+        current_start = stage_end
+    return stages
+
+
+def bulk_insert_ids(db: Session, model, rows: List[dict]) -> List[int]:
+    """
+    Toplu INSERT ... RETURNING id; id'ler rows sırasıyla döner.
+    SQLite'ta sort_by_parameter_order satır satır INSERT'e düşer; orada
+    rowid'ler tek yazıcı altında VALUES sırasıyla artan atandığı için sıralamak yeterli.
+    """
+    if dialect_name(db) == "sqlite":
+        return sorted(db.execute(insert(model).returning(model.id), rows).scalars())
+    return db.execute(
+        insert(model).returning(model.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+
 # ---------------------------------------------------------
 # ✅ İş Emri Oluştur: planner, admin veya worker
 # ---------------------------------------------------------
@@ -33,25 +106,8 @@ def create_work_order(
     **Yetki:** "planner", "admin" veya "worker" rolü
     """
     try:
-        # Datetime objelerini kontrol et ve gerekirse dönüştür
-        from datetime import datetime, timezone
-        
-        # Eğer string ise datetime'a çevir
-        if isinstance(wo_data.planned_start, str):
-            planned_start = datetime.fromisoformat(wo_data.planned_start.replace('Z', '+00:00'))
-        else:
-            planned_start = wo_data.planned_start
-            
-        if isinstance(wo_data.planned_end, str):
-            planned_end = datetime.fromisoformat(wo_data.planned_end.replace('Z', '+00:00'))
-        else:
-            planned_end = wo_data.planned_end
-        
-        # Timezone-aware yap (eğer değilse)
-        if planned_start.tzinfo is None:
-            planned_start = planned_start.replace(tzinfo=timezone.utc)
-        if planned_end.tzinfo is None:
-            planned_end = planned_end.replace(tzinfo=timezone.utc)
+        planned_start = to_aware_datetime(wo_data.planned_start)
+        planned_end = to_aware_datetime(wo_data.planned_end)
         
         wo = WorkOrder(
             product_code=wo_data.product_code,
@@ -70,42 +126,13 @@ def create_work_order(
 
         # ✅ Auto-create stages
         stages_created = []
-        current_start = planned_start
-        
-        # Kullanıcının belirttiği aşama sayısını kullan, yoksa varsayılan 2
-        num_stages = wo_data.stage_count if wo_data.stage_count else 2
-        
-        # Toplam süreyi aşamalara eşit olarak böl
-        total_duration = (planned_end - planned_start).total_seconds() / 60  # dakika cinsinden
-        stage_duration = total_duration / num_stages  # Her aşama için süre
-        
-        # Aşama isimleri oluştur
-        stage_names = []
-        if wo_data.stage_names and len(wo_data.stage_names) == num_stages:
-            # Kullanıcı aşama isimleri girdiyse onları kullan
-            stage_names = wo_data.stage_names
-        elif num_stages == 1:
-            stage_names = ["Üretim"]
-        elif num_stages == 2:
-            stage_names = ["Enjeksiyon", "Montaj"]
-        else:
-            # 3 veya daha fazla aşama için genel isimler
-            stage_names = [f"Aşama {i+1}" for i in range(num_stages)]
-        
-        for i in range(num_stages):
-            # Son aşama için kalan tüm süreyi kullan
-            if i == num_stages - 1:
-                stage_end = planned_end
-            else:
-                stage_end = current_start + timedelta(minutes=stage_duration)
-                # Son stage'in bitişi work order'ın bitişini geçmemeli
-                if stage_end > planned_end:
-                    stage_end = planned_end
-            
+        for stage_name, stage_start, stage_end in plan_stages(
+            planned_start, planned_end, wo_data.stage_count, wo_data.stage_names
+        ):
             stage = WorkOrderStage(
                 work_order_id=wo.id,
-                stage_name=stage_names[i],
-                planned_start=current_start,
+                stage_name=stage_name,
+                planned_start=stage_start,
                 planned_end=stage_end,
                 status="planned"
             )
@@ -118,8 +145,9 @@ def create_work_order(
                 "planned_start": stage.planned_start.isoformat() if stage.planned_start else None,
                 "planned_end": stage.planned_end.isoformat() if stage.planned_end else None
             })
-            
-            current_start = stage_end
+        
+        # Metrik özetini aynı transaction'da oluştur
+        rebuild_summary(db, wo.id)
         
         db.commit()  # Tüm stage'leri commit et
 
@@ -141,45 +169,305 @@ def create_work_order(
         )
 
 
+# ---------------------------------------------------------
+# ✅ Toplu İş Emri Oluştur: planner veya admin
+# ---------------------------------------------------------
+@router.post("/bulk")
+def create_work_orders_bulk(
+    payload: WorkOrderBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_roles("planner", "admin"))
+):
+    """
+    Birden fazla iş emrini tek transaction'da oluşturur (haftalık planlama içe aktarımı).
+
+    - Aşama planları bellekte hesaplanır (tekli endpoint ile aynı bölme kuralı)
+    - İş emirleri, aşamalar ve metrik özetleri birkaç toplu INSERT ile yazılır
+    - Geçersiz kalemler (bitiş başlangıçtan önce, bilinmeyen makine) atlanır;
+      sonuç listesinde her kalem için `ok` ve `work_order_id` veya `error` döner
+
+    **Yetki:** "planner" veya "admin" rolü
+    """
+    items = payload.items
+    machine_ids = {item.machine_id for item in items if item.machine_id is not None}
+    known_machines = set()
+    if machine_ids:
+        known_machines = set(db.execute(
+            select(Machine.id).where(Machine.id.in_(machine_ids))
+        ).scalars())
+
+    results: List[dict] = [None] * len(items)
+    order_rows, stage_plans, valid_indexes = [], [], []
+    for index, item in enumerate(items):
+        planned_start = to_aware_datetime(item.planned_start)
+        planned_end = to_aware_datetime(item.planned_end)
+        if planned_end < planned_start:
+            results[index] = {"index": index, "ok": False, "error": "planned_end, planned_start'tan önce olamaz"}
+            continue
+        if item.machine_id is not None and item.machine_id not in known_machines:
+            results[index] = {"index": index, "ok": False, "error": f"Makine bulunamadı: {item.machine_id}"}
+            continue
+        order_rows.append({
+            "product_code": item.product_code,
+            "lot_no": item.lot_no,
+            "qty": item.qty,
+            "produced_qty": item.produced_qty or 0,
+            "planned_start": planned_start,
+            "planned_end": planned_end,
+            "created_by": current_user["user_id"],
+            "machine_id": item.machine_id,
+        })
+        stage_plans.append(plan_stages(planned_start, planned_end, item.stage_count, item.stage_names))
+        valid_indexes.append(index)
+
+    try:
+        if order_rows:
+            wo_ids = bulk_insert_ids(db, WorkOrder, order_rows)
+
+            stage_rows = [
+                {
+                    "work_order_id": wo_id,
+                    "stage_name": name,
+                    "planned_start": start,
+                    "planned_end": end,
+                    "status": "planned",
+                }
+                for wo_id, stages in zip(wo_ids, stage_plans)
+                for name, start, end in stages
+            ]
+            stage_ids = bulk_insert_ids(db, WorkOrderStage, stage_rows)
+
+            # Yeni aşamaların hepsi "planned": özet aşamaları okumadan yazılabilir
+            now = datetime.now(timezone.utc)
+            db.execute(insert(WorkOrderMetrics), [
+                {
+                    "work_order_id": wo_id,
+                    "total_stages": len(stages),
+                    "planned_count": len(stages),
+                    "in_progress_count": 0,
+                    "paused_count": 0,
+                    "done_count": 0,
+                    "paused_seconds": 0.0,
+                    "updated_at": now,
+                }
+                for wo_id, stages in zip(wo_ids, stage_plans)
+            ])
+            db.commit()
+
+            offset = 0
+            for index, wo_id, stages in zip(valid_indexes, wo_ids, stage_plans):
+                results[index] = {
+                    "index": index,
+                    "ok": True,
+                    "work_order_id": wo_id,
+                    "stage_ids": stage_ids[offset:offset + len(stages)],
+                }
+                offset += len(stages)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Toplu iş emri oluşturma hatası: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"İş emirleri oluşturulurken hata oluştu: {str(e)}"
+        )
+
+    created = len(valid_indexes)
+    return {
+        "ok": created == len(items),
+        "created": created,
+        "failed": len(items) - created,
+        "created_by": current_user["username"],
+        "results": results,
+    }
+
+
+def serialize_work_order(wo: WorkOrder, creator_username: Optional[str] = None) -> dict:
+    """İş emrini liste/overview yanıtları için dict'e çevirir."""
+    wo_dict = {
+        "id": wo.id,
+        "product_code": wo.product_code,
+        "lot_no": wo.lot_no,
+        "qty": wo.qty,  # Hedef ürün sayısı
+        "produced_qty": wo.produced_qty or 0,  # Mevcut üretilen ürün sayısı
+        "planned_start": wo.planned_start.isoformat() if wo.planned_start else None,
+        "planned_end": wo.planned_end.isoformat() if wo.planned_end else None,
+        "created_by": wo.created_by,
+        "machine_id": wo.machine_id,  # Üretim için seçilen makine ID'si
+    }
+    # created_by kullanıcısının username'ini ekle
+    if creator_username:
+        wo_dict["created_by_username"] = creator_username
+    return wo_dict
+
+
+def query_work_orders(
+    db: Session,
+    machine_id: Optional[int] = None,
+    product_code: Optional[str] = None,
+    planned_from: Optional[datetime] = None,
+    planned_to: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Tuple[WorkOrder, Optional[str]]], Optional[int]]:
+    """
+    İş emirlerini oluşturan kullanıcının adıyla birlikte tek sorguda getirir.
+
+    Keyset pagination: id > cursor, id'ye göre artan sıralı.
+
+    Returns:
+        (satırlar, next_cursor) - next_cursor yoksa None
+    """
+    query = db.query(WorkOrder, User.username).outerjoin(
+        User, User.id == WorkOrder.created_by
+    )
+
+    if machine_id is not None:
+        query = query.filter(WorkOrder.machine_id == machine_id)
+    if product_code:
+        query = query.filter(WorkOrder.product_code == product_code)
+    if planned_from:
+        query = query.filter(WorkOrder.planned_start >= planned_from)
+    if planned_to:
+        query = query.filter(WorkOrder.planned_start <= planned_to)
+    if cursor is not None:
+        query = query.filter(WorkOrder.id > cursor)
+
+    query = query.order_by(WorkOrder.id.asc())
+
+    if limit is None:
+        return query.all(), None
+
+    # Bir fazla satır çek - sonraki sayfa var mı anlamak için
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0].id
+    return rows, next_cursor
+
+
 # ---------------------------------------------------------
 # ✅ İş Emirlerini Listele: Tüm roller görebilir
 # ---------------------------------------------------------
 @router.get("/")
 def list_work_orders(
+    machine_id: Optional[int] = Query(None, description="Makine ID'sine göre filtrele"),
+    product_code: Optional[str] = Query(None, description="Ürün koduna göre filtrele"),
+    planned_from: Optional[datetime] = Query(None, description="planned_start >= bu tarih"),
+    planned_to: Optional[datetime] = Query(None, description="planned_start <= bu tarih"),
+    cursor: Optional[int] = Query(None, ge=0, description="Önceki sayfanın next_cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Sayfa boyutu (boşsa tümü)"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)  # ✅ Tüm giriş yapmış kullanıcılar
 ):
     """
-    Tüm iş emirlerini listeler.
+    İş emirlerini listeler (filtreleme ve cursor pagination ile).
+    
+    - `limit` verilirse en fazla `limit` kayıt döner; devamı için
+      yanıttaki `next_cursor` değeri `cursor` parametresiyle gönderilir.
+    - `limit` verilmezse tüm eşleşen kayıtlar döner.
     
     **Yetki:** Tüm roller (worker, planner, admin)
     """
-    work_orders = db.query(WorkOrder).all()
+    rows, next_cursor = query_work_orders(
+        db,
+        machine_id=machine_id,
+        product_code=product_code,
+        planned_from=planned_from,
+        planned_to=planned_to,
+        cursor=cursor,
+        limit=limit,
+    )
+    
+    result = [serialize_work_order(wo, creator_username) for wo, creator_username in rows]
+    
+    return {
+        "total": len(result),
+        "data": result,
+        "next_cursor": next_cursor,
+        "requested_by": current_user["username"]
+    }
+
+
+def serialize_stage(stage: WorkOrderStage) -> dict:
+    """Aşamayı overview yanıtı için dict'e çevirir."""
+    return {
+        "id": stage.id,
+        "work_order_id": stage.work_order_id,
+        "stage_name": stage.stage_name,
+        "status": stage.status,
+        "planned_start": stage.planned_start.isoformat() if stage.planned_start else None,
+        "planned_end": stage.planned_end.isoformat() if stage.planned_end else None,
+        "actual_start": stage.actual_start.isoformat() if stage.actual_start else None,
+        "actual_end": stage.actual_end.isoformat() if stage.actual_end else None,
+        "paused_at": stage.paused_at.isoformat() if stage.paused_at else None,
+        "resumed_at": stage.resumed_at.isoformat() if stage.resumed_at else None,
+    }
+
+
+# ---------------------------------------------------------
+# ✅ İş Emri Overview: Emirler + aşamalar + metrikler tek çağrıda
+# ---------------------------------------------------------
+@router.get("/overview")
+def work_orders_overview(
+    machine_id: Optional[int] = Query(None, description="Makine ID'sine göre filtrele"),
+    product_code: Optional[str] = Query(None, description="Ürün koduna göre filtrele"),
+    planned_from: Optional[datetime] = Query(None, description="planned_start >= bu tarih"),
+    planned_to: Optional[datetime] = Query(None, description="planned_start <= bu tarih"),
+    cursor: Optional[int] = Query(None, ge=0, description="Önceki sayfanın next_cursor değeri"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Sayfa boyutu (boşsa tümü)"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)  # ✅ Tüm roller
+):
+    """
+    İş emirlerini aşamaları ve metrikleriyle birlikte tek yanıtta döndürür.
+    
+    `/workorders`, `/workorders/{id}/stages` ve `/metrics/workorders/{id}`
+    çağrılarının toplu hali: aşamalar tek bir IN sorgusuyla çekilir.
+    Filtre ve pagination parametreleri `/workorders` ile aynıdır.
+    
+    **Yetki:** Tüm roller (worker, planner, admin)
+    """
+    rows, next_cursor = query_work_orders(
+        db,
+        machine_id=machine_id,
+        product_code=product_code,
+        planned_from=planned_from,
+        planned_to=planned_to,
+        cursor=cursor,
+        limit=limit,
+    )
+    
+    # Tüm emirlerin aşamalarını tek sorguda çek ve emre göre grupla
+    wo_ids = [wo.id for wo, _ in rows]
+    stages_by_wo: Dict[int, List[WorkOrderStage]] = {wo_id: [] for wo_id in wo_ids}
+    if wo_ids:
+        stages = db.query(WorkOrderStage).filter(
+            WorkOrderStage.work_order_id.in_(wo_ids)
+        ).order_by(WorkOrderStage.work_order_id, WorkOrderStage.id).all()
+        for stage in stages:
+            stages_by_wo[stage.work_order_id].append(stage)
+    
+    # Metrik özetlerini de tek sorguda çek; özeti olmayanlar aşamalardan hesaplanır
+    summaries = get_summaries(db, wo_ids)
+    run_times = work_order_run_times(db, wo_ids)
     
-    # Work order'ları serialize ederken created_by kullanıcı bilgisini ekle
     result = []
-    for wo in work_orders:
-        wo_dict = {
-            "id": wo.id,
-            "product_code": wo.product_code,
-            "lot_no": wo.lot_no,
-            "qty": wo.qty,  # Hedef ürün sayısı
-            "produced_qty": wo.produced_qty or 0,  # Mevcut üretilen ürün sayısı
-            "planned_start": wo.planned_start.isoformat() if wo.planned_start else None,
-            "planned_end": wo.planned_end.isoformat() if wo.planned_end else None,
-            "created_by": wo.created_by,
-            "machine_id": wo.machine_id,  # Üretim için seçilen makine ID'si
-        }
-        # created_by kullanıcısının username'ini ekle
-        if wo.created_by:
-            creator = db.query(User).filter(User.id == wo.created_by).first()
-            if creator:
-                wo_dict["created_by_username"] = creator.username
+    for wo, creator_username in rows:
+        wo_stages = stages_by_wo[wo.id]
+        wo_dict = serialize_work_order(wo, creator_username)
+        wo_dict["stages"] = [serialize_stage(stage) for stage in wo_stages]
+        summary = summaries.get(wo.id)
+        if summary is not None:
+            wo_dict["metrics"] = metrics_from_summary(wo, summary, run_times.get(wo.id))
+        else:
+            wo_dict["metrics"] = compute_work_order_metrics(wo, wo_stages, run_times.get(wo.id))
         result.append(wo_dict)
     
     return {
-        "total": len(work_orders),
+        "total": len(result),
         "data": result,
+        "next_cursor": next_cursor,
         "requested_by": current_user["username"]
     }
 
@@ -46,6 +46,10 @@ class WorkOrderCreate(BaseModel):
     machine_id: Optional[int] = None  # Üretim için seçilen makine ID'si
 
 
+class WorkOrderBulkCreate(BaseModel):
+    items: List[WorkOrderCreate] = Field(..., min_length=1, max_length=5000)  # Haftalık planlama içe aktarımı
+
+
 # 📦 Ürün Schemas
 class ProductCreate(BaseModel):
     code: str = Field(..., min_length=1, max_length=50, description="Ürün kodu (örn: PRD-001)")
@@ -116,6 +120,24 @@ class ProductResponse(BaseModel):
         from_attributes = True
 
 
+class ProductListItem(BaseModel):
+    """Ürün listesi satırı: `fields=` ile sadece istenen alanlar döner (hepsi opsiyonel)."""
+    id: Optional[int] = Field(None, description="Ürün ID")
+    code: Optional[str] = Field(None, description="Ürün kodu")
+    name: Optional[str] = Field(None, description="Ürün adı")
+    description: Optional[str] = Field(None, description="Ürün açıklaması")
+    cavity_count: Optional[int] = Field(None, description="Göz Adedi")
+    cycle_time_sec: Optional[int] = Field(None, description="Çevrim Süresi (sn)")
+    injection_temp_c: Optional[int] = Field(None, description="Enj. Sıcaklığı (°C)")
+    mold_temp_c: Optional[int] = Field(None, description="Kalıp Sıcaklığı (°C)")
+    material: Optional[str] = Field(None, description="Malzeme")
+    part_weight_g: Optional[int] = Field(None, description="Parça Ağırlığı (g)")
+    hourly_production: Optional[int] = Field(None, description="Saatlik Üretim (adet)")
+    created_at: Optional[datetime] = Field(None, description="Oluşturulma zamanı")
+    updated_at: Optional[datetime] = Field(None, description="Son güncelleme zamanı")
+    deleted_at: Optional[datetime] = Field(None, description="Soft delete zamanı (listede her zaman NULL)")
+
+
 # 🔧 Kalıp Schemas
 class MoldCreate(BaseModel):
     code: str = Field(..., min_length=1, max_length=50, description="Kalıp kodu (örn: MOLD-001)")
@@ -150,3 +172,16 @@ class MoldResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class MoldListItem(BaseModel):
+    """Kalıp listesi satırı: `fields=` ile sadece istenen alanlar döner (hepsi opsiyonel)."""
+    id: Optional[int] = Field(None, description="Kalıp ID")
+    code: Optional[str] = Field(None, description="Kalıp kodu")
+    name: Optional[str] = Field(None, description="Kalıp adı")
+    description: Optional[str] = Field(None, description="Kalıp açıklaması")
+    product_id: Optional[int] = Field(None, description="Hangi ürün için kullanılıyor")
+    status: Optional[str] = Field(None, description="active / maintenance / inactive")
+    created_at: Optional[datetime] = Field(None, description="Oluşturulma zamanı")
+    updated_at: Optional[datetime] = Field(None, description="Son güncelleme zamanı")
+    deleted_at: Optional[datetime] = Field(None, description="Soft delete zamanı (listede her zaman NULL)")
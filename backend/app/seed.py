@@ -19,7 +19,7 @@ def run():
     db: Session = SessionLocal()
     
     # Admin kullanıcı bul veya oluştur
-    admin_user = db.query(User).filter(User.username.ilike("admin")).first()
+    admin_user = db.query(User).filter(User.username_key == "admin").first()
     if not admin_user:
         admin_user = User(
             username="admin",
@@ -0,0 +1,45 @@
+"""
+Katalog endpoint'leri için ETag / koşullu GET
+- ETag, yanıtın bağlı olduğu tabloların versiyon sayaçlarından ve istek
+  yolundan (query string dahil) üretilir; veri sorgusu çalışmadan hesaplanır
+- If-None-Match eşleşirse 304 döner: liste sorgusu ve serileştirme atlanır,
+  maliyet tek bir primary key sorgusudur
+- Cache-Control: no-cache — istemci her seferinde doğrular, eski veri görmez
+"""
+
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, versions: Dict[str, int]) -> str:
+    key = request.url.path + "?" + str(request.url.query) + "|" + ",".join(
+        f"{name}:{versions[name]}" for name in sorted(versions)
+    )
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match başlığı ETag ile eşleşiyor mu (liste, '*' ve weak karşılaştırma)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, versions: Dict[str, int]) -> Optional[Response]:
+    """
+    ETag'i yanıta ekler. İstemcinin kopyası güncelse döndürülecek 304
+    yanıtını, değilse None döndürür (endpoint normal devam eder).
+    """
+    etag = make_etag(request, versions)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
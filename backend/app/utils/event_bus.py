@@ -0,0 +1,141 @@
+"""
+In-process event bus
+Aşama geçişleri, arıza bildirimleri ve notification'lar için yayın/abone
+mekanizması. /events/stream (SSE) endpoint'i bu bus'a abone olur.
+
+- Son EVENT_BUFFER_SIZE event bellekte tutulur (Last-Event-ID ile devam için)
+- Her event'in hedef rolleri vardır; aboneler sadece kendi rollerine ait
+  event'leri alır
+- publish() senkron handler'lardan (threadpool) çağrılabilir; teslimat
+  abonenin event loop'una call_soon_threadsafe ile yapılır
+"""
+
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import EVENT_BUFFER_SIZE, EVENT_SUBSCRIBER_QUEUE_SIZE
+
+ALL_ROLES = ("admin", "planner", "worker")
+
+
+@dataclass
+class Event:
+    id: int
+    type: str
+    data: Dict[str, Any]
+    roles: Tuple[str, ...]
+    created_at: str
+
+
+@dataclass
+class Subscription:
+    role: str
+    types: Optional[Set[str]]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    overflow: bool = False
+
+    def wants(self, event: Event) -> bool:
+        if self.role not in event.roles:
+            return False
+        return self.types is None or event.type in self.types
+
+
+class EventBus:
+    """Bellek içi, thread-safe event broker."""
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE, queue_size: int = EVENT_SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history: Deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscription] = []
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any], roles: Iterable[str] = ALL_ROLES) -> Event:
+        """Event'i geçmişe ekler ve ilgili abonelere iletir."""
+        with self._lock:
+            self._last_id += 1
+            event = Event(
+                id=self._last_id,
+                type=event_type,
+                data=data,
+                roles=tuple(roles),
+                created_at=datetime.now(timezone.utc).isoformat(),
+            )
+            self._history.append(event)
+            targets = [sub for sub in self._subscribers if sub.wants(event)]
+
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(self._deliver, sub, event)
+            except RuntimeError:
+                # Abonenin event loop'u kapanmış
+                self.unsubscribe(sub)
+        return event
+
+    @staticmethod
+    def _deliver(sub: Subscription, event: Event) -> None:
+        try:
+            sub.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Yavaş istemci: bağlantı kapatılır, istemci Last-Event-ID ile devam eder
+            sub.overflow = True
+
+    def subscribe(
+        self,
+        role: str,
+        types: Optional[Set[str]] = None,
+        last_event_id: Optional[int] = None,
+    ) -> Tuple[Subscription, List[Event], bool]:
+        """
+        Yeni abone kaydeder. Çalışan bir event loop içinden çağrılmalıdır.
+
+        Returns:
+            (subscription, tekrar gönderilecek event'ler, geçmiş eksik mi)
+            Üçüncü değer True ise istenen event'ler buffer'dan düşmüştür;
+            istemci verisini baştan çekmelidir.
+        """
+        sub = Subscription(
+            role=role,
+            types=types,
+            loop=asyncio.get_running_loop(),
+            queue=asyncio.Queue(maxsize=self.queue_size),
+        )
+        with self._lock:
+            self._subscribers.append(sub)
+            replay: List[Event] = []
+            gap = False
+            if last_event_id is not None:
+                if last_event_id > self._last_id:
+                    # Sunucu yeniden başlamış (id'ler sıfırlandı)
+                    last_event_id = 0
+                    gap = True
+                replay = [e for e in self._history if e.id > last_event_id and sub.wants(e)]
+                oldest = self._history[0].id if self._history else self._last_id + 1
+                gap = gap or last_event_id < oldest - 1
+        return sub, replay, gap
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def history(self, after_id: int = 0) -> List[Event]:
+        with self._lock:
+            return [e for e in self._history if e.id > after_id]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+# Global bus instance (process başına bir tane)
+event_bus = EventBus()
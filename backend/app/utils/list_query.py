@@ -0,0 +1,142 @@
+"""
+Liste endpoint'leri için ortak sorgu yardımcıları (ürünler, kalıplar)
+- fields=: sadece istenen kolonlar SELECT edilir; ORM nesnesi oluşturulmaz
+- sort=: izin verilen kolonlarda artan (kolon) / azalan (-kolon) sıralama,
+  eşitlikte id ile
+- Keyset (cursor) pagination: cursor son satırın (sıralama değeri, id) çiftidir
+  ve opak bir string olarak döner; OFFSET kullanılmaz
+- NULL değerler her iki yönde de sona sıralanır (SQLite ve PostgreSQL aynı sırayı verir).
+  Sayfalama iki aşamalıdır: önce dolu değerler saf (kolon, id) > (:v, :id)
+  karşılaştırmasıyla, bitince NULL kuyruğu sadece id ile gezilir; cursor
+  hangi aşamada olduğunu taşır. Böylece dolu değer sayfalarının koşulunda
+  OR ... IS NULL olmaz ve (kolon, id) indeksi kullanılabilir
+- Hatalı parametrelerde ValueError; router'lar 400'e çevirir
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, select, tuple_
+from sqlalchemy.orm import Session
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """'id,code,name' -> ['id', 'code', 'name']; boşsa tüm izinli alanlar."""
+    if not fields:
+        return list(allowed)
+    secilen = []
+    for alan in fields.split(","):
+        alan = alan.strip()
+        if not alan:
+            continue
+        if alan not in allowed:
+            raise ValueError(f"Geçersiz alan: {alan}. İzinli alanlar: {', '.join(allowed)}")
+        if alan not in secilen:
+            secilen.append(alan)
+    if not secilen:
+        raise ValueError("fields boş olamaz")
+    return secilen
+
+
+def parse_sort(sort: Optional[str], allowed: Sequence[str]) -> Tuple[str, bool]:
+    """'name' -> ('name', False), '-created_at' -> ('created_at', True)."""
+    sort = (sort or "id").strip()
+    descending = sort.startswith("-")
+    key = sort.lstrip("-")
+    if key not in allowed:
+        raise ValueError(f"Geçersiz sıralama: {key}. İzinli: {', '.join(allowed)}")
+    return key, descending
+
+
+def like_pattern(text: str, prefix_only: bool = False) -> str:
+    """LIKE joker karakterlerini kaçırır ('\\' escape karakteriyle kullanılır)."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def encode_cursor(value, row_id: int, null_phase: bool = False) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id, int(null_phase)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, column) -> Tuple[object, int, bool]:
+    """Cursor -> (sıralama değeri, id, NULL kuyruğu aşaması mı)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id, *phase = json.loads(raw)
+        null_phase = bool(phase[0]) if phase else value is None
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        return value, int(row_id), null_phase
+    except (ValueError, TypeError, IndexError):
+        raise ValueError("Geçersiz cursor")
+
+
+def _fetch(db: Session, query, count: Optional[int]) -> List:
+    if count is not None:
+        query = query.limit(count)
+    return list(db.execute(query).mappings().all())
+
+
+def keyset_page(
+    db: Session,
+    model,
+    fields: List[str],
+    sort_key: str = "id",
+    descending: bool = False,
+    filters: Sequence = (),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Sadece `fields` kolonlarını seçerek bir sayfa döndürür.
+
+    Returns:
+        (satırlar, next_cursor) - limit yoksa veya son sayfaysa next_cursor None
+    """
+    id_column = model.id
+    sort_column = getattr(model, sort_key)
+    # Cursor için id ve sıralama kolonu her zaman seçilir, yanıttan çıkarılır
+    kolonlar = list(dict.fromkeys([*fields, "id", sort_key]))
+    query = select(*[getattr(model, ad) for ad in kolonlar]).where(*filters)
+    # Bir fazla satır çek - sonraki sayfa var mı anlamak için
+    fetch = None if limit is None else limit + 1
+    id_order = id_column.desc() if descending else id_column.asc()
+
+    if sort_column is id_column:
+        if cursor:
+            _, row_id, _ = decode_cursor(cursor, id_column)
+            query = query.where(id_column < row_id if descending else id_column > row_id)
+        rows = _fetch(db, query.order_by(id_order), fetch)
+    else:
+        value_order = sort_column.desc() if descending else sort_column.asc()
+        null_tail = query.where(sort_column.is_(None)).order_by(id_order)
+        if not cursor:
+            # İlk sayfa: dolu değerler ve ardından NULL'lar tek sorguda
+            rows = _fetch(db, query.order_by(value_order.nulls_last(), id_order), fetch)
+        else:
+            value, row_id, null_phase = decode_cursor(cursor, sort_column)
+            after_id = id_column < row_id if descending else id_column > row_id
+            if null_phase:
+                rows = _fetch(db, null_tail.where(after_id), fetch)
+            else:
+                # NULL'lar karşılaştırmada elenir; dolu değerler bitince NULL kuyruğuna geçilir
+                key = tuple_(sort_column, id_column)
+                rows = _fetch(db, query.where(
+                    key < (value, row_id) if descending else key > (value, row_id)
+                ).order_by(value_order, id_order), fetch)
+                nullable = model.__table__.c[sort_key].nullable
+                if nullable and (fetch is None or len(rows) < fetch):
+                    rows += _fetch(db, null_tail, None if fetch is None else fetch - len(rows))
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        null_phase = sort_column is not id_column and last[sort_key] is None
+        next_cursor = encode_cursor(last[sort_key], last["id"], null_phase)
+    return [{ad: row[ad] for ad in fields} for row in rows], next_cursor
@@ -0,0 +1,256 @@
+"""
+Makine okumaları (machine_readings) yardımcıları
+- Okuma tipleri reading_types lookup tablosunda tutulur; kod -> id eşlemesi
+  bellekte cache'lenir
+- Değerler sayısal ise value_num (Float) kolonuna yazılır; grafikler için
+  min/max/avg kova (bucket) sorguları rollup tabloları ve bu kolon
+  üzerinden veritabanında yapılır
+"""
+
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import MachineReading, ReadingType
+from app.utils.sql_time import time_bucket, bucket_to_str
+from app.utils.telemetry_rollup import ROLLUP_TABLES, get_watermarks
+
+
+def normalize_reading_type(code: str) -> str:
+    return code.strip().lower()
+
+
+def parse_value(value: Union[float, int, str, None]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Okuma değerini (value_num, value) çiftine ayırır.
+    Sayısal değerler sadece value_num'a, diğerleri sadece value'ya yazılır.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, bool):
+        return float(value), None
+    if isinstance(value, (int, float)):
+        return (float(value), None) if math.isfinite(value) else (None, str(value))
+    text = str(value).strip()
+    try:
+        number = float(text.replace(",", "."))
+    except ValueError:
+        return None, text
+    if not math.isfinite(number):
+        return None, text
+    return number, None
+
+
+def format_value(reading: MachineReading) -> Optional[str]:
+    """API uyumluluğu için değeri string olarak döndürür."""
+    if reading.value is not None:
+        return reading.value
+    if reading.value_num is None:
+        return None
+    if reading.value_num.is_integer():
+        return str(int(reading.value_num))
+    return repr(reading.value_num)
+
+
+def serialize_reading(reading: MachineReading) -> dict:
+    return {
+        "id": reading.id,
+        "machine_id": reading.machine_id,
+        "reading_type": reading.reading_type,
+        "value": format_value(reading),
+        "value_num": reading.value_num,
+        "timestamp": reading.timestamp,
+    }
+
+
+class ReadingTypeCache:
+    """
+    Okuma tipi kod -> id eşlemesi. Eksik tipler ilk kullanımda oluşturulur.
+
+    Yeni oluşturulan tiplerin id'leri session.info'da bekletilir ve ancak
+    çağıranın transaction'ı commit edildiğinde cache'e alınır; rollback olursa
+    atılır (cache veritabanında olmayan bir id tutmaz).
+    """
+
+    PENDING_KEY = "reading_types_pending"
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, codes: Iterable[str]) -> Dict[str, int]:
+        wanted = {normalize_reading_type(c) for c in codes}
+        pending: Dict[str, int] = db.info.setdefault(self.PENDING_KEY, {})
+        with self._lock:
+            found = {code: self._ids[code] for code in wanted if code in self._ids}
+        found.update({code: pending[code] for code in wanted - found.keys() if code in pending})
+        missing = wanted - found.keys()
+        if missing:
+            rows = db.query(ReadingType.id, ReadingType.code).filter(
+                ReadingType.code.in_(missing)
+            ).all()
+            committed = {row.code: row.id for row in rows}
+            with self._lock:
+                self._ids.update(committed)
+            found.update(committed)
+            for code in sorted(missing - committed.keys()):
+                found[code] = pending[code] = self._create(db, code)
+        return found
+
+    def commit_pending(self, db: Session) -> None:
+        pending = db.info.pop(self.PENDING_KEY, None)
+        if pending:
+            with self._lock:
+                self._ids.update(pending)
+
+    def discard_pending(self, db: Session) -> None:
+        db.info.pop(self.PENDING_KEY, None)
+
+    @staticmethod
+    def _create(db: Session, code: str) -> int:
+        try:
+            with db.begin_nested():
+                reading_type = ReadingType(code=code)
+                db.add(reading_type)
+            return reading_type.id
+        except IntegrityError:
+            # Başka bir worker aynı anda oluşturdu
+            return db.query(ReadingType.id).filter(ReadingType.code == code).scalar()
+
+    def get_id(self, db: Session, code: str) -> int:
+        return self.resolve(db, [code])[normalize_reading_type(code)]
+
+    def lookup(self, db: Session, code: str) -> Optional[int]:
+        """Tipi oluşturmadan id'sini döndürür (okuma sorguları için)."""
+        code = normalize_reading_type(code)
+        with self._lock:
+            if code in self._ids:
+                return self._ids[code]
+        type_id = db.query(ReadingType.id).filter(ReadingType.code == code).scalar()
+        if type_id is not None:
+            with self._lock:
+                self._ids[code] = type_id
+        return type_id
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+reading_type_cache = ReadingTypeCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _reading_types_committed(session: Session) -> None:
+    reading_type_cache.commit_pending(session)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reading_types_discarded(session: Session, transaction) -> None:
+    # Commit edilmeden biten (rollback / close) ana transaction'ın tipleri cache'e girmez
+    if transaction.parent is None:
+        reading_type_cache.discard_pending(session)
+
+
+UNIT_SECONDS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# Kova biriminin hangi rollup tablosundan okunacağı
+SOURCE_RESOLUTION = {"minute": "minute", "hour": "hour", "day": "day", "week": "day"}
+
+
+def choose_bucket(start: datetime, end: datetime, max_points: int) -> str:
+    """Aralığı en fazla max_points kovayla çizebilen en ince birimi seçer."""
+    span = (end - start).total_seconds()
+    for unit in ("minute", "hour", "day"):
+        if span / UNIT_SECONDS[unit] <= max_points:
+            return unit
+    return "week"
+
+
+def _merge_bucket(buckets: Dict, key, count, vmin, vmax, vsum) -> None:
+    if not count:
+        return
+    current = buckets.get(key)
+    if current is None:
+        buckets[key] = [count, vmin, vmax, vsum]
+        return
+    current[0] += count
+    current[1] = min(current[1], vmin)
+    current[2] = max(current[2], vmax)
+    current[3] += vsum
+
+
+def downsample_readings(
+    db: Session,
+    machine_id: int,
+    reading_type_id: int,
+    start: datetime,
+    end: datetime,
+    unit: str,
+) -> List[dict]:
+    """
+    [start, end) aralığındaki sayısal okumaları kovalara bölerek
+    kova başına count/min/max/avg döndürür. Ham satırlar uygulamaya taşınmaz.
+
+    Rollup watermark'ından önceki kısım rollup tablosundan, sonrası
+    (henüz toplanmamış son dakikalar) ham tablodan okunur ve birleştirilir.
+    Rollup kısmında aralık kaynak tablonun kova sınırlarına göre değerlendirilir.
+    """
+    resolution = SOURCE_RESOLUTION[unit]
+    mark = get_watermarks(db)[resolution]
+    buckets: Dict = {}
+
+    raw_start = start
+    if mark is not None and mark > start:
+        table = ROLLUP_TABLES[resolution]
+        split = min(mark, end)
+        bucket = time_bucket(db, table.bucket_start, unit).label("bucket")
+        rows = db.query(
+            bucket,
+            func.sum(table.sample_count).label("count"),
+            func.min(table.value_min).label("min"),
+            func.max(table.value_max).label("max"),
+            func.sum(table.value_sum).label("sum"),
+        ).filter(
+            table.machine_id == machine_id,
+            table.reading_type_id == reading_type_id,
+            table.bucket_start >= start,
+            table.bucket_start < split,
+        ).group_by(bucket).all()
+        for row in rows:
+            _merge_bucket(buckets, bucket_to_str(row.bucket), row.count, row.min, row.max, row.sum)
+        raw_start = split
+
+    if raw_start < end:
+        bucket = time_bucket(db, MachineReading.timestamp, unit).label("bucket")
+        rows = db.query(
+            bucket,
+            func.count(MachineReading.value_num).label("count"),
+            func.min(MachineReading.value_num).label("min"),
+            func.max(MachineReading.value_num).label("max"),
+            func.sum(MachineReading.value_num).label("sum"),
+        ).filter(
+            MachineReading.machine_id == machine_id,
+            MachineReading.reading_type_id == reading_type_id,
+            MachineReading.timestamp >= raw_start,
+            MachineReading.timestamp < end,
+            MachineReading.value_num.isnot(None),
+        ).group_by(bucket).all()
+        for row in rows:
+            _merge_bucket(buckets, bucket_to_str(row.bucket), row.count, row.min, row.max, row.sum)
+
+    return [
+        {
+            "bucket": key,
+            "count": count,
+            "min": vmin,
+            "max": vmax,
+            "avg": round(vsum / count, 4),
+        }
+        for key, (count, vmin, vmax, vsum) in sorted(buckets.items())
+    ]
@@ -0,0 +1,158 @@
+"""
+İş emri metrik özeti (work_order_metrics)
+Aşama geçişlerinde aynı transaction içinde güncellenir; metrik endpoint'leri
+her istekte tüm aşamaları taramak yerine bu özetten okur.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.models import WorkOrderMetrics, WorkOrderStage
+
+STATUS_COLUMNS = {
+    "planned": "planned_count",
+    "in_progress": "in_progress_count",
+    "paused": "paused_count",
+    "done": "done_count",
+}
+
+
+def as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """DB'den naive dönen (SQLite/PostgreSQL DateTime) değerleri UTC kabul eder."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def summary_from_stages(work_order_id: int, stages: Iterable[WorkOrderStage]) -> WorkOrderMetrics:
+    """
+    Aşamalardan (kaydedilmemiş) bir özet nesnesi üretir.
+
+    paused_seconds sadece son pause/resume çiftinden hesaplanabilir;
+    geçmiş duraklatmalar aşama tablosunda tutulmadığı için backfill
+    değeri bir alt sınırdır.
+    """
+    summary = WorkOrderMetrics(
+        work_order_id=work_order_id,
+        total_stages=0,
+        planned_count=0,
+        in_progress_count=0,
+        paused_count=0,
+        done_count=0,
+        paused_seconds=0.0,
+    )
+    for s in stages:
+        summary.total_stages += 1
+        column = STATUS_COLUMNS.get(s.status)
+        if column:
+            setattr(summary, column, getattr(summary, column) + 1)
+        # Yeni yazılan (aware) ve DB'den okunan (naive) değerler karışabilir
+        if s.actual_start and (
+            summary.first_actual_start is None or as_utc(s.actual_start) < as_utc(summary.first_actual_start)
+        ):
+            summary.first_actual_start = s.actual_start
+        if s.actual_end and (
+            summary.last_actual_end is None or as_utc(s.actual_end) > as_utc(summary.last_actual_end)
+        ):
+            summary.last_actual_end = s.actual_end
+        if s.paused_at and s.resumed_at and as_utc(s.resumed_at) > as_utc(s.paused_at):
+            summary.paused_seconds += (as_utc(s.resumed_at) - as_utc(s.paused_at)).total_seconds()
+    return summary
+
+
+def rebuild_summary(db: Session, work_order_id: int) -> WorkOrderMetrics:
+    """Özeti aşamalardan yeniden hesaplar ve session'a ekler (commit çağırana aittir)."""
+    stages = db.query(WorkOrderStage).filter(
+        WorkOrderStage.work_order_id == work_order_id
+    ).all()
+    fresh = summary_from_stages(work_order_id, stages)
+    fresh.updated_at = datetime.now(timezone.utc)
+    return db.merge(fresh)
+
+
+def get_summary(db: Session, work_order_id: int) -> WorkOrderMetrics:
+    """
+    Özeti döndürür; yoksa aşamalardan hesaplar ama kaydetmez.
+
+    GET isteği yazma yapmaz: aynı iş emrine eşzamanlı ilk okumalar aynı
+    satırı eklemeye çalışıp IntegrityError almaz. Eksik özetler
+    scripts/backfill_work_order_metrics.py ile veya ilk aşama geçişinde yazılır.
+    """
+    summary = db.get(WorkOrderMetrics, work_order_id)
+    if summary is None:
+        stages = db.query(WorkOrderStage).filter(
+            WorkOrderStage.work_order_id == work_order_id
+        ).all()
+        summary = summary_from_stages(work_order_id, stages)
+    return summary
+
+
+def get_summaries(db: Session, work_order_ids: List[int]) -> Dict[int, WorkOrderMetrics]:
+    """Birden fazla iş emrinin özetini tek IN sorgusuyla getirir."""
+    if not work_order_ids:
+        return {}
+    rows = db.query(WorkOrderMetrics).filter(
+        WorkOrderMetrics.work_order_id.in_(work_order_ids)
+    ).all()
+    return {row.work_order_id: row for row in rows}
+
+
+def record_stage_transition(
+    db: Session,
+    stage: WorkOrderStage,
+    old_status: str,
+    now: datetime,
+    paused_seconds: float = 0.0,
+) -> None:
+    """
+    Aşama geçişini özete yansıtır. Aşama değişikliğinden sonra, commit'ten
+    önce çağrılır; böylece özet ve aşama aynı transaction'da yazılır.
+
+    Sayaçlar atomik UPDATE ile artırılır (aynı iş emrinin farklı
+    aşamalarındaki eşzamanlı geçişler birbirini ezmez).
+    """
+    db.flush()
+
+    if db.get(WorkOrderMetrics, stage.work_order_id) is None:
+        # Henüz özet yok - mevcut (geçiş sonrası) durumdan oluştur
+        rebuild_summary(db, stage.work_order_id)
+        return
+
+    values = {"updated_at": now}
+    old_column = STATUS_COLUMNS.get(old_status)
+    new_column = STATUS_COLUMNS.get(stage.status)
+    if old_column:
+        values[old_column] = getattr(WorkOrderMetrics, old_column) - 1
+    if new_column:
+        values[new_column] = getattr(WorkOrderMetrics, new_column) + 1
+
+    if stage.status == "in_progress" and old_status == "planned" and stage.actual_start:
+        col = WorkOrderMetrics.first_actual_start
+        values["first_actual_start"] = case(
+            (col.is_(None) | (col > stage.actual_start), stage.actual_start),
+            else_=col,
+        )
+    if stage.status == "done" and stage.actual_end:
+        col = WorkOrderMetrics.last_actual_end
+        values["last_actual_end"] = case(
+            (col.is_(None) | (col < stage.actual_end), stage.actual_end),
+            else_=col,
+        )
+    if paused_seconds:
+        values["paused_seconds"] = WorkOrderMetrics.paused_seconds + paused_seconds
+
+    db.execute(
+        update(WorkOrderMetrics)
+        .where(WorkOrderMetrics.work_order_id == stage.work_order_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    # Session'daki özet nesnesi bayatladı
+    summary = db.get(WorkOrderMetrics, stage.work_order_id)
+    if summary is not None:
+        db.expire(summary)
@@ -0,0 +1,166 @@
+"""
+Versiyonlu model kayıt defteri (registry)
+- Her eğitim models/versions/vNNNN/ altına yeni bir klasör olarak yazılır;
+  klasör önce geçici isimle doldurulur, sonra tek bir rename ile yayınlanır
+- Aktif versiyon models/CURRENT dosyasında tutulur ve os.replace ile
+  atomik olarak değiştirilir (geri alma = pointer'ı eski versiyona çevirmek)
+- Her versiyonun metadata.json'ı eğitim satır sayısı, skorlar ve feature
+  setini içerir
+- Artefaktlar sıkıştırılmadan yazılır; böylece joblib.load(mmap_mode="r")
+  ile numpy dizileri dosyadan map edilir ve aynı makinedeki worker'lar
+  sayfaları page cache üzerinden paylaşır
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import joblib
+
+VERSIONS_DIRNAME = "versions"
+POINTER_FILENAME = "CURRENT"
+METADATA_FILENAME = "metadata.json"
+
+_VERSION_RE = re.compile(r"^v(\d{4,})$")
+
+
+def format_version(number: int) -> str:
+    return f"v{number:04d}"
+
+
+class ModelRegistry:
+    """Bir model klasörü üzerindeki versiyonlu artefakt deposu."""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.versions_dir = os.path.join(root_dir, VERSIONS_DIRNAME)
+        self.pointer_path = os.path.join(root_dir, POINTER_FILENAME)
+
+    def version_dir(self, version: str) -> str:
+        if not _VERSION_RE.match(version):
+            raise ValueError(f"Geçersiz model versiyonu: {version}")
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self) -> List[str]:
+        """Yayınlanmış versiyonlar (eskiden yeniye)."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        names = [name for name in os.listdir(self.versions_dir) if _VERSION_RE.match(name)]
+        return sorted(names, key=lambda name: int(name[1:]))
+
+    def exists(self, version: str) -> bool:
+        try:
+            return os.path.isfile(os.path.join(self.version_dir(version), METADATA_FILENAME))
+        except ValueError:
+            return False
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(self.pointer_path, encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if self.exists(version) else None
+
+    def read_metadata(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self.version_dir(version), METADATA_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_metadata(self) -> List[Dict[str, Any]]:
+        """Tüm versiyonların metadata'sı (yeniden eskiye)."""
+        return [self.read_metadata(v) for v in reversed(self.versions())]
+
+    def publish(self, artifacts: Dict[str, Any], metadata: Dict[str, Any], activate: bool = True) -> str:
+        """
+        Artefaktları yeni bir versiyon olarak yazar ve (istenirse) aktif yapar.
+
+        Args:
+            artifacts: dosya adı -> joblib ile yazılacak nesne
+            metadata: metadata.json'a eklenecek alanlar
+
+        Returns:
+            Yeni versiyon adı (ör. "v0003")
+        """
+        os.makedirs(self.versions_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.versions_dir)
+        try:
+            for filename, obj in artifacts.items():
+                joblib.dump(obj, os.path.join(tmp_dir, filename))
+
+            while True:
+                existing = self.versions()
+                version = format_version(int(existing[-1][1:]) + 1 if existing else 1)
+                meta = {
+                    **metadata,
+                    "version": version,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "artifacts": sorted(artifacts),
+                }
+                with open(os.path.join(tmp_dir, METADATA_FILENAME), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, ensure_ascii=False, indent=2)
+                try:
+                    # Boş olmayan hedefe rename başarısız olur: eşzamanlı yayında
+                    # iki process aynı numarayı alamaz
+                    os.rename(tmp_dir, os.path.join(self.versions_dir, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.versions_dir, version)):
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.set_current(version)
+        return version
+
+    def set_current(self, version: str) -> None:
+        """Aktif versiyon pointer'ını atomik olarak değiştirir."""
+        if not self.exists(version):
+            raise FileNotFoundError(f"Model versiyonu bulunamadı: {version}")
+        tmp_path = f"{self.pointer_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.pointer_path)
+
+    def load(self, version: str, filenames: Iterable[str], mmap_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Bir versiyonun artefaktlarını yükler."""
+        path = self.version_dir(version)
+        return {
+            filename: joblib.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+            for filename in filenames
+        }
+
+    def prune(self, keep: int) -> List[str]:
+        """
+        En yeni `keep` versiyon ve aktif versiyon dışındakileri siler.
+        Yüklü (map edilmiş) dosyalar silinse de açık process'ler okumaya devam eder.
+        """
+        if keep <= 0:
+            return []
+        current = self.current_version()
+        removed = []
+        for version in self.versions()[:-keep]:
+            if version == current:
+                continue
+            shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+            removed.append(version)
+        return removed
+
+    def import_legacy(self, filenames: Iterable[str], metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Registry öncesi kök klasöre yazılmış model dosyalarını ilk versiyon
+        olarak içe aktarır. Registry boş değilse veya dosyalar yoksa None döner.
+        """
+        filenames = list(filenames)
+        paths = [os.path.join(self.root_dir, filename) for filename in filenames]
+        if self.versions() or not all(os.path.isfile(p) for p in paths):
+            return None
+        artifacts = {filename: joblib.load(path) for filename, path in zip(filenames, paths)}
+        return self.publish(artifacts, metadata)
@@ -0,0 +1,257 @@
+"""
+Ürün adları için bellek içi trigram indeksi
+- Adlar Türkçe kurallarıyla küçük harfe çevrilir (İ -> i, I -> ı) ve
+  aramada aksan farkı olmasın diye ASCII'ye katlanır (ı/ş/ğ/ü/ö/ç)
+- Her kelime pg_trgm gibi boşlukla doldurulup trigramlara ayrılır;
+  trigram -> ürün id'leri ters indeksi tutulur
+- Skor: sorgu trigramlarının kaçı adda var (kapsama), eşitlikte Jaccard
+  benzerliği; sayım numpy ile vektörel yapılır (100k ad < 1 ms)
+- create/update/delete/restore'da tek kayıt güncellenir; diğer
+  process'lerdeki değişiklikler için indeks belirli aralıklarla yeniden kurulur
+"""
+
+import math
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import PRODUCT_NAME_INDEX_REFRESH_SECONDS
+from app.utils.text_keys import turkish_lower
+
+_TR_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c", "â": "a", "î": "i", "û": "u"})
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+MIN_SCORE = 0.3
+
+
+def fold_name(text: str) -> str:
+    """Arama anahtarı: Türkçe küçük harf + ASCII katlama + noktalama/boşluk sadeleştirme."""
+    return _NON_WORD.sub(" ", turkish_lower(text).translate(_TR_FOLD)).strip()
+
+
+def trigrams(folded: str) -> frozenset:
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class NameIndex:
+    """
+    id -> ad kayıtları üzerinde trigram ters indeksi.
+
+    Her kayıt bir slot'a yazılır; posting listeleri slot numaralarını tutan
+    numpy dizileridir. Arama, sorgu trigramlarının posting'lerini birleştirip
+    np.bincount ile slot başına eşleşen trigram sayısını tek geçişte hesaplar;
+    tam sıralama yerine ilk adaylar argpartition ile seçilip kesin skorlanır.
+    Güncellemede eski slot silindi işaretlenir (tombstone) ve yeni slot eklenir;
+    silinmiş slot oranı yükselince indeks sıkıştırılır.
+    """
+
+    COMPACT_RATIO = 0.25
+    # Adların bu oranından fazlasında geçen trigramlar aramada yok sayılır
+    STOP_RATIO = 0.2
+    STOP_MIN = 1000
+    # upsert'lerde biriken bu kadar posting girdisi ana dizilere birleştirilir
+    PENDING_MAX = 4096
+
+    def __init__(self, refresh_seconds: float = PRODUCT_NAME_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._changes = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._install(self._compute([]))
+
+    @staticmethod
+    def _compute(rows: List[Tuple[int, str]]) -> Dict[str, object]:
+        """Yeni indeks yapılarını yerel değişkenlerde kurar; kilit gerektirmez."""
+        slot_of: Dict[int, int] = {}
+        ids: List[int] = []
+        names: List[Optional[str]] = []
+        grams_list: List[frozenset] = []
+        postings: Dict[str, List[int]] = {}
+        for slot, (doc_id, name) in enumerate(rows):
+            grams = trigrams(fold_name(name))
+            slot_of[doc_id] = slot
+            ids.append(doc_id)
+            names.append(name)
+            grams_list.append(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(slot)
+        return {
+            "_slot_of": slot_of,
+            "_ids": ids,
+            "_names": names,
+            "_grams": grams_list,
+            "_alive": np.ones(len(rows), dtype=bool),
+            "_sizes": np.array([len(g) for g in grams_list], dtype=np.int32),
+            "_postings": {gram: np.array(slots, dtype=np.int32) for gram, slots in postings.items()},
+            "_pending": {},
+            "_pending_count": 0,
+            "_dead": 0,
+        }
+
+    def _install(self, state: Dict[str, object]) -> None:
+        """_compute çıktısını etkin indeks yapar (sabit sayıda atama)."""
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    def needs_build(self) -> bool:
+        if self._built_at is None:
+            return True
+        return self.refresh_seconds > 0 and time.monotonic() - self._built_at > self.refresh_seconds
+
+    @property
+    def has_data(self) -> bool:
+        return bool(self._slot_of)
+
+    def change_marker(self) -> int:
+        """build() öncesi alınır; kurulum sırasında gelen değişiklikler kaybolmasın diye."""
+        return self._changes
+
+    def build(self, rows: Iterable[Tuple[int, Optional[str]]], marker: Optional[int] = None) -> None:
+        """
+        İndeksi (id, ad) satırlarından baştan kurar. Kurulum kilit dışında
+        yapılır, aramalar eski indeksle devam eder; kilit sadece yeni yapıları
+        yerine koymak için alınır. marker verilmiş ve okuma sırasında indekse
+        değişiklik gelmişse indeks bayat işaretlenir; bir sonraki aramada
+        tekrar kurulur.
+        """
+        state = self._compute([(doc_id, name) for doc_id, name in rows if name])
+        with self._lock:
+            self._install(state)
+            stale = marker is not None and marker != self._changes
+            self._built_at = None if stale else time.monotonic()
+
+    def upsert(self, doc_id: int, name: Optional[str]) -> None:
+        with self._lock:
+            self._changes += 1
+            if self._built_at is None:
+                return  # Henüz kurulmadı; kurulumda okunacak
+            self._remove(doc_id)
+            if not name:
+                return
+            slot = len(self._names)
+            grams = trigrams(fold_name(name))
+            self._slot_of[doc_id] = slot
+            self._ids.append(doc_id)
+            self._names.append(name)
+            self._grams.append(grams)
+            if slot >= len(self._alive):
+                # Kapasite iki katına çıkar; her eklemede dizi kopyalanmaz
+                capacity = max(16, 2 * len(self._alive))
+                self._alive = np.resize(self._alive, capacity)
+                self._alive[slot:] = False
+                self._sizes = np.resize(self._sizes, capacity)
+            self._alive[slot] = True
+            self._sizes[slot] = len(grams)
+            # Yeni slot'lar posting dizilerine toplu eklenir (aramada birlikte sayılır)
+            for gram in grams:
+                self._pending.setdefault(gram, []).append(slot)
+            self._pending_count += len(grams)
+            if self._pending_count > self.PENDING_MAX:
+                self._merge_pending()
+            self._maybe_compact()
+
+    def _merge_pending(self) -> None:
+        for gram, slots in self._pending.items():
+            added = np.array(slots, dtype=np.int32)
+            posting = self._postings.get(gram)
+            self._postings[gram] = added if posting is None else np.concatenate([posting, added])
+        self._pending = {}
+        self._pending_count = 0
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._changes += 1
+            if self._built_at is not None:
+                self._remove(doc_id)
+                self._maybe_compact()
+
+    def _remove(self, doc_id: int) -> None:
+        slot = self._slot_of.pop(doc_id, None)
+        if slot is None:
+            return
+        self._alive[slot] = False
+        self._names[slot] = None
+        self._dead += 1
+
+    def _maybe_compact(self) -> None:
+        if self._dead > 64 and self._dead > len(self._names) * self.COMPACT_RATIO:
+            self._install(self._compute(
+                [(self._ids[slot], self._names[slot]) for slot in sorted(self._slot_of.values())]
+            ))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._built_at = None
+            self._changes += 1
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    # ---- Arama ----
+
+    def search(self, query: str, limit: int = 5, min_score: float = MIN_SCORE) -> List[Tuple[str, float]]:
+        """
+        Sorguya en benzer adları (ad, skor) olarak, skora göre azalan sırada döndürür.
+        Skor: sorgu trigramlarının adda bulunan oranı; eşitlikte Jaccard benzerliği.
+        Aynı ada sahip kayıtlar tek sonuç olarak döner.
+        """
+        q = trigrams(fold_name(query))
+        if not q or limit <= 0:
+            return []
+
+        with self._lock:
+            # Adların büyük kısmında geçen trigramlar (stop-gram) aday sayımında
+            # taranmaz; sadece ilk adaylar tüm trigramlarla kesin skorlanır
+            stop = max(self.STOP_MIN, int(len(self._slot_of) * self.STOP_RATIO))
+            postings = []
+            for gram in q:
+                parts = [p for p in (self._postings.get(gram), self._pending.get(gram)) if p is not None]
+                if parts and sum(len(p) for p in parts) <= stop:
+                    postings.append(np.concatenate(parts).astype(np.int32, copy=False))
+            if not postings:
+                return []
+            needed = max(1, math.ceil(len(postings) * min_score - 1e-9))
+            slot_count = len(self._names)
+            counts = np.bincount(np.concatenate(postings), minlength=slot_count)
+            candidates = np.flatnonzero((counts >= needed) & self._alive[:slot_count])
+            if candidates.size == 0:
+                return []
+            common = counts[candidates]
+            jaccard = common / (len(postings) + self._sizes[candidates] - common)
+            key = common + jaccard  # jaccard < 1: ortak trigram sırasını bozmaz
+            top = min(candidates.size, limit * 4)
+            best = candidates[np.argpartition(-key, top - 1)[:top]]
+
+            scored = []
+            for slot in best:
+                grams = self._grams[slot]
+                shared = len(q & grams)
+                if shared >= len(q) * min_score:
+                    # Önce kapsama (ortak trigram oranı), sonra Jaccard
+                    scored.append((shared / len(q), shared / (len(q) + len(grams) - shared), self._names[slot]))
+
+        results: List[Tuple[str, float]] = []
+        seen = set()
+        for coverage, _, name in sorted(scored, reverse=True):
+            if name in seen:
+                continue
+            seen.add(name)
+            results.append((name, round(coverage, 4)))
+            if len(results) == limit:
+                break
+        return results
+
+
+# Aktif ürün adları indeksi (process başına bir tane)
+product_name_index = NameIndex()
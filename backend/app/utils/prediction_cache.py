@@ -0,0 +1,101 @@
+"""
+AI tahmin sonuç cache'i (LRU)
+- Anahtar (namespace, versiyon, normalize edilmiş girdiler) tuple'ıdır:
+  "urun" -> RandomForest ürün adı modeli (versiyon = registry versiyonu)
+  "malzeme" -> malzeme bazlı tahmin (ürün verisinden hesaplanır)
+- Yeni model devreye alındığında "urun", ürünler değiştiğinde "malzeme"
+  namespace'i temizlenir
+- Diğer process'lerdeki değişiklikler (başka uvicorn worker'ı, scriptler)
+  bildirilmediği için kayıtlar ayrıca TTL ile sınırlıdır
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.config import AI_PREDICTION_CACHE_SIZE, AI_PREDICTION_CACHE_TTL_SECONDS
+
+NAMESPACE_URUN = "urun"
+NAMESPACE_MALZEME = "malzeme"
+
+
+class PredictionCache:
+    """Thread-safe LRU cache; namespace başına hit/miss sayaçları tutar."""
+
+    def __init__(self, max_size: int = AI_PREDICTION_CACHE_SIZE, ttl_seconds: float = AI_PREDICTION_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def _count(self, namespace: str, name: str) -> None:
+        counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0, "invalidations": 0})
+        counters[name] += 1
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        """Kayıt varsa kopyasını döndürür (çağıran sonucu değiştirebilir)."""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._items.move_to_end(key)
+                self._count(key[0], "hits")
+                return copy.deepcopy(item[1])
+            if item is not None:
+                del self._items[key]
+            self._count(key[0], "misses")
+            return None
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Verilen namespace'in (None ise tümünün) kayıtlarını siler."""
+        with self._lock:
+            if namespace is None:
+                for ns in {key[0] for key in self._items} | set(self._counters):
+                    self._count(ns, "invalidations")
+                self._items.clear()
+                return
+            for key in [k for k in self._items if k[0] == namespace]:
+                del self._items[key]
+            self._count(namespace, "invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {ns: dict(c) for ns, c in self._counters.items()}
+            hits = sum(c["hits"] for c in counters.values())
+            misses = sum(c["misses"] for c in counters.values())
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+                "evictions": self.evictions,
+                "namespaces": counters,
+            }
+
+    def reset(self) -> None:
+        """Kayıtları ve sayaçları sıfırlar (testler için)."""
+        with self._lock:
+            self._items.clear()
+            self._counters.clear()
+            self.evictions = 0
+
+
+# Global cache (process başına bir tane)
+prediction_cache = PredictionCache()
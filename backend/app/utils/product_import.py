@@ -0,0 +1,209 @@
+"""
+CSV ürün içe aktarma (streaming, chunk'lı upsert)
+- Satırlar csv.DictReader'dan akış halinde okunur; dosya belleğe alınmaz
+- Her chunk için mevcut ürün kodları tek bir IN sorgusuyla çekilir
+  (eklenen/güncellenen sayımı ve ON CONFLICT desteklemeyen veritabanları için)
+- Yazma PostgreSQL ve SQLite'ta tek bir INSERT ... ON CONFLICT (code) DO UPDATE
+  ile yapılır; diğer dialect'lerde toplu INSERT + id'ye göre toplu UPDATE
+- Commit her `commit_every` chunk'ta bir yapılır; hata olursa sadece son
+  commit'ten sonraki chunk'lar geri alınır
+- Core INSERT @validates'i atladığı için name_key burada hesaplanır
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_IMPORT_COMMIT_EVERY
+from app.models import Product
+from app.utils.sql_time import dialect_name
+from app.utils.text_keys import product_name_key
+
+MAX_HATA_ORNEGI = 20
+
+# CSV kolonu -> ürün alanı (başlıklar strip edilerek eşlenir; dosyada bazılarının sonunda boşluk var)
+SAYISAL_KOLONLAR = {
+    "Göz Adedi": "cavity_count",
+    "Çevrim Süresi": "cycle_time_sec",
+    "Enjeksiyon Sıcaklığı": "injection_temp_c",
+    "Kalıp Sıcaklığı": "mold_temp_c",
+    "Saatlik Üretim (adet)": "hourly_production",
+}
+
+# Çakışmada güncellenen alanlar (code, description, created_at ve deleted_at korunur;
+# updated_at yazma anına set edilir)
+GUNCELLENEN_ALANLAR = [
+    "name", "name_key", "cavity_count", "cycle_time_sec", "injection_temp_c",
+    "mold_temp_c", "material", "part_weight_g", "hourly_production",
+]
+
+
+def temizle_sayi(deger: Optional[str]) -> Optional[float]:
+    """
+    Virgül/nokta düzeltmeleri yapar.
+    Örn: "2,05" → 2.05, "05" → 5
+    """
+    if not deger or deger.strip() == '':
+        return None
+    try:
+        # Virgülü noktaya çevir (Türkçe ondalık formatı)
+        return float(deger.strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def temizle_int(deger: Optional[str]) -> Optional[int]:
+    """Değeri integer'a çevirir."""
+    sayi = temizle_sayi(deger)
+    if sayi is None:
+        return None
+    return int(sayi)
+
+
+def csv_satiri_cevir(row: Dict[str, str], satir_no: int) -> Dict:
+    """
+    CSV satırını products kolonlarına çevirir. Ürün adı boşsa ValueError.
+    Kalıp adı yoksa ürün kodu PRD-<satır no> olur.
+    """
+    # Başlıktan fazla alanı olan satırlarda DictReader fazlalığı None anahtarına liste olarak koyar
+    row = {k.strip(): (v or "").strip() for k, v in row.items() if k is not None}
+    urun_adi = row.get("Ürün Adı", "")
+    if not urun_adi:
+        raise ValueError("Ürün adı boş")
+    kalip_adi = row.get("Kalıp Adı", "")
+    agirlik = temizle_sayi(row.get("Parça Ağırlığı (g)"))
+    urun = {
+        "code": kalip_adi or f"PRD-{satir_no}",
+        "name": urun_adi,
+        "name_key": product_name_key(urun_adi),
+        "description": f"CSV'den yüklendi - {kalip_adi}",
+        "material": row.get("Malzeme") or None,
+        "part_weight_g": int(agirlik) if agirlik else None,
+    }
+    for kolon, alan in SAYISAL_KOLONLAR.items():
+        urun[alan] = temizle_int(row.get(kolon))
+    return urun
+
+
+@dataclass
+class ImportOzeti:
+    okunan: int = 0
+    eklenen: int = 0
+    guncellenen: int = 0
+    hatali: int = 0
+    chunk: int = 0
+    commit: int = 0
+    sure_sn: float = 0.0
+    hatalar: List[Dict] = field(default_factory=list)
+
+    @property
+    def satir_per_sn(self) -> float:
+        return round(self.okunan / self.sure_sn, 1) if self.sure_sn > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "okunan": self.okunan,
+            "eklenen": self.eklenen,
+            "guncellenen": self.guncellenen,
+            "hatali": self.hatali,
+            "chunk": self.chunk,
+            "commit": self.commit,
+            "sure_sn": round(self.sure_sn, 3),
+            "satir_per_sn": self.satir_per_sn,
+            "hatalar": self.hatalar,
+        }
+
+
+class ProductImporter:
+    """CSV satırlarını chunk'lar halinde products tablosuna upsert eder."""
+
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: int = PRODUCT_IMPORT_CHUNK_SIZE,
+        commit_every: int = PRODUCT_IMPORT_COMMIT_EVERY,
+        on_chunk: Optional[Callable[[ImportOzeti], None]] = None,
+    ):
+        self.db = db
+        self.chunk_size = max(1, chunk_size)
+        self.commit_every = max(1, commit_every)
+        self.on_chunk = on_chunk
+        self.dialect = dialect_name(db)
+
+    def run(self, rows: Iterable[Dict[str, str]]) -> ImportOzeti:
+        ozet = ImportOzeti()
+        start = time.perf_counter()
+        chunk: Dict[str, Dict] = {}
+        try:
+            # Başlık 1. satır; veri satırları 2'den başlar
+            for satir_no, row in enumerate(rows, start=2):
+                ozet.okunan += 1
+                try:
+                    urun = csv_satiri_cevir(row, satir_no)
+                except ValueError as e:
+                    self._hata(ozet, satir_no, str(e))
+                    continue
+                # Aynı kod chunk içinde tekrar ederse son satır geçerli (ON CONFLICT aynı satırı iki kez güncelleyemez)
+                chunk.pop(urun["code"], None)
+                chunk[urun["code"]] = urun
+                if len(chunk) >= self.chunk_size:
+                    self._yaz(chunk, ozet, start)
+                    chunk = {}
+            if chunk:
+                self._yaz(chunk, ozet, start)
+            if ozet.chunk % self.commit_every:
+                self.db.commit()
+                ozet.commit += 1
+        except Exception:
+            self.db.rollback()
+            raise
+        ozet.sure_sn = time.perf_counter() - start
+        return ozet
+
+    @staticmethod
+    def _hata(ozet: ImportOzeti, satir_no: int, mesaj: str) -> None:
+        ozet.hatali += 1
+        if len(ozet.hatalar) < MAX_HATA_ORNEGI:
+            ozet.hatalar.append({"satir": satir_no, "hata": mesaj})
+
+    def _yaz(self, chunk: Dict[str, Dict], ozet: ImportOzeti, start: float) -> None:
+        mevcut = dict(self.db.execute(
+            select(Product.code, Product.id).where(Product.code.in_(list(chunk)))
+        ).all())
+        now = datetime.now(timezone.utc)
+        for urun in chunk.values():
+            urun["created_at"] = now
+
+        if self.dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if self.dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(Product)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Product.code],
+                set_={**{alan: stmt.excluded[alan] for alan in GUNCELLENEN_ALANLAR}, "updated_at": now},
+            )
+            self.db.execute(stmt, list(chunk.values()))
+        else:
+            yeni = [u for code, u in chunk.items() if code not in mevcut]
+            degisen = [
+                {"id": mevcut[code], "updated_at": now, **{alan: u[alan] for alan in GUNCELLENEN_ALANLAR}}
+                for code, u in chunk.items() if code in mevcut
+            ]
+            if yeni:
+                self.db.execute(insert(Product), yeni)
+            if degisen:
+                self.db.execute(update(Product), degisen)
+
+        ozet.guncellenen += len(mevcut)
+        ozet.eklenen += len(chunk) - len(mevcut)
+        ozet.chunk += 1
+        if ozet.chunk % self.commit_every == 0:
+            self.db.commit()
+            ozet.commit += 1
+        ozet.sure_sn = time.perf_counter() - start
+        if self.on_chunk is not None:
+            self.on_chunk(ozet)
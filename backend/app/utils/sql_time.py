@@ -0,0 +1,68 @@
+"""
+Dialect bağımsız zaman ifadeleri
+SQLite ve PostgreSQL için süre farkı ve zaman kovası (bucket) SQL ifadeleri.
+Aggregation sorgularının hesaplamayı veritabanında yapabilmesi için kullanılır.
+"""
+
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+BUCKET_UNITS = ("minute", "hour", "day", "week")
+
+
+def dialect_name(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def seconds_between(db: Session, end, start):
+    """end - start farkını saniye olarak veren SQL ifadesi."""
+    if dialect_name(db) == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return func.extract("epoch", end - start)
+
+
+def time_bucket(db: Session, column, unit: str):
+    """
+    Zaman damgasını kovanın başlangıcına yuvarlayan SQL ifadesi.
+    Haftalar pazartesi başlar.
+    """
+    if unit not in BUCKET_UNITS:
+        raise ValueError(f"Invalid bucket unit: {unit}. Allowed: {', '.join(BUCKET_UNITS)}")
+
+    if dialect_name(db) == "sqlite":
+        if unit == "minute":
+            return func.strftime("%Y-%m-%d %H:%M:00", column)
+        if unit == "hour":
+            return func.strftime("%Y-%m-%d %H:00:00", column)
+        if unit == "day":
+            return func.date(column)
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date_trunc(literal_column(f"'{unit}'"), column)
+
+
+def truncate_to(db: Session, column, unit: str):
+    """
+    Zaman damgasını kova başlangıcına yuvarlar; sonuç DateTime kolonuna
+    yazılabilir (INSERT ... SELECT). SQLite'ta SQLAlchemy'nin saklama
+    formatıyla aynı string üretilir, böylece aralık karşılaştırmaları doğru çalışır.
+    """
+    if unit not in ("minute", "hour", "day"):
+        raise ValueError(f"Invalid truncate unit: {unit}")
+
+    if dialect_name(db) == "sqlite":
+        if unit == "minute":
+            return func.strftime("%Y-%m-%d %H:%M:00.000000", column)
+        if unit == "hour":
+            return func.strftime("%Y-%m-%d %H:00:00.000000", column)
+        return func.strftime("%Y-%m-%d 00:00:00.000000", column)
+    return func.date_trunc(literal_column(f"'{unit}'"), column)
+
+
+def bucket_to_str(value: Any) -> Any:
+    """Kova değerini JSON için ISO string'e çevirir (SQLite zaten string döner)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
@@ -0,0 +1,142 @@
+"""
+Aşama event log'u (work_order_stage_events)
+start / pause / resume / done geçişleri append-only olarak yazılır.
+Net çalışma süresi (duraklatmalar hariç) bu log'dan hesaplanır.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import WorkOrderStage, WorkOrderStageEvent
+from app.utils.metrics_summary import as_utc
+
+RUNNING_EVENTS = ("start", "resume")
+STOPPING_EVENTS = ("pause", "done")
+
+
+def log_stage_event(
+    db: Session,
+    stage: WorkOrderStage,
+    event_type: str,
+    at: datetime,
+    user_id: Optional[int] = None,
+) -> WorkOrderStageEvent:
+    """Geçişi log'a ekler (commit çağırana aittir)."""
+    event = WorkOrderStageEvent(
+        work_order_stage_id=stage.id,
+        work_order_id=stage.work_order_id,
+        event_type=event_type,
+        created_at=at,
+        created_by=user_id,
+    )
+    db.add(event)
+    return event
+
+
+def run_and_paused_seconds(
+    events: Iterable[Tuple[str, datetime]],
+    now: Optional[datetime] = None,
+) -> Tuple[float, float]:
+    """
+    Zaman sıralı (event_type, created_at) listesinden net çalışma ve
+    duraklatma sürelerini hesaplar. Aşama hâlâ çalışıyor/duraklatılmışsa
+    açık aralık `now`'a kadar sayılır.
+    """
+    now = as_utc(now or datetime.now(timezone.utc))
+    run_seconds = 0.0
+    paused_seconds = 0.0
+    running_since = None
+    paused_since = None
+
+    for event_type, created_at in events:
+        at = as_utc(created_at)
+        if event_type in RUNNING_EVENTS:
+            if paused_since is not None:
+                paused_seconds += (at - paused_since).total_seconds()
+                paused_since = None
+            if running_since is None:
+                running_since = at
+        elif event_type in STOPPING_EVENTS:
+            if running_since is not None:
+                run_seconds += (at - running_since).total_seconds()
+                running_since = None
+            if event_type == "pause":
+                paused_since = at
+
+    if running_since is not None:
+        run_seconds += (now - running_since).total_seconds()
+    if paused_since is not None:
+        paused_seconds += (now - paused_since).total_seconds()
+
+    return run_seconds, paused_seconds
+
+
+def stage_run_times(db: Session, stage_id: int, now: Optional[datetime] = None) -> Optional[Tuple[float, float]]:
+    """
+    Tek aşamanın (net çalışma, duraklatma) saniyeleri.
+    Log'da kayıt yoksa veya geçmiş eksikse (eski veri) None döner.
+    """
+    rows = db.query(WorkOrderStageEvent.event_type, WorkOrderStageEvent.created_at).filter(
+        WorkOrderStageEvent.work_order_stage_id == stage_id
+    ).order_by(WorkOrderStageEvent.created_at, WorkOrderStageEvent.id).all()
+    if not rows or rows[0][0] != "start":
+        # Log yok ya da aşama log'dan önce başlamış (eksik geçmiş)
+        return None
+    return run_and_paused_seconds(rows, now)
+
+
+def work_order_run_times(
+    db: Session,
+    work_order_ids: List[int],
+    now: Optional[datetime] = None,
+) -> Dict[int, Tuple[float, float]]:
+    """
+    İş emirleri için aşama bazında hesaplanıp toplanmış (net çalışma,
+    duraklatma) saniyeleri. Tüm emirler tek sorguda okunur; log'u
+    olmayan veya eksik olan emirler sonuçta yer almaz. Log'dan önce
+    başlamış (hiç event'i olmayan) bir aşaması olan emir de eksik sayılır.
+    """
+    if not work_order_ids:
+        return {}
+    rows = db.query(
+        WorkOrderStageEvent.work_order_id,
+        WorkOrderStageEvent.work_order_stage_id,
+        WorkOrderStageEvent.event_type,
+        WorkOrderStageEvent.created_at,
+    ).filter(
+        WorkOrderStageEvent.work_order_id.in_(work_order_ids)
+    ).order_by(
+        WorkOrderStageEvent.work_order_id,
+        WorkOrderStageEvent.work_order_stage_id,
+        WorkOrderStageEvent.created_at,
+        WorkOrderStageEvent.id,
+    ).all()
+
+    events_by_stage = defaultdict(list)
+    for wo_id, stage_id, event_type, created_at in rows:
+        events_by_stage[(wo_id, stage_id)].append((event_type, created_at))
+
+    totals: Dict[int, Tuple[float, float]] = {}
+    incomplete = set()
+    # Başlamış ama hiç event'i olmayan aşama: log'dan önce çalışmış (eski veri)
+    started = db.query(WorkOrderStage.work_order_id, WorkOrderStage.id).filter(
+        WorkOrderStage.work_order_id.in_(work_order_ids),
+        WorkOrderStage.actual_start.isnot(None),
+    ).all()
+    for wo_id, stage_id in started:
+        if (wo_id, stage_id) not in events_by_stage:
+            incomplete.add(wo_id)
+    for (wo_id, _), events in events_by_stage.items():
+        if events[0][0] != "start":
+            incomplete.add(wo_id)
+            continue
+        run, paused = run_and_paused_seconds(events, now)
+        prev_run, prev_paused = totals.get(wo_id, (0.0, 0.0))
+        totals[wo_id] = (prev_run + run, prev_paused + paused)
+    # Geçmişi eksik aşaması olan emirler için net süre verilmez
+    for wo_id in incomplete:
+        totals.pop(wo_id, None)
+    return totals
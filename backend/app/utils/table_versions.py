@@ -0,0 +1,117 @@
+"""
+Tablo versiyon sayaçları
+- products, molds ve machines tablolarına yapılan her yazma (ORM ekleme /
+  güncelleme / soft delete / restore ve Core INSERT/UPDATE/DELETE) aynı
+  transaction içinde table_versions satırını bir artırır
+- Yazılan tablolar flush/DML sırasında sadece session'da toplanır; sayaçlar
+  commit'ten hemen önce tek seferde ve sıralı artırılır. Böylece paylaşılan
+  sayaç satırının kilidi transaction boyunca değil, sadece commit anında
+  tutulur (yazıcılar birbirini beklemez, kilit sırası deadlock üretmez)
+- Sayaç session event'leriyle artırılır; endpoint'lerin ayrıca bir şey
+  çağırması gerekmez (toplu CSV içe aktarma ve scriptler dahil)
+- Her tablo transaction başına en fazla bir kez artırılır
+- ETag'ler bu sayaçlardan üretilir (app.utils.etag); sayaç veritabanında
+  olduğu için tüm worker process'leri aynı değeri görür
+"""
+
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import TableVersion
+
+VERSIONED_TABLES = frozenset({"products", "molds", "machines"})
+
+_PENDING_KEY = "table_versions_pending"
+
+
+def bump_versions(connection, tables: Iterable[str]) -> None:
+    """Tabloların sayacını bir artırır (satır yoksa 1 ile oluşturur)."""
+    dialect = connection.dialect.name
+    # Sıralı: aynı tabloları artıran eşzamanlı transaction'lar kilitleri aynı sırayla alır
+    for name in sorted(tables):
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(TableVersion).values(table_name=name, version=1)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[TableVersion.table_name],
+                set_={"version": TableVersion.version + 1},
+            ))
+            continue
+        result = connection.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name == name)
+            .values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(TableVersion).values(table_name=name, version=1))
+
+
+def read_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """Sayaçları tek sorguda okur; hiç yazılmamış tablolar 0 döner."""
+    tables = list(tables)
+    rows = db.execute(
+        select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(tables))
+    ).all()
+    versions = dict.fromkeys(tables, 0)
+    versions.update({name: version for name, version in rows})
+    return versions
+
+
+async def read_versions_async(db, tables: Iterable[str]) -> Dict[str, int]:
+    """read_versions'ın AsyncSession karşılığı."""
+    tables = list(tables)
+    result = await db.execute(
+        select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(tables))
+    )
+    versions = dict.fromkeys(tables, 0)
+    versions.update({name: version for name, version in result.all()})
+    return versions
+
+
+def _mark_written(session: Session, tables: Set[str]) -> None:
+    session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_on_flush(session: Session, flush_context, instances) -> None:
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        tables.add(getattr(obj, "__tablename__", None))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(getattr(obj, "__tablename__", None))
+    tables &= VERSIONED_TABLES
+    if tables:
+        _mark_written(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_on_dml(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name in VERSIONED_TABLES:
+        _mark_written(orm_execute_state.session, {table.name})
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # SAVEPOINT release; sayaçlar dış commit'te artırılır
+    # commit'in kendi flush'ı bu event'ten sonra çalışır; bekleyen
+    # değişikliklerin tabloları da toplansın diye önce flush edilir
+    session.flush()
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        bump_versions(session.connection(), tables)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_pending(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
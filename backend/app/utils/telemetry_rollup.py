@@ -0,0 +1,257 @@
+"""
+Makine telemetrisi rollup ve retention işleri
+- Ham okumalar 1 dakikalık, 1 dakikalıklar 1 saatlik, 1 saatlikler 1 günlük
+  tablolara INSERT ... SELECT ile (veritabanında) toplanır
+- Her çözünürlük için telemetry_rollup_state'te bir watermark tutulur;
+  sadece kapanmış kovalar (now - gecikme payı) işlenir
+- Ham satırlar TELEMETRY_RAW_RETENTION_DAYS'ten eski ve günlük rollup'a
+  girmişse batch'ler halinde silinir
+- Gecikme payından daha geç gelen okumalar (eski timestamp ile) rollup'a
+  girmez; geriye dönük yükleme sonrası watermark'ı geri almak gerekir
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.config import (
+    TELEMETRY_PURGE_BATCH_SIZE,
+    TELEMETRY_RAW_RETENTION_DAYS,
+    TELEMETRY_ROLLUP_INTERVAL_SECONDS,
+    TELEMETRY_ROLLUP_LATENESS_SECONDS,
+)
+from app.logging_config import logger
+from app.models import (
+    MachineReading,
+    MachineReading1d,
+    MachineReading1h,
+    MachineReading1m,
+    TelemetryRollupState,
+)
+from app.utils.sql_time import dialect_name, truncate_to
+
+RESOLUTIONS = ("minute", "hour", "day")
+
+ROLLUP_TABLES = {
+    "minute": MachineReading1m,
+    "hour": MachineReading1h,
+    "day": MachineReading1d,
+}
+
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Bir transaction'da işlenecek en fazla zaman aralığı (ilk çalıştırmada
+# aylarca veriyi tek INSERT ile toplamamak için)
+CHUNK_SIZES = {
+    "minute": timedelta(hours=6),
+    "hour": timedelta(days=7),
+    "day": timedelta(days=366),
+}
+
+# Çoklu worker'da aynı anda tek rollup çalışsın (PostgreSQL)
+ADVISORY_LOCK_KEY = 72_100_001
+
+
+def floor_time(dt: datetime, unit: str) -> datetime:
+    if unit == "minute":
+        return dt.replace(second=0, microsecond=0)
+    if unit == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_watermarks(db: Session) -> Dict[str, Optional[datetime]]:
+    rows = db.query(TelemetryRollupState).all()
+    marks = {unit: None for unit in RESOLUTIONS}
+    marks.update({row.resolution: row.rolled_up_to for row in rows})
+    return marks
+
+
+def _source_select(db: Session, unit: str, start: datetime, end: datetime):
+    """Bir üst çözünürlüğün kaynağı için GROUP BY sorgusu."""
+    if unit == "minute":
+        src = MachineReading
+        bucket = truncate_to(db, src.timestamp, unit)
+        return select(
+            src.machine_id,
+            src.reading_type_id,
+            bucket,
+            func.count(src.value_num),
+            func.min(src.value_num),
+            func.max(src.value_num),
+            func.sum(src.value_num),
+        ).where(
+            src.timestamp >= start,
+            src.timestamp < end,
+            src.value_num.isnot(None),
+            src.machine_id.isnot(None),
+            src.reading_type_id.isnot(None),
+        ).group_by(src.machine_id, src.reading_type_id, bucket)
+
+    src = ROLLUP_TABLES["minute" if unit == "hour" else "hour"]
+    bucket = truncate_to(db, src.bucket_start, unit)
+    return select(
+        src.machine_id,
+        src.reading_type_id,
+        bucket,
+        func.sum(src.sample_count),
+        func.min(src.value_min),
+        func.max(src.value_max),
+        func.sum(src.value_sum),
+    ).where(
+        src.bucket_start >= start,
+        src.bucket_start < end,
+    ).group_by(src.machine_id, src.reading_type_id, bucket)
+
+
+def _first_source_time(db: Session, unit: str) -> Optional[datetime]:
+    if unit == "minute":
+        return db.query(func.min(MachineReading.timestamp)).scalar()
+    src = ROLLUP_TABLES["minute" if unit == "hour" else "hour"]
+    return db.query(func.min(src.bucket_start)).scalar()
+
+
+def _try_lock(db: Session) -> bool:
+    if dialect_name(db) != "postgresql":
+        return True
+    return bool(db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+    ).scalar())
+
+
+def rollup_resolution(db: Session, unit: str, now: Optional[datetime] = None) -> int:
+    """
+    Tek bir çözünürlüğü watermark'tan kapanmış son kovaya kadar ilerletir.
+    Her chunk kendi transaction'ında yazılır (sil + INSERT ... SELECT + watermark).
+
+    Returns:
+        Yazılan rollup satırı sayısı
+    """
+    now = now or datetime.utcnow()
+    table = ROLLUP_TABLES[unit]
+    marks = get_watermarks(db)
+
+    cutoff = floor_time(now - timedelta(seconds=TELEMETRY_ROLLUP_LATENESS_SECONDS), unit)
+    if unit != "minute":
+        source_mark = marks["minute" if unit == "hour" else "hour"]
+        if source_mark is None:
+            return 0
+        cutoff = min(cutoff, floor_time(source_mark, unit))
+
+    start = marks[unit]
+    if start is None:
+        first = _first_source_time(db, unit)
+        if first is None:
+            return 0
+        start = floor_time(first, unit)
+
+    written = 0
+    while start < cutoff:
+        chunk_end = min(cutoff, start + CHUNK_SIZES[unit])
+        if not _try_lock(db):
+            db.rollback()
+            return written  # Başka bir worker çalışıyor
+
+        db.execute(delete(table).where(table.bucket_start >= start, table.bucket_start < chunk_end))
+        result = db.execute(
+            insert(table).from_select(
+                ["machine_id", "reading_type_id", "bucket_start",
+                 "sample_count", "value_min", "value_max", "value_sum"],
+                _source_select(db, unit, start, chunk_end),
+            )
+        )
+        db.merge(TelemetryRollupState(resolution=unit, rolled_up_to=chunk_end, updated_at=now))
+        db.commit()
+        written += max(result.rowcount or 0, 0)
+        start = chunk_end
+    return written
+
+
+def run_rollups(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Tüm çözünürlükleri sırayla (dakika -> saat -> gün) ilerletir."""
+    now = now or datetime.utcnow()
+    return {unit: rollup_resolution(db, unit, now) for unit in RESOLUTIONS}
+
+
+def purge_raw_readings(
+    db: Session,
+    retention_days: int = TELEMETRY_RAW_RETENTION_DAYS,
+    batch_size: int = TELEMETRY_PURGE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Saklama süresini aşan ham okumaları batch'ler halinde siler.
+    Günlük rollup'a henüz girmemiş satırlara dokunulmaz.
+
+    Returns:
+        Silinen satır sayısı
+    """
+    if retention_days <= 0:
+        return 0
+    now = now or datetime.utcnow()
+    day_mark = get_watermarks(db)["day"]
+    if day_mark is None:
+        return 0
+    cutoff = min(now - timedelta(days=retention_days), day_mark)
+
+    deleted = 0
+    while True:
+        ids = [row.id for row in db.query(MachineReading.id).filter(
+            MachineReading.timestamp < cutoff
+        ).limit(batch_size).all()]
+        if not ids:
+            break
+        db.execute(
+            delete(MachineReading)
+            .where(MachineReading.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += len(ids)
+    return deleted
+
+
+class TelemetryRollupWorker:
+    """Rollup ve retention işlerini arka planda periyodik çalıştıran thread."""
+
+    def __init__(self, session_factory, interval_seconds: float = TELEMETRY_ROLLUP_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> None:
+        db = self.session_factory()
+        try:
+            written = run_rollups(db)
+            purged = purge_raw_readings(db)
+            if any(written.values()) or purged:
+                logger.info(f"Telemetry rollup: {written}, purged raw rows: {purged}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Telemetry rollup failed: {str(e)}", exc_info=True)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="telemetry-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -0,0 +1,32 @@
+"""
+Büyük/küçük harf duyarsız arama anahtarları
+- users.username_key ve products.name_key kolonları bu fonksiyonlarla
+  doldurulur; sorgular ilike yerine anahtar kolonda eşitlik kullanır ve
+  B-tree index'ten yararlanır
+- Normalizasyon Python'da yapılır: SQLite lower() sadece ASCII harfleri,
+  PostgreSQL lower() ise veritabanı locale'ine göre çevirir; Türkçe
+  karakterlerde iki veritabanı da aynı sonucu vermez
+"""
+
+from typing import Optional
+
+_TR_UPPER = str.maketrans({"İ": "i", "I": "ı"})
+
+
+def turkish_lower(text: str) -> str:
+    """Türkçe kurallarıyla küçük harf (str.lower 'I' -> 'i' yapar, 'İ' -> 'i̇' üretir)."""
+    return text.translate(_TR_UPPER).lower()
+
+
+def username_key(username: Optional[str]) -> Optional[str]:
+    """Kullanıcı adı anahtarı (kayıt sırasında uygulanan strip + lower ile aynı)."""
+    if username is None:
+        return None
+    return username.strip().lower()
+
+
+def product_name_key(name: Optional[str]) -> Optional[str]:
+    """Ürün adı anahtarı: Türkçe küçük harf, boşluklar tek boşluğa indirgenir."""
+    if name is None:
+        return None
+    return " ".join(turkish_lower(name).split())
@@ -0,0 +1,102 @@
+"""
+AI eğitim verisi değişiklik takibi
+- Ürünlerin created_at / updated_at zamanları değişiklik günlüğü olarak
+  kullanılır; her model versiyonu verinin okunduğu anı (veri filigranı)
+  metadata'sında saklar
+- degisen_urun_sayisi: filigrandan sonra eklenen/güncellenen/silinen ürün sayısı
+  (yeniden eğitim gerekli mi kararı)
+- EgitimVerisiCache: ürün başına eğitim satırlarını bellekte tutar; sonraki
+  eğitimlerde sadece son okumadan beri değişen satırlar veritabanından çekilir
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.ai_model import egitim_satirlari_sorgusu, malzeme_egitim_satiri, urun_egitim_satiri
+from app.models import Product
+
+# Zaman damgası commit'ten önce atandığı için okuma sırasında commit edilen
+# satırlar filigrandan biraz eski görünebilir; tekrar okuma bu payla yapılır
+FILIGRAN_PAYI = timedelta(seconds=60)
+
+
+def _degisti(filigran: datetime):
+    return or_(Product.updated_at > filigran, Product.created_at > filigran)
+
+
+def degisen_urun_sayisi(db: Session, filigran: Optional[datetime]) -> int:
+    """Filigrandan sonra değişen ürün sayısı (filigran yoksa tüm aktif ürünler)."""
+    query = db.query(func.count(Product.id))
+    if filigran is None:
+        return query.filter(Product.deleted_at.is_(None)).scalar() or 0
+    return query.filter(_degisti(filigran)).scalar() or 0
+
+
+class EgitimVerisiCache:
+    """
+    Ürün id -> (ürün modeli satırı, malzeme modeli satırı) önbelleği.
+
+    İlk çağrıda tüm aktif ürünler okunur; sonrakilerde sadece son okumadan
+    (eksi FILIGRAN_PAYI) beri değişen satırlar çekilip önbellek güncellenir.
+    Aktif ürün sayısı önbellekle tutmazsa (fiziksel silme, veritabanı değişimi)
+    tam okumaya dönülür.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._satirlar: Dict[int, Tuple[Optional[tuple], Optional[tuple]]] = {}
+        self.filigran: Optional[datetime] = None
+        self.son_okunan = 0  # Son güncellemede veritabanından okunan satır sayısı
+
+    def reset(self) -> None:
+        with self._lock:
+            self._satirlar = {}
+            self.filigran = None
+            self.son_okunan = 0
+
+    def _uygula(self, rows) -> None:
+        for r in rows:
+            if r.deleted_at is not None:
+                self._satirlar.pop(r.id, None)
+            else:
+                self._satirlar[r.id] = (urun_egitim_satiri(r), malzeme_egitim_satiri(r))
+
+    def guncelle(self, db: Session) -> Tuple[List[str], List[List[float]], List[Tuple]]:
+        """
+        Önbelleği veritabanıyla eşitler ve eğitim girdilerini döndürür.
+
+        Returns:
+            (urun_adlari, y, malzeme_satirlari) — egitim_verisi_hazirla /
+            malzeme_egitim_verisi_hazirla ile aynı içerik, id sırasında
+        """
+        with self._lock:
+            baslangic = datetime.now(timezone.utc)
+            query = egitim_satirlari_sorgusu(db)
+            if self.filigran is not None:
+                rows = query.filter(_degisti(self.filigran - FILIGRAN_PAYI)).all()
+                self._uygula(rows)
+                aktif = db.query(func.count(Product.id)).filter(Product.deleted_at.is_(None)).scalar()
+                if aktif != len(self._satirlar):
+                    self.filigran = None
+            if self.filigran is None:
+                self._satirlar = {}
+                rows = query.filter(Product.deleted_at.is_(None)).all()
+                self._uygula(rows)
+            self.filigran = baslangic
+            self.son_okunan = len(rows)
+
+            sirali = [self._satirlar[k] for k in sorted(self._satirlar)]
+            urun_satirlari = [u for u, _ in sirali if u is not None]
+            return (
+                [ad for ad, _ in urun_satirlari],
+                [hedef for _, hedef in urun_satirlari],
+                [m for _, m in sirali if m is not None],
+            )
+
+
+# Global önbellek (eğitimi kuyruğa alan process başına bir tane)
+egitim_verisi_cache = EgitimVerisiCache()
@@ -0,0 +1,279 @@
+"""
+AI eğitim iş kuyruğu
+- Eğitim istekleri training_jobs tablosuna kaydedilir ve hemen job id döner
+- Aynı anda en fazla bir pending iş olur; yeni istekler bekleyen işe
+  birleştirilir (coalesce). İş başlarken veri okunduğu için birleştirilen
+  isteklerin değişiklikleri de eğitime girer
+- RandomForest fit'i ayrı bir process'te (ProcessPoolExecutor) çalışır;
+  API process'inin event loop'u ve GIL'i bloklanmaz
+- Eğitilen model registry'ye yeni versiyon olarak yazıldıktan sonra global
+  ai_model'e atomik olarak yüklenir (hot-swap)
+- Eğitim verisi EgitimVerisiCache'ten alınır; sadece son eğitimden beri
+  değişen ürün satırları veritabanından okunur
+- RetrainScheduler ürün değişikliklerinden sonra eğitimi erteler (debounce):
+  değişiklikler durulduğunda, aktif modelin veri filigranından beri yeterli
+  sayıda ürün değiştiyse tek bir iş kuyruğa alınır
+"""
+
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.ai_model import MIN_EGITIM_URUN, ai_model, egit_ve_kaydet
+from app.config import (
+    AI_AUTO_RETRAIN_ENABLED,
+    AI_RETRAIN_DEBOUNCE_SECONDS,
+    AI_RETRAIN_MAX_WAIT_SECONDS,
+    AI_RETRAIN_MIN_CHANGES,
+    AI_TRAINING_STALE_SECONDS,
+    AI_TRAINING_WORKERS,
+)
+from app.db import SessionLocal
+from app.logging_config import logger
+from app.models import TrainingJob
+from app.utils.metrics_summary import as_utc
+from app.utils.training_data import degisen_urun_sayisi, egitim_verisi_cache
+
+JOB_TYPE_AI_TRAIN = "ai_train"
+
+
+def serialize_job(job: TrainingJob) -> dict:
+    return {
+        "job_id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "request_count": job.request_count,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+    }
+
+
+class TrainingJobQueue:
+    """
+    Eğitim işlerini tek bir dispatcher thread'i üzerinden sırayla çalıştırır;
+    asıl eğitim process pool'da yapılır.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_workers: int = AI_TRAINING_WORKERS):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[ThreadPoolExecutor] = None
+        self._queued: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # fork yerine spawn: API process'indeki thread'ler/bağlantılar kopyalanmaz
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._process_pool
+
+    def _dispatch(self) -> ThreadPoolExecutor:
+        if self._dispatcher is None:
+            self._dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-train")
+        return self._dispatcher
+
+    def submit(self, db: Session, requested_by: Optional[int] = None) -> Tuple[TrainingJob, bool]:
+        """
+        Eğitim isteğini kuyruğa alır.
+
+        Returns:
+            (iş kaydı, mevcut bir işe birleştirildi mi)
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            pending = db.query(TrainingJob).filter(
+                TrainingJob.job_type == JOB_TYPE_AI_TRAIN,
+                TrainingJob.status == "pending"
+            ).order_by(TrainingJob.id).first()
+
+            if pending is not None:
+                stale = as_utc(pending.created_at) < now - timedelta(seconds=AI_TRAINING_STALE_SECONDS)
+                if pending.id in self._queued or not stale:
+                    pending.request_count = (pending.request_count or 1) + 1
+                    db.commit()
+                    return pending, True
+                # Kuyruğa alan process artık yok (yeniden başlatma vb.)
+                pending.status = "failed"
+                pending.error = "İş sahipsiz kaldı (sunucu yeniden başlatılmış olabilir)."
+                pending.finished_at = now
+                db.commit()
+
+            job = TrainingJob(
+                job_type=JOB_TYPE_AI_TRAIN,
+                status="pending",
+                requested_by=requested_by,
+                request_count=1,
+                created_at=now,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            self._queued.add(job.id)
+
+        self._dispatch().submit(self._run, job.id)
+        return job, False
+
+    def _run(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            with self._lock:
+                self._queued.discard(job_id)
+                job = db.get(TrainingJob, job_id)
+                if job is None or job.status != "pending":
+                    return
+                job.status = "running"
+                job.started_at = datetime.now(timezone.utc)
+                db.commit()
+
+            # Veri iş başladığında okunur (birleştirilen isteklerin değişiklikleri dahil);
+            # önbellekteki satırlar yeniden kullanılır, sadece değişenler okunur
+            urun_adlari, y, malzeme_satirlari = egitim_verisi_cache.guncelle(db)
+            if len(urun_adlari) < MIN_EGITIM_URUN:
+                self._finish(db, job, error=(
+                    f"Yeterli veri yok. En az {MIN_EGITIM_URUN} ürün gerekli, mevcut: {len(urun_adlari)}"
+                ))
+                return
+
+            result = self._pool().submit(
+                egit_ve_kaydet, urun_adlari, y, ai_model.model_dir, malzeme_satirlari,
+                egitim_verisi_cache.filigran.isoformat()
+            ).result()
+            result["okunan_satir"] = egitim_verisi_cache.son_okunan
+            if not ai_model.model_yukle(result["model_versiyonu"]):
+                raise RuntimeError("Eğitilen model yüklenemedi.")
+            self._finish(db, job, result=result)
+            logger.info(f"AI training job {job_id} done: {result.get('urun_sayisi')} ürün")
+        except Exception as e:
+            logger.error(f"AI training job {job_id} failed: {str(e)}", exc_info=True)
+            db.rollback()
+            job = db.get(TrainingJob, job_id)
+            if job is not None:
+                self._finish(db, job, error=str(e))
+        finally:
+            db.close()
+
+    @staticmethod
+    def _finish(db: Session, job: TrainingJob, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        job.status = "failed" if error else "done"
+        job.result = json.dumps(result) if result else None
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> None:
+        """Kuyruktaki tüm işlerin bitmesini bekler (testler ve scriptler için)."""
+        self._dispatch().submit(lambda: None).result(timeout=timeout)
+
+    def shutdown(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.shutdown(wait=False, cancel_futures=True)
+            self._dispatcher = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+
+class RetrainScheduler:
+    """
+    Ürün değişikliği bildirimlerini biriktirip eğitimi erteler (debounce).
+
+    Her notify() zamanlayıcıyı debounce_seconds kadar ileri atar; sürekli
+    değişiklikte eğitim en fazla max_wait_seconds gecikir. Zamanlayıcı
+    dolduğunda aktif modelin veri filigranından beri değişen ürün sayısı
+    min_changes'e ulaştıysa (force ile istendiyse en az 1 ise) tek bir iş
+    kuyruğa alınır.
+    """
+
+    def __init__(
+        self,
+        queue: TrainingJobQueue,
+        debounce_seconds: float = AI_RETRAIN_DEBOUNCE_SECONDS,
+        min_changes: int = AI_RETRAIN_MIN_CHANGES,
+        max_wait_seconds: float = AI_RETRAIN_MAX_WAIT_SECONDS,
+        enabled: bool = AI_AUTO_RETRAIN_ENABLED,
+    ):
+        self.queue = queue
+        self.debounce_seconds = debounce_seconds
+        self.min_changes = min_changes
+        self.max_wait_seconds = max_wait_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._first_notify: Optional[float] = None
+        self._force = False
+
+    @property
+    def pending(self) -> bool:
+        return self._timer is not None
+
+    def notify(self, force: bool = False) -> None:
+        """
+        Ürün değişikliğini bildirir. force: eşik beklenmeden eğitilsin
+        (upsert auto_train). Otomatik eğitim kapalıysa sadece force dikkate alınır.
+        """
+        if not (self.enabled or force):
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._force = self._force or force
+            if self._first_notify is None:
+                self._first_notify = now
+            if self._timer is not None:
+                self._timer.cancel()
+            delay = min(self.debounce_seconds, max(0.0, self._first_notify + self.max_wait_seconds - now))
+            self._timer = threading.Timer(delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _take(self) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            force = self._force
+            self._timer, self._first_notify, self._force = None, None, False
+            return force
+
+    def _fire(self, force: bool = False) -> Optional[int]:
+        force = self._take() or force
+        db = self.queue.session_factory()
+        try:
+            changed = degisen_urun_sayisi(db, ai_model.veri_filigrani())
+            if changed == 0 or (changed < self.min_changes and not force):
+                logger.info(f"AI retrain skipped: {changed} changed product(s), threshold {self.min_changes}")
+                return None
+            job, _ = self.queue.submit(db)
+            logger.info(f"AI retrain queued as job {job.id}: {changed} changed product(s)")
+            return job.id
+        except Exception as e:
+            logger.error(f"AI retrain check failed: {str(e)}", exc_info=True)
+            return None
+        finally:
+            db.close()
+
+    def flush(self, force: bool = False) -> Optional[int]:
+        """
+        Bekleyen zamanlayıcıyı beklemeden kontrolü hemen yapar (toplu içe
+        aktarma sonu, testler). Kuyruğa alınan işin id'sini döndürür.
+        """
+        return self._fire(force)
+
+    def cancel(self) -> None:
+        self._take()
+
+
+# Global kuyruk ve zamanlayıcı (process başına bir tane)
+training_queue = TrainingJobQueue()
+retrain_scheduler = RetrainScheduler(training_queue)
@@ -0,0 +1,90 @@
+"""
+Kullanıcı kimlik cache'i (verify_token için)
+Her istekte users tablosuna gitmemek için token subject'ine göre
+kullanıcı kimliğini bellekte tutan sınırlı TTL/LRU cache.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from app.utils import text_keys
+
+CacheKey = Tuple[str, Optional[int]]
+
+
+class UserCache:
+    """
+    Thread-safe, boyutu sınırlı TTL + LRU cache.
+
+    Anahtar: (küçük harfli username, token'daki user_id)
+    Değer: {"username": ..., "user_id": ...}
+
+    maxsize=0 verilirse cache devre dışıdır (her istek DB'ye gider).
+    """
+
+    def __init__(self, maxsize: int = USER_CACHE_MAX_SIZE, ttl_seconds: float = USER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[CacheKey, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(username: str, user_id: Optional[int] = None) -> CacheKey:
+        return (text_keys.username_key(username), user_id)
+
+    def get(self, key: CacheKey) -> Optional[Dict]:
+        """Geçerli (süresi dolmamış) kaydı döndürür, yoksa None."""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: CacheKey, value: Dict) -> None:
+        """Kaydı ekler; kapasite aşılırsa en eski kullanılan kaydı atar."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate_user(self, user_id: Optional[int] = None, username: Optional[str] = None) -> int:
+        """
+        Bir kullanıcıya ait tüm kayıtları siler (rol değişimi, silme vb.).
+
+        Returns:
+            int: Silinen kayıt sayısı
+        """
+        username_key = text_keys.username_key(username) if username else None
+        with self._lock:
+            stale = [
+                key for key, (_, value) in self._data.items()
+                if (user_id is not None and value.get("user_id") == user_id)
+                or (username_key is not None and key[0] == username_key)
+            ]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Global cache instance (process başına bir tane)
+user_cache = UserCache()
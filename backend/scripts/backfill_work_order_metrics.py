@@ -0,0 +1,81 @@
+"""
+İş Emri Metrik Özeti Backfill Scripti
+work_order_metrics tablosunu mevcut work_order_stages verilerinden
+yeniden oluşturur. Migration sonrası bir kez çalıştırılmalıdır.
+
+Kullanım:
+    python scripts/backfill_work_order_metrics.py [--batch-size 500] [--only-missing]
+"""
+
+import sys
+import os
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+from app.db import SessionLocal
+from app.models import WorkOrder, WorkOrderStage, WorkOrderMetrics
+from app.utils.metrics_summary import summary_from_stages
+
+
+def backfill(batch_size: int = 500, only_missing: bool = False) -> int:
+    """
+    İş emirlerini id sırasıyla batch'ler halinde işler; her batch'in
+    aşamaları tek sorguda çekilir.
+
+    Returns:
+        int: Yazılan özet sayısı
+    """
+    db: Session = SessionLocal()
+    yazilan = 0
+    last_id = 0
+
+    try:
+        while True:
+            query = db.query(WorkOrder.id).filter(WorkOrder.id > last_id)
+            if only_missing:
+                query = query.outerjoin(
+                    WorkOrderMetrics, WorkOrderMetrics.work_order_id == WorkOrder.id
+                ).filter(WorkOrderMetrics.work_order_id.is_(None))
+            wo_ids = [row.id for row in query.order_by(WorkOrder.id).limit(batch_size).all()]
+            if not wo_ids:
+                break
+
+            stages_by_wo = defaultdict(list)
+            for stage in db.query(WorkOrderStage).filter(WorkOrderStage.work_order_id.in_(wo_ids)).all():
+                stages_by_wo[stage.work_order_id].append(stage)
+
+            now = datetime.now(timezone.utc)
+            for wo_id in wo_ids:
+                summary = summary_from_stages(wo_id, stages_by_wo[wo_id])
+                summary.updated_at = now
+                db.merge(summary)
+
+            db.commit()
+            db.expunge_all()
+            yazilan += len(wo_ids)
+            last_id = wo_ids[-1]
+            print(f"🔄 {yazilan} iş emri işlendi (son id: {last_id})")
+    except Exception as e:
+        print(f"❌ Backfill hatası: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return yazilan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="work_order_metrics backfill")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--only-missing", action="store_true", help="Sadece özeti olmayan iş emirlerini işle")
+    args = parser.parse_args()
+
+    print("🚀 Metrik özeti backfill başlatılıyor...")
+    toplam = backfill(batch_size=args.batch_size, only_missing=args.only_missing)
+    print(f"\n✅ Tamamlandı. {toplam} iş emri özeti yazıldı.")
@@ -0,0 +1,70 @@
+"""
+AI Toplu Tahmin Benchmark Scripti
+Ürün adı modelinde N ürünü tek tek tahmin etmek (N x tahmin_yap) ile
+tek bir toplu çağrıyı (toplu_tahmin_yap, tek predict) karşılaştırır.
+
+Model geçici bir klasörde sentetik ürünlerle eğitilir; gerçek models/
+klasörüne dokunulmaz.
+
+Kullanım:
+    python scripts/bench_ai_batch.py --products 500 --sizes 10 50 200 --iterations 20
+"""
+
+import sys
+import os
+import argparse
+import random
+import shutil
+import tempfile
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_common import measure
+
+
+def build_model(model_dir: str, products: int):
+    from app.ai_model import UretimAIModel, modeli_egit, modeli_kaydet
+
+    rng = random.Random(42)
+    urun_adlari = [f"Bench Ürün {i:05d}" for i in range(products)]
+    y = [[rng.uniform(180, 280), rng.uniform(20, 90), rng.uniform(10, 60)] for _ in urun_adlari]
+    model, label_encoder, _ = modeli_egit(urun_adlari, y)
+    modeli_kaydet(model, label_encoder, model_dir, {"urun_sayisi": products})
+
+    ai = UretimAIModel(model_dir)
+    ai.model_yukle()
+    return ai, urun_adlari
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI single vs batch prediction benchmark")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix="bench_ai_batch_")
+    try:
+        print(f"🚀 Model eğitiliyor ({args.products} ürün)...")
+        ai, urun_adlari = build_model(model_dir, args.products)
+        rng = random.Random(7)
+
+        for n in args.sizes:
+            batch = [rng.choice(urun_adlari) for _ in range(n)]
+            tekli = measure(lambda: [ai.tahmin_yap(u) for u in batch], args.iterations)
+            toplu = measure(lambda: ai.toplu_tahmin_yap(batch), args.iterations)
+
+            print(f"\n📊 N={n}")
+            print(f"   {n} x tahmin_yap     p50: {tekli['p50_ms']} ms  p95: {tekli['p95_ms']} ms")
+            print(f"   1 x toplu_tahmin_yap p50: {toplu['p50_ms']} ms  p95: {toplu['p95_ms']} ms")
+            if toplu["p50_ms"]:
+                print(f"   ⚡ Hızlanma (p50): {tekli['p50_ms'] / toplu['p50_ms']:.1f}x")
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+    print("\n✅ Tamamlandı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark yardımcıları
+Benchmark scriptleri için ortak kurulum: in-memory SQLite veritabanı,
+get_db override edilmiş TestClient ve token alma.
+"""
+
+import sys
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+def make_session_factory(url: str = "sqlite:///:memory:"):
+    """
+    Tüm tabloları oluşturulmuş bir engine + sessionmaker döndürür.
+    Varsayılan in-memory SQLite; PostgreSQL URL'i de verilebilir.
+    """
+    from app.db import Base
+    import app.models  # noqa: F401  (modelleri metadata'ya kaydet)
+
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(url, pool_size=10, max_overflow=20)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@contextmanager
+def bench_client(session_factory):
+    """get_db'yi verilen session factory'ye yönlendiren TestClient."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.db import get_db
+
+    # Request loglaması ölçümü bozmasın
+    logging.getLogger().setLevel(logging.WARNING)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+def create_user_token(client, session_factory, username: str = "bench", role: str = "admin") -> str:
+    """Kullanıcı oluşturur ve login olup access token döndürür."""
+    from app.models import User
+    from app.routers.auth import hash_password
+
+    db = session_factory()
+    try:
+        if not db.query(User).filter(User.username == username).first():
+            db.add(User(username=username, password_hash=hash_password("bench123"), role=role))
+            db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/auth/login", data={"username": username, "password": "bench123"})
+    return response.json()["access_token"]
+
+
+def measure(fn: Callable[[], object], iterations: int) -> Dict:
+    """fn'i iterations kez çalıştırır; toplam süre, ops/sn ve gecikme yüzdeliklerini döndürür."""
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    return summarize(latencies, total)
+
+
+def summarize(latencies: List[float], total: float) -> Dict:
+    latencies = sorted(latencies)
+    n = len(latencies)
+
+    def pct(p: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(n - 1, int(round(p * (n - 1))))] * 1000
+
+    return {
+        "iterations": n,
+        "total_sec": round(total, 4),
+        "ops_per_sec": round(n / total, 1) if total > 0 else None,
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+    }
@@ -0,0 +1,77 @@
+"""
+Ürün Adı Trigram İndeksi Benchmark Scripti
+Sentetik ürün adlarıyla NameIndex'i kurar ve benzer ürün aramasının
+gecikmesini ölçer. İki senaryo vardır:
+- gercekci: geniş kelime dağarcığı (binlerce farklı kelime)
+- zor: az sayıda tekrar eden kelime (trigram posting'leri çok uzun)
+
+Veritabanına dokunulmaz; indeks doğrudan bellekte kurulur.
+
+Kullanım:
+    python scripts/bench_name_index.py --names 100000 --iterations 50
+"""
+
+import sys
+import os
+import argparse
+import random
+import time
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_common import measure
+
+HARFLER = "abcçdefgğhıijklmnoöprsştuüvyz"
+RENKLER = "beyaz siyah gri kırmızı mavi yeşil sarı krem antrasit".split()
+PARCALAR = (
+    "elektrik priz kapak kutu anahtar duy fiş kablo şapka ışık çerçeve kasa "
+    "tutamak gövde vida somun pul conta yay klips menteşe kulp tapa rozet"
+).split()
+
+
+def gercekci_adlar(rng: random.Random, n: int):
+    kelimeler = ["".join(rng.choice(HARFLER) for _ in range(rng.randint(4, 9))) for _ in range(3000)]
+    return [f"{rng.choice(kelimeler).title()} {rng.choice(kelimeler)} {rng.choice(RENKLER)} {rng.randint(1, 500)}" for _ in range(n)]
+
+
+def zor_adlar(rng: random.Random, n: int):
+    return [
+        f"{rng.choice(PARCALAR).title()} {rng.choice(PARCALAR)} {rng.choice(RENKLER)} "
+        f"{rng.randint(1, 9999)}mm Tip-{rng.randint(1, 500)}"
+        for _ in range(n)
+    ]
+
+
+def run(title: str, adlar, sorgular, iterations: int):
+    from app.utils.name_index import NameIndex
+
+    index = NameIndex(refresh_seconds=0)
+    start = time.perf_counter()
+    index.build(enumerate(adlar))
+    print(f"\n📊 {title}: {len(adlar)} ad, kurulum {time.perf_counter() - start:.2f} s")
+
+    for sorgu in sorgular:
+        stats = measure(lambda: index.search(sorgu), iterations)
+        ilk = index.search(sorgu, limit=1)
+        print(f"   {sorgu!r:32} p50: {stats['p50_ms']} ms  p95: {stats['p95_ms']} ms  -> {ilk}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product name trigram index benchmark")
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    adlar = gercekci_adlar(rng, args.names)
+    run("gercekci", adlar, [adlar[5][:-2] + "x", adlar[99].upper(), "Elektrik Kutusu", "Tamamen alakasız şey"], args.iterations)
+
+    adlar = zor_adlar(rng, args.names)
+    run("zor", adlar, ["Elektrik Kutusu", "isik sapka", "Priz Beyaz 1234mm", "ŞAPKA KIRMIZI"], args.iterations)
+
+    print("\n✅ Tamamlandı.")
+
+
+if __name__ == "__main__":
+    main()
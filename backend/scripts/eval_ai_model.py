@@ -0,0 +1,443 @@
+"""
+AI Model Değerlendirme ve Benchmark Scripti
+app/ai_model.py ve app/routers/ai.py için makine tarafından okunabilir
+(JSON) bir rapor üretir:
+
+- k-katlı çapraz doğrulama: malzeme modeli için hedef başına MAE ve R²
+  (katlar arası ortalama / standart sapma)
+- Ürün adı modeli uyum kontrolü: model ad -> değer tablosu gibi çalışır
+  (bilinmeyen ad tahmin edilmez, ad indeksine düşülür); eğitim satırları
+  üzerinde MAE/R² raporlanır, gerileme kontrolüne katılmaz
+- Eğitim süresi: n_estimators x n_jobs ızgarası (her iki model)
+- Çıkarım gecikmesi: tahmin_yap, toplu_tahmin_yap (farklı batch boyları),
+  malzeme_tahmin_yap — tahmin cache'i kapalıyken; model yükleme süresi
+- API gecikmesi: /api/ai/urun-tahmin/toplu ve /api/ai/tahmin (TestClient)
+- Artefakt boyutları: registry versiyon klasöründeki dosyalar
+
+Veri setleri: uretim_verisi.csv ve bu dosyadan türetilen, ölçeği
+büyütülmüş sentetik veri setleri (--synthetic 1000 10000).
+--baseline ile önceki bir rapora göre gerileme kontrolü yapılır; gerileme
+varsa script 1 ile çıkar (CI'da kullanılabilir).
+
+Kullanım:
+    python scripts/eval_ai_model.py --output reports/ai_eval.json
+    python scripts/eval_ai_model.py --synthetic 1000 10000 --folds 5 --n-estimators 50 100 200 --n-jobs 1 -1
+    python scripts/eval_ai_model.py --baseline reports/ai_eval.json --output /tmp/yeni.json --tolerance 0.2
+"""
+
+import sys
+import os
+import argparse
+import csv
+import json
+import logging
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.preprocessing import LabelEncoder
+
+from scripts.bench_common import bench_client, make_session_factory, measure
+from app.utils.product_import import temizle_int, temizle_sayi
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(BACKEND_DIR, "uretim_verisi.csv")
+
+# Gecikme karşılaştırmasında bu farkın altı gürültü sayılır
+LATENCY_NOISE_MS = 0.5
+
+
+# ==================== Veri setleri ====================
+
+def csv_satirlari(path: str) -> List[SimpleNamespace]:
+    """uretim_verisi.csv satırlarını ürün kolonlarıyla aynı adlı alanlara çevirir."""
+    satirlar = []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for i, row in enumerate(csv.DictReader(f), start=1):
+            urun_adi = (row.get("Ürün Adı") or "").strip()
+            if not urun_adi:
+                continue
+            agirlik = temizle_sayi(row.get("Parça Ağırlığı (g)", ""))
+            satirlar.append(SimpleNamespace(
+                id=i,
+                name=urun_adi,
+                material=(row.get("Malzeme") or "").strip(),
+                part_weight_g=int(agirlik) if agirlik else None,
+                cavity_count=temizle_int(row.get("Göz Adedi", "")),
+                hourly_production=temizle_int(row.get("Saatlik Üretim (adet)", "")),
+                injection_temp_c=temizle_int(row.get("Enjeksiyon Sıcaklığı", "")),
+                mold_temp_c=temizle_int(row.get("Kalıp Sıcaklığı ", "")),
+                cycle_time_sec=temizle_int(row.get("Çevrim Süresi ", "")),
+                deleted_at=None,
+            ))
+    return satirlar
+
+
+def sentetik_satirlar(taban: List[SimpleNamespace], n: int, seed: int = 42) -> List[SimpleNamespace]:
+    """
+    Gerçek satırlardan türetilmiş n satır: her satır rastgele bir gerçek ürünün
+    varyantıdır (ağırlık log-normal ölçeklenir, çevrim süresi ağırlıkla artar,
+    sıcaklıklara gürültü eklenir). Adlar benzersizdir.
+    """
+    rng = random.Random(seed)
+    adaylar = [r for r in taban if r.injection_temp_c and r.mold_temp_c and r.cycle_time_sec]
+    satirlar = []
+    for i in range(n):
+        r = rng.choice(adaylar)
+        oran = rng.lognormvariate(0, 0.35)
+        agirlik = max(1, round((r.part_weight_g or 10) * oran))
+        cevrim = max(5, round(r.cycle_time_sec * oran ** 0.3 + rng.gauss(0, 1.5)))
+        goz = r.cavity_count or 1
+        satirlar.append(SimpleNamespace(
+            id=i + 1,
+            name=f"{r.name} V{i:06d}",
+            material=r.material,
+            part_weight_g=agirlik,
+            cavity_count=goz,
+            hourly_production=round(3600 / cevrim * goz),
+            injection_temp_c=round(r.injection_temp_c + rng.gauss(0, 4)),
+            mold_temp_c=round(r.mold_temp_c + rng.gauss(0, 3)),
+            cycle_time_sec=cevrim,
+            deleted_at=None,
+        ))
+    return satirlar
+
+
+def egitim_girdileri(satirlar):
+    from app.ai_model import malzeme_egitim_satiri, urun_egitim_satiri
+
+    urun = [u for u in (urun_egitim_satiri(r) for r in satirlar) if u is not None]
+    malzeme = [m for m in (malzeme_egitim_satiri(r) for r in satirlar) if m is not None]
+    return [ad for ad, _ in urun], [hedef for _, hedef in urun], malzeme
+
+
+# ==================== Çapraz doğrulama ====================
+
+def _metrik_ozeti(kat_sonuclari: List[Dict]) -> Dict:
+    from app.ai_model import TARGETS
+
+    ozet = {}
+    for ad in ["mae_" + t for t in TARGETS] + ["r2"]:
+        degerler = [k[ad] for k in kat_sonuclari]
+        ozet[ad] = {
+            "mean": round(statistics.fmean(degerler), 4),
+            "std": round(statistics.pstdev(degerler), 4),
+        }
+    return ozet
+
+
+def _kat_metrikleri(y_true: np.ndarray, y_pred: np.ndarray) -> Dict:
+    from app.ai_model import TARGETS
+
+    sonuc = {
+        "mae_" + t: float(mean_absolute_error(y_true[:, i], y_pred[:, i]))
+        for i, t in enumerate(TARGETS)
+    }
+    sonuc["r2"] = float(r2_score(y_true, y_pred))
+    return sonuc
+
+
+def _kfold(n: int, folds: int) -> Optional[KFold]:
+    folds = min(folds, n)
+    return KFold(n_splits=folds, shuffle=True, random_state=42) if folds >= 2 else None
+
+
+def urun_modeli_uyumu(urun_adlari: List[str], y: List[List[float]]) -> Optional[Dict]:
+    """
+    Ürün adı modeli uyum (lookup) kontrolü: encoder ve model modeli_egit'teki
+    gibi tüm satırlarla fit edilir ve aynı satırlarda skorlanır.
+
+    Çapraz doğrulama yapılmaz: model görmediği adı tahmin etmez ve veri
+    setlerinde adlar benzersiz olduğundan test katındaki adlar eğitimde hiç
+    bulunmaz. Sonuç genelleme hatası değildir; gerileme kontrolüne katılmaz.
+    """
+    from app.ai_model import MODEL_PARAMS, orman_tahmini
+
+    if not urun_adlari:
+        return None
+    X = LabelEncoder().fit_transform(urun_adlari).reshape(-1, 1)
+    y = np.array(y, dtype=float)
+    model = RandomForestRegressor(**MODEL_PARAMS, n_jobs=-1).fit(X, y)
+    metrikler = _kat_metrikleri(y, orman_tahmini(model, X))
+    return {"satir": len(urun_adlari), **{ad: round(deger, 4) for ad, deger in metrikler.items()}}
+
+
+def malzeme_modeli_cv(satirlar: List[tuple], folds: int) -> Optional[Dict]:
+    """Malzeme modeli: ortalamalar ve one-hot sütunları sadece eğitim katından hesaplanır."""
+    from app.ai_model import MODEL_PARAMS, malzeme_ortalamalari, malzeme_ozellik_matrisi, orman_tahmini
+
+    kfold = _kfold(len(satirlar), folds)
+    if kfold is None:
+        return None
+    katlar = []
+    for train, test in kfold.split(satirlar):
+        egitim = [satirlar[i] for i in train]
+        ortalamalar, genel = malzeme_ortalamalari(egitim)
+        malzemeler = sorted(ortalamalar)
+        X_train, y_train = malzeme_ozellik_matrisi(egitim, malzemeler, ortalamalar, genel)
+        X_test, y_test = malzeme_ozellik_matrisi([satirlar[i] for i in test], malzemeler, ortalamalar, genel)
+        model = RandomForestRegressor(**MODEL_PARAMS, n_jobs=-1).fit(X_train, y_train)
+        katlar.append(_kat_metrikleri(y_test, orman_tahmini(model, X_test)))
+    return {"folds": kfold.n_splits, **_metrik_ozeti(katlar)}
+
+
+# ==================== Eğitim süresi ====================
+
+def egitim_suresi_izgarasi(urun_adlari, y, malzeme_satirlari, n_estimators: List[int], n_jobs: List[int], repeat: int):
+    from app.ai_model import MODEL_PARAMS, malzeme_ortalamalari, malzeme_ozellik_matrisi
+
+    X_urun = LabelEncoder().fit_transform(urun_adlari).reshape(-1, 1)
+    y_urun = np.array(y, dtype=float)
+    ortalamalar, genel = malzeme_ortalamalari(malzeme_satirlari)
+    X_malzeme, y_malzeme = malzeme_ozellik_matrisi(malzeme_satirlari, sorted(ortalamalar), ortalamalar, genel)
+
+    def sure(X, y_, params) -> float:
+        sureler = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            RandomForestRegressor(**params).fit(X, y_)
+            sureler.append(time.perf_counter() - t0)
+        return round(statistics.median(sureler), 4)
+
+    sonuc = []
+    for n in n_estimators:
+        for jobs in n_jobs:
+            params = {**MODEL_PARAMS, "n_estimators": n, "n_jobs": jobs}
+            sonuc.append({
+                "n_estimators": n,
+                "n_jobs": jobs,
+                "urun_modeli_sec": sure(X_urun, y_urun, params),
+                "malzeme_modeli_sec": sure(X_malzeme, y_malzeme, params) if malzeme_satirlari else None,
+            })
+    return sonuc
+
+
+# ==================== Çıkarım, artefakt, API ====================
+
+def artefakt_boyutlari(registry, versiyon: str) -> Dict:
+    klasor = registry.version_dir(versiyon)
+    dosyalar = {ad: os.path.getsize(os.path.join(klasor, ad)) for ad in sorted(os.listdir(klasor))}
+    return {"dosyalar": dosyalar, "toplam_bytes": sum(dosyalar.values())}
+
+
+def cikarim_gecikmesi(ai, urun_adlari, malzeme_satirlari, batch_sizes: List[int], iterations: int) -> Dict:
+    rng = random.Random(7)
+    sonuc = {
+        "tahmin_yap": measure(lambda: ai.tahmin_yap(rng.choice(urun_adlari)), iterations),
+        "toplu_tahmin_yap": {},
+    }
+    for n in batch_sizes:
+        batch = [rng.choice(urun_adlari) for _ in range(n)]
+        olcum = measure(lambda: ai.toplu_tahmin_yap(batch), iterations)
+        olcum["per_item_ms"] = round(olcum["p50_ms"] / n, 4)
+        sonuc["toplu_tahmin_yap"][str(n)] = olcum
+    if malzeme_satirlari:
+        sonuc["malzeme_tahmin_yap"] = measure(
+            lambda: ai.malzeme_tahmin_yap(*rng.choice(malzeme_satirlari)[:4]), iterations
+        )
+    return sonuc
+
+
+def api_gecikmesi(model_dir: str, urun_adlari, malzeme_satirlari, batch_size: int, iterations: int) -> Dict:
+    from app.ai_model import ai_model
+
+    rng = random.Random(11)
+    eski = ai_model.model_dir, ai_model._durum
+    _, session_factory = make_session_factory()
+    try:
+        ai_model.model_dir = model_dir
+        ai_model.model_yukle()
+        with bench_client(session_factory) as client:
+            batch = [rng.choice(urun_adlari) for _ in range(batch_size)]
+            sonuc = {
+                f"urun_tahmin_toplu_{batch_size}": measure(
+                    lambda: client.post("/api/ai/urun-tahmin/toplu", json={"urun_adlari": batch}), iterations
+                )
+            }
+            if malzeme_satirlari:
+                def malzeme_istegi():
+                    r = rng.choice(malzeme_satirlari)
+                    client.post("/api/ai/tahmin", json={
+                        "malzeme": r[0], "parca_agirligi_g": r[1] or 10, "goz_adedi": r[2] or 1,
+                    })
+                sonuc["ai_tahmin"] = measure(malzeme_istegi, iterations)
+            return sonuc
+    finally:
+        ai_model.model_dir, ai_model._durum = eski
+
+
+def degerlendir(ad: str, satirlar, args) -> Dict:
+    from app.ai_model import UretimAIModel, _egit_ve_yayinla
+    from app.utils.model_registry import ModelRegistry
+
+    urun_adlari, y, malzeme_satirlari = egitim_girdileri(satirlar)
+    print(f"\n📊 {ad}: {len(urun_adlari)} ürün satırı, {len(malzeme_satirlari)} malzeme satırı")
+    rapor = {"dataset": ad, "urun_satiri": len(urun_adlari), "malzeme_satiri": len(malzeme_satirlari)}
+
+    print("   🔁 Çapraz doğrulama...")
+    rapor["cv"] = {
+        "malzeme_modeli": malzeme_modeli_cv(malzeme_satirlari, args.folds),
+    }
+    # Genelleme ölçümü değil (bkz. urun_modeli_uyumu); "cv" dışında tutulur
+    rapor["uyum"] = {"urun_modeli": urun_modeli_uyumu(urun_adlari, y)}
+
+    print("   ⏱️ Eğitim süresi ızgarası...")
+    rapor["egitim_suresi"] = egitim_suresi_izgarasi(
+        urun_adlari, y, malzeme_satirlari, args.n_estimators, args.n_jobs, args.repeat
+    )
+
+    model_dir = tempfile.mkdtemp(prefix="eval_ai_model_")
+    try:
+        t0 = time.perf_counter()
+        *_, versiyon = _egit_ve_yayinla(urun_adlari, y, malzeme_satirlari, model_dir)
+        rapor["uretim_egitimi_sec"] = round(time.perf_counter() - t0, 4)
+        rapor["artefakt"] = artefakt_boyutlari(ModelRegistry(model_dir), versiyon)
+
+        ai = UretimAIModel(model_dir)
+        t0 = time.perf_counter()
+        ai.model_yukle()
+        rapor["model_yukleme_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+        print("   🚀 Çıkarım gecikmesi...")
+        rapor["cikarim"] = cikarim_gecikmesi(ai, urun_adlari, malzeme_satirlari, args.batch_sizes, args.iterations)
+        if not args.skip_api:
+            print("   🌐 API gecikmesi...")
+            rapor["api"] = api_gecikmesi(model_dir, urun_adlari, malzeme_satirlari, 100, args.iterations)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+    return rapor
+
+
+# ==================== Rapor ve gerileme kontrolü ====================
+
+def ortam_bilgisi() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "sklearn": sklearn.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+
+def karsilastirilacak_metrikler(dataset: Dict) -> Dict[str, float]:
+    """Gerileme kontrolü yapılan metrikler (hepsinde büyük değer kötü)."""
+    metrikler = {}
+    for model, cv in (dataset.get("cv") or {}).items():
+        for ad, deger in (cv or {}).items():
+            if ad.startswith("mae_"):
+                metrikler[f"cv.{model}.{ad}"] = deger["mean"]
+    cikarim = dataset.get("cikarim") or {}
+    for ad in ("tahmin_yap", "malzeme_tahmin_yap"):
+        if ad in cikarim:
+            metrikler[f"cikarim.{ad}.p50_ms"] = cikarim[ad]["p50_ms"]
+    for n, olcum in (cikarim.get("toplu_tahmin_yap") or {}).items():
+        metrikler[f"cikarim.toplu_tahmin_yap.{n}.p50_ms"] = olcum["p50_ms"]
+    if "artefakt" in dataset:
+        metrikler["artefakt.toplam_bytes"] = dataset["artefakt"]["toplam_bytes"]
+    return metrikler
+
+
+def gerilemeleri_bul(baseline: Dict, rapor: Dict, tolerance: float) -> List[Dict]:
+    onceki = {d["dataset"]: karsilastirilacak_metrikler(d) for d in baseline.get("datasets", [])}
+    gerilemeler = []
+    for dataset in rapor["datasets"]:
+        eski = onceki.get(dataset["dataset"])
+        if eski is None:
+            continue
+        for ad, yeni_deger in karsilastirilacak_metrikler(dataset).items():
+            eski_deger = eski.get(ad)
+            if eski_deger is None:
+                continue
+            if ad.endswith("_ms") and yeni_deger - eski_deger < LATENCY_NOISE_MS:
+                continue
+            if yeni_deger > eski_deger * (1 + tolerance):
+                gerilemeler.append({
+                    "dataset": dataset["dataset"], "metric": ad,
+                    "baseline": eski_deger, "current": yeni_deger,
+                })
+    return gerilemeler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI model evaluation and benchmark report")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Gerçek veri CSV dosyası")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[1000, 10000], help="Sentetik veri seti boyları")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, -1])
+    parser.add_argument("--repeat", type=int, default=1, help="Eğitim süresi ölçüm tekrarı (medyan alınır)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--skip-api", action="store_true", help="API gecikmesi ölçümünü atla")
+    parser.add_argument("--output", default=os.path.join(BACKEND_DIR, "reports", "ai_eval.json"))
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki rapor (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="İzin verilen göreli kötüleşme")
+    args = parser.parse_args()
+
+    from app.utils.prediction_cache import prediction_cache
+
+    # Model gecikmesi ölçülsün, cache isabeti değil
+    prediction_cache.max_size = 0
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("🚀 AI model değerlendirmesi başlatılıyor...")
+    gercek = csv_satirlari(args.csv)
+    datasets = [(os.path.basename(args.csv), gercek)]
+    datasets += [(f"synthetic-{n}", sentetik_satirlar(gercek, n)) for n in args.synthetic]
+
+    rapor = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": ortam_bilgisi(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "datasets": [degerlendir(ad, satirlar, args) for ad, satirlar in datasets],
+    }
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rapor["regressions"] = gerilemeleri_bul(json.load(f), rapor, args.tolerance)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rapor, f, ensure_ascii=False, indent=2)
+    print(f"\n📝 Rapor yazıldı: {args.output}")
+
+    for dataset in rapor["datasets"]:
+        cv = dataset["cv"]["malzeme_modeli"] or {}
+        maes = ", ".join(f"{k[4:]}={v['mean']}" for k, v in cv.items() if k.startswith("mae_"))
+        print(f"   {dataset['dataset']}: MAE {maes} | tahmin_yap p50 {dataset['cikarim']['tahmin_yap']['p50_ms']} ms"
+              f" | artefakt {dataset['artefakt']['toplam_bytes'] / 1024:.0f} KB")
+
+    if rapor.get("regressions"):
+        print(f"\n❌ {len(rapor['regressions'])} gerileme bulundu:")
+        for g in rapor["regressions"]:
+            print(f"   {g['dataset']} {g['metric']}: {g['baseline']} -> {g['current']}")
+        sys.exit(1)
+
+    print("\n✅ Tamamlandı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Makine Telemetrisi Rollup / Retention Scripti
+Ham machine_readings satırlarını 1m / 1h / 1d rollup tablolarına toplar
+ve saklama süresini aşan ham satırları siler.
+
+API sürecindeki arka plan işi kapalıysa (TELEMETRY_ROLLUP_ENABLED=false)
+cron ile çalıştırılabilir. Geriye dönük veri yüklemesinden sonra
+--reset ile watermark'lar sıfırlanıp rollup'lar baştan oluşturulabilir.
+
+Kullanım:
+    python scripts/rollup_machine_readings.py [--purge] [--retention-days 90] [--reset]
+"""
+
+import sys
+import os
+import argparse
+
+# Backend klasörünü path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import TELEMETRY_PURGE_BATCH_SIZE, TELEMETRY_RAW_RETENTION_DAYS
+from app.db import SessionLocal
+from app.models import TelemetryRollupState
+from app.utils.telemetry_rollup import purge_raw_readings, run_rollups
+
+
+def main(purge: bool, retention_days: int, batch_size: int, reset: bool) -> None:
+    db = SessionLocal()
+    try:
+        if reset:
+            db.query(TelemetryRollupState).delete()
+            db.commit()
+            print("🔄 Rollup watermark'ları sıfırlandı")
+
+        written = run_rollups(db)
+        for unit, count in written.items():
+            print(f"📊 {unit}: {count} rollup satırı yazıldı")
+
+        if purge:
+            deleted = purge_raw_readings(db, retention_days=retention_days, batch_size=batch_size)
+            print(f"🗑️  {deleted} ham okuma silindi (saklama: {retention_days} gün)")
+    except Exception as e:
+        print(f"❌ Rollup hatası: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="machine_readings rollup ve retention")
+    parser.add_argument("--purge", action="store_true", help="Saklama süresini aşan ham okumaları sil")
+    parser.add_argument("--retention-days", type=int, default=TELEMETRY_RAW_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=TELEMETRY_PURGE_BATCH_SIZE)
+    parser.add_argument("--reset", action="store_true", help="Watermark'ları sıfırla ve baştan topla")
+    args = parser.parse_args()
+
+    print("🚀 Telemetri rollup başlatılıyor...")
+    main(args.purge, args.retention_days, args.batch_size, args.reset)
+    print("\n✅ Tamamlandı.")
@@ -1,50 +1,67 @@
 """
 CSV Veri Yükleme Scripti
-uretim_verisi.csv dosyasını okuyup PostgreSQL products tablosuna yükler.
+uretim_verisi.csv dosyasını (veya verilen CSV'yi) okuyup products tablosuna yükler.
+
+Dosya akış halinde okunur ve chunk'lar halinde yazılır: her chunk için
+mevcut kodlar tek sorguyla çekilir, satırlar tek bir
+INSERT ... ON CONFLICT (code) DO UPDATE ile upsert edilir
+(app.utils.product_import). Aynı içe aktarma API'den de yapılabilir:
+POST /products/import.
+
+Yükleme sonunda AI modeli tek bir eğitimle güncellenir (--no-train ile kapatılır).
+
+Kullanım:
+    python scripts/veri_yukle.py [csv_dosyasi] [--no-train]
+    python scripts/veri_yukle.py katalog.csv --chunk-size 5000 --commit-every 10
 """
 
 import sys
 import os
 import csv
-from datetime import datetime, timezone
+import argparse
 
 # Backend klasörünü path'e ekle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
-from app.db import engine, SessionLocal
-from app.models import Product
+from app.config import PRODUCT_IMPORT_CHUNK_SIZE, PRODUCT_IMPORT_COMMIT_EVERY
+from app.db import SessionLocal
+from app.utils.product_import import ImportOzeti, ProductImporter
 
 
-def temizle_sayi(deger: str) -> float:
+def egitimi_tetikle():
     """
-    Virgül/nokta düzeltmeleri yapar.
-    Örn: "2,05" → 2.05, "05" → 5
+    İçe aktarma sonunda tam olarak bir eğitim kuyruğa alır ve bitmesini bekler.
+    Yeni versiyon registry'de aktif olduğu için API worker'ları onu kendisi yükler.
     """
-    if not deger or deger.strip() == '':
-        return None
-    
-    # Boşlukları temizle
-    deger = deger.strip()
-    
-    # Virgülü noktaya çevir (Türkçe ondalık formatı)
-    deger = deger.replace(',', '.')
-    
-    try:
-        return float(deger)
-    except ValueError:
-        return None
+    from app.utils.training_jobs import retrain_scheduler, training_queue
 
+    job_id = retrain_scheduler.flush(force=True)
+    if job_id is None:
+        print("ℹ️ Değişen ürün yok, AI eğitimi atlandı.")
+        return
+    print(f"🧠 AI eğitimi başlatıldı (iş #{job_id}), bekleniyor...")
+    training_queue.wait_idle()
+    training_queue.shutdown()
+    print("✅ AI eğitimi tamamlandı. Durum: GET /api/ai/train/jobs/" + str(job_id))
 
-def temizle_int(deger: str) -> int:
-    """Değeri integer'a çevirir."""
-    sayi = temizle_sayi(deger)
-    if sayi is None:
-        return None
-    return int(sayi)
 
+def ilerleme_yazdir(every: int):
+    def yazdir(ozet: ImportOzeti) -> None:
+        if ozet.chunk % every == 0:
+            print(
+                f"📦 {ozet.okunan} satır | +{ozet.eklenen} yeni, ~{ozet.guncellenen} güncel, "
+                f"{ozet.hatali} hatalı | {ozet.satir_per_sn} satır/sn"
+            )
+    return yazdir
 
-def csv_yukle(csv_dosya: str = None):
+
+def csv_yukle(
+    csv_dosya: str = None,
+    chunk_size: int = PRODUCT_IMPORT_CHUNK_SIZE,
+    commit_every: int = PRODUCT_IMPORT_COMMIT_EVERY,
+    progress_every: int = 10,
+):
     """
     CSV dosyasını okur ve products tablosuna yükler.
     """
@@ -53,113 +70,57 @@ def csv_yukle(csv_dosya: str = None):
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             'uretim_verisi.csv'
         )
-    
+
     if not os.path.exists(csv_dosya):
         print(f"❌ CSV dosyası bulunamadı: {csv_dosya}")
         return False
-    
-    print(f"📂 CSV dosyası okunuyor: {csv_dosya}")
-    
+
+    print(f"📂 CSV dosyası okunuyor: {csv_dosya} (chunk: {chunk_size}, commit: her {commit_every} chunk)")
+
     db: Session = SessionLocal()
-    yuklenen = 0
-    hatali = 0
-    guncellenen = 0
-    
+    importer = ProductImporter(db, chunk_size, commit_every, on_chunk=ilerleme_yazdir(progress_every))
     try:
-        with open(csv_dosya, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for satir_no, row in enumerate(reader, start=2):
-                try:
-                    # CSV sütunlarını oku
-                    kalip_adi = row.get('Kalıp Adı', '').strip()
-                    urun_adi = row.get('Ürün Adı', '').strip()
-                    goz_adedi = temizle_int(row.get('Göz Adedi', ''))
-                    cevrim_suresi = temizle_int(row.get('Çevrim Süresi ', ''))  # Sonunda boşluk var!
-                    enjeksiyon_sicakligi = temizle_int(row.get('Enjeksiyon Sıcaklığı', ''))
-                    kalip_sicakligi = temizle_int(row.get('Kalıp Sıcaklığı ', ''))  # Sonunda boşluk var!
-                    malzeme = row.get('Malzeme', '').strip()
-                    parca_agirligi = temizle_sayi(row.get('Parça Ağırlığı (g)', ''))
-                    saatlik_uretim = temizle_int(row.get('Saatlik Üretim (adet)', ''))
-                    
-                    if not urun_adi:
-                        print(f"⚠️ Satır {satir_no}: Ürün adı boş, atlanıyor.")
-                        hatali += 1
-                        continue
-                    
-                    # Ürün kodu oluştur (kalıp adından)
-                    urun_kodu = kalip_adi if kalip_adi else f"PRD-{satir_no}"
-                    
-                    # Mevcut ürünü kontrol et
-                    mevcut = db.query(Product).filter(Product.code == urun_kodu).first()
-                    
-                    if mevcut:
-                        # Güncelle
-                        mevcut.name = urun_adi
-                        mevcut.cavity_count = goz_adedi
-                        mevcut.cycle_time_sec = cevrim_suresi
-                        mevcut.injection_temp_c = enjeksiyon_sicakligi
-                        mevcut.mold_temp_c = kalip_sicakligi
-                        mevcut.material = malzeme
-                        mevcut.part_weight_g = int(parca_agirligi) if parca_agirligi else None
-                        mevcut.hourly_production = saatlik_uretim
-                        mevcut.updated_at = datetime.now(timezone.utc)
-                        guncellenen += 1
-                        print(f"🔄 Güncellendi: {urun_kodu} - {urun_adi}")
-                    else:
-                        # Yeni ürün oluştur
-                        yeni_urun = Product(
-                            code=urun_kodu,
-                            name=urun_adi,
-                            description=f"CSV'den yüklendi - {kalip_adi}",
-                            cavity_count=goz_adedi,
-                            cycle_time_sec=cevrim_suresi,
-                            injection_temp_c=enjeksiyon_sicakligi,
-                            mold_temp_c=kalip_sicakligi,
-                            material=malzeme,
-                            part_weight_g=int(parca_agirligi) if parca_agirligi else None,
-                            hourly_production=saatlik_uretim,
-                            created_at=datetime.now(timezone.utc)
-                        )
-                        db.add(yeni_urun)
-                        yuklenen += 1
-                        print(f"✅ Eklendi: {urun_kodu} - {urun_adi}")
-                    
-                except Exception as e:
-                    print(f"❌ Satır {satir_no} hatası: {e}")
-                    hatali += 1
-                    continue
-            
-            db.commit()
-            
+        with open(csv_dosya, 'r', encoding='utf-8-sig', newline='') as f:
+            ozet = importer.run(csv.DictReader(f))
     except Exception as e:
-        print(f"❌ CSV okuma hatası: {e}")
-        db.rollback()
+        print(f"❌ CSV yükleme hatası (son commit'ten sonraki chunk'lar geri alındı): {e}")
         return False
     finally:
         db.close()
-    
+
+    for hata in ozet.hatalar:
+        print(f"⚠️ Satır {hata['satir']}: {hata['hata']}, atlandı.")
+
     print("\n" + "="*50)
     print(f"📊 Yükleme Özeti:")
-    print(f"   ✅ Yeni eklenen: {yuklenen}")
-    print(f"   🔄 Güncellenen: {guncellenen}")
-    print(f"   ❌ Hatalı/Atlanan: {hatali}")
-    print(f"   📦 Toplam işlenen: {yuklenen + guncellenen + hatali}")
+    print(f"   ✅ Yeni eklenen: {ozet.eklenen}")
+    print(f"   🔄 Güncellenen: {ozet.guncellenen}")
+    print(f"   ❌ Hatalı/Atlanan: {ozet.hatali}")
+    print(f"   📦 Toplam işlenen: {ozet.okunan} ({ozet.chunk} chunk, {ozet.commit} commit)")
+    print(f"   ⏱️ Süre: {ozet.sure_sn:.2f} sn ({ozet.satir_per_sn} satır/sn)")
     print("="*50)
-    
+
     return True
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV ürün verisi yükleme")
+    parser.add_argument("csv_dosya", nargs="?", default=None)
+    parser.add_argument("--chunk-size", type=int, default=PRODUCT_IMPORT_CHUNK_SIZE, help="Upsert başına satır")
+    parser.add_argument("--commit-every", type=int, default=PRODUCT_IMPORT_COMMIT_EVERY, help="Kaç chunk'ta bir commit")
+    parser.add_argument("--progress-every", type=int, default=10, help="Kaç chunk'ta bir ilerleme yazılsın")
+    parser.add_argument("--no-train", action="store_true", help="Yükleme sonrası AI eğitimini atla")
+    args = parser.parse_args()
+
     print("🚀 CSV Veri Yükleme Başlatılıyor...")
     print("="*50)
-    
-    basarili = csv_yukle()
-    
+
+    basarili = csv_yukle(args.csv_dosya, args.chunk_size, args.commit_every, args.progress_every)
+
     if basarili:
         print("\n✅ Veri yükleme tamamlandı!")
+        if not args.no_train:
+            egitimi_tetikle()
     else:
         print("\n❌ Veri yükleme başarısız!")
         sys.exit(1)
-
-
@@ -1,16 +1,33 @@
+import os
 import pytest
+
+# Testlerde arka plan rollup thread'i çalışmasın
+os.environ.setdefault("TELEMETRY_ROLLUP_ENABLED", "false")
+# Ürün değişiklikleri testlerde arka planda eğitim başlatmasın
+os.environ.setdefault("AI_AUTO_RETRAIN_ENABLED", "false")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
-from app.db import Base, get_db
+from app.db import Base, get_db, get_async_db, to_async_url
 from app.models import User
+from app.utils.user_cache import user_cache
+from app.routers.machines import machine_id_cache
+from app.utils.machine_readings import reading_type_cache
+from app.utils.prediction_cache import prediction_cache
+from app.utils.name_index import product_name_index
+from app.utils.training_data import egitim_verisi_cache
+from app.utils.training_jobs import retrain_scheduler
 from passlib.context import CryptContext
 
-# Test database (SQLite in-memory)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database (SQLite in-memory, shared cache)
+# Async endpoint'ler aynı veritabanını ayrı bir aiosqlite bağlantısıyla görür;
+# StaticPool'daki senkron bağlantı açık kaldıkça veritabanı yaşar.
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:testdb?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -19,6 +36,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Her TestClient kendi event loop'unu açtığı için async bağlantılar havuzlanmaz
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -43,10 +64,29 @@ def client(db):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    user_cache.clear()  # Testler arasında kullanıcı id'leri tekrar kullanılıyor
+    machine_id_cache.invalidate()
+    reading_type_cache.clear()
+    prediction_cache.reset()
+    product_name_index.clear()
+    egitim_verisi_cache.reset()
+    retrain_scheduler.cancel()
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+    user_cache.clear()
+    machine_id_cache.invalidate()
+    reading_type_cache.clear()
+    prediction_cache.reset()
+    product_name_index.clear()
+    egitim_verisi_cache.reset()
+    retrain_scheduler.cancel()
 
 
 @pytest.fixture
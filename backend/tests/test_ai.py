@@ -0,0 +1,284 @@
+import threading
+from datetime import timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.ai_model import ai_model, egitim_verisi_hazirla
+from app.models import Product, TrainingJob
+from app.utils import training_data
+from app.utils.name_index import NameIndex, fold_name
+from app.utils.training_data import egitim_verisi_cache
+from app.utils.training_jobs import retrain_scheduler, training_queue
+
+
+@pytest.fixture
+def training_env(db, tmp_path):
+    """Route background training to the test database and a temp model dir"""
+    old_factory, old_dir, old_state = training_queue.session_factory, ai_model.model_dir, ai_model._durum
+    training_queue.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+    ai_model.model_dir = str(tmp_path)
+    ai_model._durum = None
+    egitim_verisi_cache.reset()
+    for i in range(6):
+        db.add(Product(
+            code=f"PRD-{i}", name=f"Ürün {i}", material="PP",
+            injection_temp_c=200 + i, mold_temp_c=40 + i, cycle_time_sec=20 + i
+        ))
+    db.commit()
+    yield
+    training_queue.wait_idle(timeout=120)
+    training_queue.session_factory, ai_model.model_dir, ai_model._durum = old_factory, old_dir, old_state
+
+
+def test_train_returns_job_and_coalesces(client, training_env):
+    """Test training is queued, duplicate requests coalesce and the model is hot-swapped"""
+    # Dispatcher'ı meşgul et ki iş pending'de kalsın
+    gate = threading.Event()
+    training_queue._dispatch().submit(gate.wait)
+
+    first = client.post("/api/ai/train")
+    second = client.post("/api/ai/train")
+    assert first.status_code == 202
+    assert first.json()["status"] == "pending"
+    assert second.json()["job_id"] == first.json()["job_id"]
+    assert second.json()["coalesced"] is True
+
+    gate.set()
+    training_queue.wait_idle(timeout=120)
+
+    job = client.get(f"/api/ai/train/jobs/{first.json()['job_id']}").json()
+    assert job["status"] == "done", job["error"]
+    assert job["request_count"] == 2
+    assert job["result"]["urun_sayisi"] == 6
+    assert ai_model.model_hazir
+    assert ai_model.tahmin_yap("Ürün 3")["success"] is True
+
+
+def test_train_job_not_found(client):
+    """Test polling an unknown job"""
+    assert client.get("/api/ai/train/jobs/999").status_code == 404
+
+
+def test_recete_async_reads_committed_products(client, db):
+    """Test async recipe lookup sees products written through the sync session"""
+    db.add(Product(
+        code="PRD-A", name="Elektrik Prizi", material="PP",
+        injection_temp_c=210, mold_temp_c=45, cycle_time_sec=25
+    ))
+    db.commit()
+
+    response = client.post("/api/recete", json={"urun_adi": "elektrik prizi"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["kaynak"] == "veritabani"
+    assert data["degerler"]["enjeksiyon_sicakligi"] == 210
+
+    response = client.post("/api/recete", json={"urun_adi": "Elektrik Kutusu"})
+    assert response.json()["benzer_urunler"] == ["Elektrik Prizi"]
+
+    status = client.get("/api/ai/status").json()
+    assert status["urun_sayisi"] == 1
+    assert client.get("/api/ai/malzemeler").json()["malzemeler"] == ["PP"]
+
+
+def test_name_index_ranks_and_folds_turkish():
+    """Test trigram search ignores Turkish case/diacritics and ranks by coverage"""
+    assert fold_name("IŞIK Şapka-Kırmızı") == "isik sapka kirmizi"
+    index = NameIndex(refresh_seconds=0)
+    index.build([(1, "Işık Şapkası"), (2, "Elektrik Prizi"), (3, "Elektrik Prizi Kapağı"), (4, "Vida")])
+
+    assert index.search("isik sapkasi")[0] == ("Işık Şapkası", 1.0)
+    names = [name for name, _ in index.search("elektrik prizi kapak")]
+    assert names[:2] == ["Elektrik Prizi Kapağı", "Elektrik Prizi"]
+    assert index.search("tamamen alakasız") == []
+
+    index.upsert(4, "Işık Duyu")
+    index.remove(1)
+    assert [name for name, _ in index.search("ışık")] == ["Işık Duyu"]
+
+
+def test_recete_suggestions_follow_product_changes(client, db, admin_token):
+    """Test the name index is updated in place on create/delete/restore"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    db.add(Product(code="PRD-A", name="Elektrik Prizi", material="PP"))
+    db.commit()
+    assert client.post("/api/recete", json={"urun_adi": "elektrik"}).json()["benzer_urunler"] == ["Elektrik Prizi"]
+
+    created = client.post("/products/", json={"code": "PRD-B", "name": "Elektrik Prizi Kapağı"}, headers=headers)
+    assert created.status_code == 200
+    data = client.post("/api/recete", json={"urun_adi": "elektrik prizi kapak"}).json()
+    assert data["benzer_urunler"] == ["Elektrik Prizi Kapağı", "Elektrik Prizi"]
+    skorlar = [s["skor"] for s in data["benzer_urun_skorlari"]]
+    assert skorlar == sorted(skorlar, reverse=True)
+
+    product_id = created.json()["id"]
+    client.delete(f"/products/{product_id}", headers=headers)
+    assert client.post("/api/recete", json={"urun_adi": "kapağı"}).json()["benzer_urunler"] is None
+    client.post(f"/products/{product_id}/restore", headers=headers)
+    assert client.post("/api/recete", json={"urun_adi": "kapağı"}).json()["benzer_urunler"] == ["Elektrik Prizi Kapağı"]
+
+
+def test_model_registry_versions_and_rollback(client, db, training_env, admin_token, auth_token):
+    """Test each training publishes a version and rollback switches the active one"""
+    first = ai_model.model_egit(db)
+    db.add(Product(
+        code="PRD-NEW", name="Yeni Ürün", material="PP",
+        injection_temp_c=250, mold_temp_c=60, cycle_time_sec=30
+    ))
+    db.commit()
+    second = ai_model.model_egit(db)
+    assert (first["model_versiyonu"], second["model_versiyonu"]) == ("v0001", "v0002")
+
+    data = client.get("/api/ai/models").json()
+    assert data["aktif_versiyon"] == "v0002"
+    assert [v["version"] for v in data["data"]] == ["v0002", "v0001"]
+    assert data["data"][1]["urun_sayisi"] == 6
+    assert data["data"][1]["features"] == ["urun_adi"]
+    assert "test_score" in data["data"][1]
+
+    url = "/api/ai/models/v0001/rollback"
+    assert client.post(url, headers={"Authorization": f"Bearer {auth_token}"}).status_code == 403
+    assert client.post(
+        "/api/ai/models/v0009/rollback", headers={"Authorization": f"Bearer {admin_token}"}
+    ).status_code == 404
+
+    response = client.post(url, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert response.json()["onceki_versiyon"] == "v0002"
+    assert ai_model.registry.current_version() == "v0001"
+    assert ai_model.model_versiyonu == "v0001"
+    assert ai_model.tahmin_yap("Yeni Ürün")["success"] is False
+
+
+def test_model_registry_imports_legacy_files(training_env):
+    """Test pre-registry model files are imported as the first version and loaded with mmap"""
+    from app.ai_model import ENCODER_FILENAME, MODEL_FILENAME, modeli_egit
+    import joblib
+    import os
+
+    model, label_encoder, _ = modeli_egit([f"Ürün {i}" for i in range(5)], [[200, 40, 20]] * 5)
+    joblib.dump(model, os.path.join(ai_model.model_dir, MODEL_FILENAME))
+    joblib.dump(label_encoder, os.path.join(ai_model.model_dir, ENCODER_FILENAME))
+
+    assert ai_model.model_yukle() is True
+    assert ai_model.model_versiyonu == "v0001"
+    assert ai_model.registry.read_metadata("v0001")["kaynak"] == "legacy"
+    assert ai_model.tahmin_yap("Ürün 2")["tahminler"]["enjeksiyon_sicakligi"] == 200
+
+
+def test_batch_prediction_matches_single(client, db, training_env):
+    """Test batch prediction keeps input order and matches per-item predictions"""
+    ai_model.model_egit(db)
+    names = ["Ürün 4", "Bilinmeyen", "Ürün 1", "Ürün 4"]
+
+    response = client.post("/api/ai/urun-tahmin/toplu", json={"urun_adlari": names})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["toplam"], data["basarili"]) == (4, 3)
+    assert data["model_versiyonu"] == "v0001"
+
+    sonuclar = data["sonuclar"]
+    assert [s.get("urun_adi") for s in sonuclar] == ["Ürün 4", None, "Ürün 1", "Ürün 4"]
+    assert sonuclar[1]["success"] is False
+    assert sonuclar[2]["tahminler"] == ai_model.tahmin_yap("Ürün 1")["tahminler"]
+
+    assert client.post("/api/ai/urun-tahmin/toplu", json={"urun_adlari": []}).status_code == 422
+
+
+def test_prediction_cache_hits_and_invalidation(client, db, training_env, admin_token):
+    """Test cached predictions are keyed by model version and dropped on product changes"""
+    # Model yokken malzeme tahmini ortalama yöntemine düşer; ürün değişikliği cache'i temizler
+    body = {"malzeme": "PP", "parca_agirligi_g": 10, "goz_adedi": 2}
+    first = client.post("/api/ai/tahmin", json=body).json()
+    assert first["yontem"] == "ortalama"
+    assert client.post("/api/ai/tahmin", json={**body, "malzeme": "pp"}).json()["malzeme"] == "pp"
+    stats = client.get("/api/ai/cache").json()["namespaces"]["malzeme"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    product = db.query(Product).filter(Product.code == "PRD-0").first()
+    response = client.patch(
+        f"/products/{product.id}", json={"injection_temp_c": 300},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    second = client.post("/api/ai/tahmin", json=body).json()
+    assert second["degerler"]["enjeksiyon_sicakligi"] > first["degerler"]["enjeksiyon_sicakligi"]
+    assert client.get("/api/ai/cache").json()["namespaces"]["malzeme"]["misses"] == 2
+
+    ai_model.model_egit(db)
+    ai_model.tahmin_yap("Ürün 2")
+    ai_model.toplu_tahmin_yap(["Ürün 2", "Ürün 3"])
+    stats = client.get("/api/ai/cache").json()["namespaces"]["urun"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+    # Yeni versiyon: eski anahtarlar kullanılmaz
+    ai_model.model_egit(db)
+    ai_model.tahmin_yap("Ürün 2")
+    assert client.get("/api/ai/cache").json()["namespaces"]["urun"]["misses"] == 3
+
+
+def test_material_model_predicts_in_memory(client, db, training_env):
+    """Test the material model is trained with the product model and used by /api/ai/tahmin"""
+    for i in range(12):
+        db.add(Product(
+            code=f"ABS-{i}", name=f"ABS Kapak {i}", material="ABS",
+            part_weight_g=10 + i * 10, cavity_count=2, hourly_production=200 - i * 10,
+            injection_temp_c=230, mold_temp_c=60, cycle_time_sec=20 + i * 5
+        ))
+    db.commit()
+
+    result = ai_model.model_egit(db)
+    assert result["malzeme_model"]["urun_sayisi"] == 18
+    meta = ai_model.registry.read_metadata(result["model_versiyonu"])
+    assert meta["malzeme_model"]["malzemeler"] == ["ABS", "PP"]
+    assert meta["malzeme_model"]["features"][0] == "material (one-hot)"
+
+    light = client.post("/api/ai/tahmin", json={"malzeme": "abs", "parca_agirligi_g": 15, "goz_adedi": 2}).json()
+    heavy = client.post("/api/ai/tahmin", json={
+        "malzeme": "ABS", "parca_agirligi_g": 120, "goz_adedi": 2, "saatlik_uretim": 90
+    }).json()
+    assert light["yontem"] == heavy["yontem"] == "model"
+    assert light["model_versiyonu"] == result["model_versiyonu"]
+    assert light["kaynak_urun_sayisi"] == 12
+    assert heavy["degerler"]["cevrim_suresi"] > light["degerler"]["cevrim_suresi"] + 20
+
+    unknown = client.post("/api/ai/tahmin", json={"malzeme": "PEEK", "parca_agirligi_g": 5, "goz_adedi": 1}).json()
+    assert unknown["success"] is False
+    assert unknown["mevcut_malzemeler"] == ["ABS", "PP"]
+
+
+def test_debounced_retrain_runs_once_and_reads_only_changes(client, db, training_env, auth_token, monkeypatch):
+    """Test auto_train upserts coalesce into one retrain and later retrains reuse cached rows"""
+    monkeypatch.setattr(retrain_scheduler, "debounce_seconds", 60)
+    monkeypatch.setattr(training_data, "FILIGRAN_PAYI", timedelta(0))
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for i in range(10):
+        response = client.post("/products/upsert", json={
+            "name": f"Yeni Ürün {i}", "injection_temp_c": 210 + i, "mold_temp_c": 50,
+            "cycle_time_sec": 30, "auto_train": True
+        }, headers=headers)
+        assert response.json()["ai_training"]["status"] == "scheduled"
+    assert retrain_scheduler.pending
+    assert db.query(TrainingJob).count() == 0
+
+    job_id = retrain_scheduler.flush()
+    training_queue.wait_idle(timeout=120)
+    assert db.query(TrainingJob).count() == 1
+    job = client.get(f"/api/ai/train/jobs/{job_id}").json()
+    assert job["status"] == "done", job["error"]
+    assert (job["result"]["urun_sayisi"], job["result"]["okunan_satir"]) == (16, 16)
+    assert client.get("/api/ai/train/changes").json()["degisen_urun"] == 0
+    assert retrain_scheduler.flush() is None
+
+    # Eşiğin altındaki değişiklik eğitim başlatmaz; zorlanınca sadece değişen satır okunur
+    monkeypatch.setattr(retrain_scheduler, "min_changes", 3)
+    product = db.query(Product).filter(Product.code == "PRD-2").first()
+    product.injection_temp_c = 260
+    db.commit()
+    assert client.get("/api/ai/train/changes").json()["degisen_urun"] == 1
+    assert retrain_scheduler.flush() is None
+
+    job_id = retrain_scheduler.flush(force=True)
+    training_queue.wait_idle(timeout=120)
+    result = client.get(f"/api/ai/train/jobs/{job_id}").json()["result"]
+    assert (result["urun_sayisi"], result["okunan_satir"]) == (16, 1)
+    assert egitim_verisi_cache.guncelle(db)[:2] == egitim_verisi_hazirla(db)
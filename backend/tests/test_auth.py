@@ -79,3 +79,29 @@ def test_change_user_role(client, admin_token, test_user):
     assert response.status_code == 200
     assert response.json()["new_role"] == "planner"
 
+
+def test_verify_token_uses_user_cache(client, auth_token):
+    """Test verify_token caches the user identity after the first lookup"""
+    from app.utils.user_cache import user_cache
+
+    response = client.get(
+        "/auth/me",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 200
+    assert len(user_cache) == 1
+
+
+def test_deleted_user_token_rejected(client, admin_token, test_user, auth_token):
+    """Test deleting a user invalidates the cached identity"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    response = client.delete(
+        f"/auth/users/{test_user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+
+    response = client.get("/workorders/", headers=headers)
+    assert response.status_code == 401
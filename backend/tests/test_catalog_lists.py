@@ -0,0 +1,130 @@
+import pytest
+from sqlalchemy import event, select, text
+from app.models import Mold, Product
+from app.utils.list_query import keyset_page
+
+
+@pytest.fixture
+def catalog(db):
+    """Products with duplicate and missing materials, plus molds"""
+    materials = ["PP", "ABS", None, "PP", "pp-GF30", None, "ABS", "PE"]
+    products = [
+        Product(code=f"PRD-{i:02d}", name=f"Ürün {i}", material=m, cavity_count=i + 1)
+        for i, m in enumerate(materials)
+    ]
+    products.append(Product(code="KAP-01", name="İNCE Kapak", material="PP"))
+    deleted = Product(code="PRD-99", name="Silinmiş", material="PP")
+    db.add_all(products + [deleted])
+    db.commit()
+    deleted.deleted_at = deleted.created_at
+    db.add_all([
+        Mold(code=f"MOLD-{i}", name=f"Kalıp {i}", status=s)
+        for i, s in enumerate(["active", "maintenance", "active", "inactive"])
+    ])
+    db.commit()
+    return products
+
+
+def _pages(client, url, token, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        params = f"&limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url + params, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+        rows += response.json()
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return rows, pages
+
+
+def test_products_default_list_unchanged(client, auth_token, catalog):
+    """Test the unparameterised call still returns every active product with all fields"""
+    response = client.get("/products/", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == len(catalog)
+    assert "x-next-cursor" not in response.headers
+    assert {"id", "code", "name", "material", "created_at", "deleted_at"} <= set(data[0])
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "material", "-material", "name", "-created_at"])
+def test_products_cursor_pages_cover_all_rows(client, auth_token, catalog, sort):
+    """Test keyset pages neither skip nor repeat rows, NULL sort values included"""
+    rows, pages = _pages(client, f"/products/?sort={sort}&fields=id,material,name", auth_token, 3)
+    assert pages == 3
+    assert sorted(r["id"] for r in rows) == sorted(p.id for p in catalog)
+    assert set(rows[0]) == {"id", "material", "name"}
+
+    key = sort.lstrip("-")
+    values = [r[key] for r in rows if key in r and r[key] is not None] if key != "created_at" else []
+    assert values == sorted(values, reverse=sort.startswith("-"))
+    if key == "material":
+        assert [r["material"] for r in rows[-2:]] == [None, None]
+
+
+def test_value_pages_skip_null_branch(db, catalog):
+    """Test non-NULL cursor pages use a plain (material, id) comparison and the NULL tail follows"""
+    active = [Product.deleted_at.is_(None)]
+    rows, cursor = keyset_page(db, Product, ["id", "material"], "material", False, active, None, 2)
+    statements = []
+    engine = db.get_bind()
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        while cursor:
+            page, cursor = keyset_page(db, Product, ["id", "material"], "material", False, active, cursor, 2)
+            rows += page
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert "products.material IS NULL" not in statements[0]
+    assert "(products.material, products.id) >" in statements[0]
+    assert [r["material"] for r in rows[-2:]] == [None, None]
+    assert sorted(r["id"] for r in rows) == sorted(p.id for p in catalog)
+
+
+def test_list_openapi_documents_fields(client):
+    """Test list endpoints keep a documented response schema"""
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, item in [("/products/", "ProductListItem"), ("/molds/", "MoldListItem")]:
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"].endswith(item)
+
+
+def test_products_filters_and_projection(client, auth_token, catalog):
+    """Test code prefix, Turkish-aware name and material filters with a narrow projection"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/products/?code=KAP&fields=code", headers=headers)
+    assert response.json() == [{"code": "KAP-01"}]
+
+    response = client.get("/products/?name=ince&fields=code", headers=headers)
+    assert response.json() == [{"code": "KAP-01"}]
+
+    response = client.get("/products/?material=pp&fields=code&sort=code", headers=headers)
+    assert [r["code"] for r in response.json()] == ["KAP-01", "PRD-00", "PRD-03", "PRD-04"]
+
+    response = client.get("/products/?code=%25", headers=headers)
+    assert response.json() == []
+
+    assert client.get("/products/?fields=password", headers=headers).status_code == 400
+    assert client.get("/products/?sort=description", headers=headers).status_code == 400
+    assert client.get("/products/?limit=2&cursor=bozuk", headers=headers).status_code == 400
+
+
+def test_molds_status_filter_and_pages(client, auth_token, catalog):
+    """Test mold list filters by status and pages by name descending"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/molds/?status=active&fields=code", headers=headers)
+    assert response.json() == [{"code": "MOLD-0"}, {"code": "MOLD-2"}]
+
+    rows, pages = _pages(client, "/molds/?sort=-name&fields=name", auth_token, 3)
+    assert pages == 2
+    assert [r["name"] for r in rows] == ["Kalıp 3", "Kalıp 2", "Kalıp 1", "Kalıp 0"]
+
+
+def test_active_list_uses_partial_index_sqlite(db):
+    """Test the default active listing is served by the partial index"""
+    sql = select(Product.id, Product.code).where(Product.deleted_at.is_(None)).order_by(Product.code)
+    compiled = str(sql.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+    assert "ix_products_active_code" in plan
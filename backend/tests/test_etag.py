@@ -0,0 +1,108 @@
+import io
+from sqlalchemy import event
+from app.models import Machine, Mold, Product
+from app.utils.etag import etag_matches
+from app.utils.table_versions import read_versions
+
+
+def _get(client, url, token, etag=None):
+    headers = {"Authorization": f"Bearer {token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(url, headers=headers)
+
+
+def test_etag_matching_rules():
+    """Test weak comparison, lists and wildcard in If-None-Match"""
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"x", W/"abc"', 'W/"abc"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+
+
+def test_products_304_skips_list_query(client, auth_token, db):
+    """Test an unchanged product list answers 304 without selecting from products"""
+    db.add(Product(code="P-1", name="Kapak"))
+    db.commit()
+
+    first = _get(client, "/products/", auth_token)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and len(first.json()) == 1
+
+    statements = []
+    engine = db.get_bind()
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        second = _get(client, "/products/", auth_token, etag)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    assert not [sql for sql in statements if "FROM products" in sql]
+
+    # Farklı sorgu parametresi farklı temsil -> farklı ETag
+    assert _get(client, "/products/?fields=id", auth_token, etag).status_code == 200
+
+
+def test_product_writes_change_etag(client, admin_token, db):
+    """Test create, update, soft delete, restore and CSV import each invalidate the ETag"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def etag():
+        return _get(client, "/products/", admin_token).headers["etag"]
+
+    seen = [etag()]
+    product_id = client.post("/products/", json={"code": "P-1", "name": "Kapak"}, headers=headers).json()["id"]
+    seen.append(etag())
+    client.patch(f"/products/{product_id}", json={"material": "PP"}, headers=headers)
+    seen.append(etag())
+    client.delete(f"/products/{product_id}", headers=headers)
+    seen.append(etag())
+    client.post(f"/products/{product_id}/restore", headers=headers)
+    seen.append(etag())
+    csv_data = "Ürün Adı,Kalıp Adı\nPriz,K-9\n".encode("utf-8")
+    client.post(
+        "/products/import?auto_train=false",
+        files={"file": ("u.csv", io.BytesIO(csv_data), "text/csv")},
+        headers=headers
+    )
+    seen.append(etag())
+    assert len(set(seen)) == len(seen)
+
+    # Başka tabloya yazmak ürün ETag'ini değiştirmez; aynı transaction tek artış
+    before = read_versions(db, ["products", "molds"])
+    db.add_all([Mold(code="M-1", name="Kalıp"), Mold(code="M-2", name="Kalıp 2")])
+    db.commit()
+    after = read_versions(db, ["products", "molds"])
+    assert after["products"] == before["products"]
+    assert after["molds"] == before["molds"] + 1
+    assert etag() == seen[-1]
+
+    # Sayaç flush'ta değil commit anında artar (satır kilidi transaction boyunca tutulmaz)
+    db.add(Mold(code="M-3", name="Kalıp 3"))
+    db.flush()
+    assert read_versions(db, ["molds"])["molds"] == after["molds"]
+    db.commit()
+    assert read_versions(db, ["molds"])["molds"] == after["molds"] + 1
+
+
+def test_machines_and_async_catalog_endpoints_304(client, auth_token, db):
+    """Test machines, /api/urunler and /api/ai/malzemeler honour If-None-Match"""
+    db.add(Machine(name="M1", machine_type="enjeksiyon"))
+    db.add(Product(code="P-1", name="Kapak", material="PP"))
+    db.commit()
+
+    for url in ["/machines/", "/api/urunler", "/api/ai/malzemeler"]:
+        first = _get(client, url, auth_token)
+        assert first.status_code == 200, url
+        assert _get(client, url, auth_token, first.headers["etag"]).status_code == 304, url
+
+    etag = _get(client, "/machines/", auth_token).headers["etag"]
+    machine = db.query(Machine).first()
+    machine.status = "maintenance"
+    db.commit()
+    assert _get(client, "/machines/", auth_token, etag).status_code == 200
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from app.models import WorkOrder, WorkOrderStage
+from app.utils.event_bus import EventBus, event_bus
+
+
+@pytest.fixture
+def stage(db):
+    """Create a work order with a planned stage"""
+    wo = WorkOrder(
+        product_code="PRD-001",
+        lot_no="LOT-001",
+        qty=100,
+        planned_start=datetime.utcnow(),
+        planned_end=datetime.utcnow() + timedelta(hours=2)
+    )
+    db.add(wo)
+    db.commit()
+    stage = WorkOrderStage(work_order_id=wo.id, stage_name="Enjeksiyon", status="planned")
+    db.add(stage)
+    db.commit()
+    db.refresh(stage)
+    return stage
+
+
+def test_event_bus_role_filter_and_replay():
+    """Test subscribers get only their role's events and can resume by id"""
+    bus = EventBus(buffer_size=10)
+
+    async def scenario():
+        worker, _, _ = bus.subscribe(role="worker")
+        bus.publish("stage.started", {"work_order_stage_id": 1})
+        bus.publish("notification.created", {"notification_id": 1}, roles=("admin",))
+        await asyncio.sleep(0)
+        received = [worker.queue.get_nowait().type for _ in range(worker.queue.qsize())]
+        bus.unsubscribe(worker)
+
+        _, replay, gap = bus.subscribe(role="admin", last_event_id=1)
+        return received, [e.type for e in replay], gap
+
+    received, replayed, gap = asyncio.run(scenario())
+    assert received == ["stage.started"]
+    assert replayed == ["notification.created"]
+    assert gap is False
+
+
+def test_event_bus_reports_gap_when_buffer_overflowed():
+    """Test resuming from an evicted id reports a gap"""
+    bus = EventBus(buffer_size=2)
+    for i in range(5):
+        bus.publish("stage.started", {"i": i})
+
+    async def scenario():
+        return bus.subscribe(role="worker", last_event_id=1)
+
+    _, replay, gap = asyncio.run(scenario())
+    assert gap is True
+    assert [e.id for e in replay] == [4, 5]
+
+
+def test_stage_start_publishes_event(client, auth_token, stage):
+    """Test starting a stage is visible in the recent events feed"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    after = event_bus.last_event_id
+
+    response = client.post(f"/stages/{stage.id}/start", headers=headers)
+    assert response.status_code == 200
+
+    body = client.get(f"/events/recent?after={after}", headers=headers).json()
+    assert [e["type"] for e in body["data"]] == ["stage.started"]
+    assert body["data"][0]["data"]["work_order_stage_id"] == stage.id
+
+
+def test_issue_notifications_only_reach_managers(client, auth_token, admin_token, stage):
+    """Test notification events are delivered only to their recipient role"""
+    after = event_bus.last_event_id
+    response = client.post(
+        f"/stages/{stage.id}/issue",
+        json={"type": "machine_breakdown"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 200
+
+    worker_types = [e["type"] for e in client.get(
+        f"/events/recent?after={after}", headers={"Authorization": f"Bearer {auth_token}"}
+    ).json()["data"]]
+    admin_types = [e["type"] for e in client.get(
+        f"/events/recent?after={after}", headers={"Authorization": f"Bearer {admin_token}"}
+    ).json()["data"]]
+    assert worker_types == ["issue.reported"]
+    assert admin_types == ["issue.reported", "notification.created"]
@@ -0,0 +1,78 @@
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.models import Product, User
+from app.utils.text_keys import product_name_key, username_key
+
+
+def _explain_sqlite(db, query):
+    sql = str(query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    return " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def test_keys_normalize_case_whitespace_and_turkish():
+    """Test lookup keys are stable across case, padding and Turkish dotted/dotless I"""
+    assert username_key("  TestUser ") == "testuser"
+    assert product_name_key("IŞIK  Şapkası") == product_name_key("ışık şapkası") == "ışık şapkası"
+    assert product_name_key("İNCE Kapak") == "ince kapak"
+    assert product_name_key(None) is None
+
+
+def test_lookup_queries_use_key_indexes_sqlite(db):
+    """Test login/upsert lookups hit the key indexes instead of scanning"""
+    user_query = db.query(User).filter(User.username_key == username_key("TestUser"))
+    assert "USING INDEX ix_users_username_key" in _explain_sqlite(db, user_query)
+
+    product_query = db.query(Product).filter(
+        Product.name_key == product_name_key("Elektrik Prizi"),
+        Product.deleted_at.is_(None)
+    )
+    assert "USING INDEX ix_products_name_key" in _explain_sqlite(db, product_query)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL tanımlı değil")
+def test_lookup_queries_use_key_indexes_postgres():
+    """Test the same lookups use the key indexes on PostgreSQL"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    tables = [User.__table__, Product.__table__]
+    User.metadata.create_all(engine, tables=tables)
+    try:
+        with Session(engine) as pg:
+            pg.add_all(User(username=f"user{i}", password_hash="x") for i in range(2000))
+            pg.add_all(Product(code=f"PRD-{i}", name=f"Ürün {i}") for i in range(2000))
+            pg.commit()
+            pg.execute(text("ANALYZE users"))
+            pg.execute(text("ANALYZE products"))
+
+            for query, index in (
+                (pg.query(User).filter(User.username_key == username_key("USER42")), "ix_users_username_key"),
+                (pg.query(Product).filter(Product.name_key == product_name_key("ÜRÜN 42")), "ix_products_name_key"),
+            ):
+                sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+                plan = " ".join(row[0] for row in pg.execute(text(f"EXPLAIN {sql}")))
+                assert index in plan
+                assert query.count() == 1
+    finally:
+        User.metadata.drop_all(engine, tables=tables)
+
+
+def test_case_insensitive_login_and_upsert(client, db, test_user, auth_token):
+    """Test login and product upsert match regardless of case"""
+    response = client.post("/auth/login", data={"username": " TESTUSER ", "password": "testpass123"})
+    assert response.status_code == 200
+
+    db.add(Product(code="PRD-I", name="Işık Şapkası", material="PP", injection_temp_c=200))
+    db.commit()
+
+    response = client.post(
+        "/products/upsert",
+        json={"name": "IŞIK ŞAPKASI", "mold_temp_c": 45},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["action"] == "updated"
+    assert db.query(Product).count() == 1
+
+    response = client.post("/api/recete", json={"urun_adi": "ışık şapkası"})
+    assert response.json()["kaynak"] == "veritabani"
@@ -0,0 +1,167 @@
+import json
+from datetime import datetime
+from app.models import MachineReading, MachineReading1d, ReadingType
+from app.utils.telemetry_rollup import purge_raw_readings, run_rollups
+
+
+def create_machine(client, token, name="ENJ-01"):
+    response = client.post(
+        "/machines/",
+        json={"name": name, "machine_type": "injection"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return response.json()["machine_id"]
+
+
+def test_bulk_readings_json(client, auth_token, db):
+    """Test bulk ingestion accepts known machines and rejects the rest"""
+    machine_id = create_machine(client, auth_token)
+    readings = [
+        {"machine_id": machine_id, "reading_type": "temperature", "value": 215.5},
+        {"machine_id": machine_id, "reading_type": "pressure", "value": "120"},
+        {"machine_id": 9999, "reading_type": "temperature", "value": 1},
+        {"machine_id": machine_id, "reading_type": "", "value": 1},
+    ]
+    response = client.post(
+        "/machines/readings/bulk",
+        json={"readings": readings},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 2
+    assert [e["index"] for e in data["errors"]] == [2, 3]
+    assert db.query(MachineReading).filter(MachineReading.machine_id == machine_id).count() == 2
+
+
+def test_bulk_readings_ndjson(client, auth_token, db):
+    """Test NDJSON body with an invalid line"""
+    machine_id = create_machine(client, auth_token)
+    lines = [
+        json.dumps({"machine_id": machine_id, "reading_type": "cycle_time", "value": 32.1}),
+        "{not json",
+        json.dumps({"machine_id": machine_id, "reading_type": "cycle_time", "value": 31.8,
+                    "timestamp": "2026-01-01T10:00:00"}),
+    ]
+    response = client.post(
+        "/machines/readings/bulk",
+        content="\n".join(lines),
+        headers={
+            "Authorization": f"Bearer {auth_token}",
+            "Content-Type": "application/x-ndjson"
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["accepted"] == 2
+    assert data["rejected"] == 1
+    assert "line 2" in data["errors"][0]["error"]
+
+
+def test_readings_stored_typed(client, auth_token, db):
+    """Test numeric values go to value_num and types to the lookup table"""
+    machine_id = create_machine(client, auth_token)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post(f"/machines/{machine_id}/readings",
+                json={"reading_type": "Temperature", "value": "215,5"}, headers=headers)
+    client.post(f"/machines/{machine_id}/readings",
+                json={"reading_type": "status", "value": "RUN"}, headers=headers)
+
+    assert db.query(ReadingType).count() == 2
+    response = client.get(f"/machines/{machine_id}/readings?reading_type=temperature", headers=headers)
+    data = response.json()["data"]
+    assert len(data) == 1
+    assert data[0]["reading_type"] == "temperature"
+    assert data[0]["value_num"] == 215.5
+    assert data[0]["value"] == "215.5"
+
+
+def test_readings_downsample(client, auth_token):
+    """Test min/max/avg per bucket over a time range"""
+    machine_id = create_machine(client, auth_token)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    readings = [
+        {"machine_id": machine_id, "reading_type": "temperature", "value": v,
+         "timestamp": f"2026-01-01T{h:02d}:{m:02d}:00"}
+        for h, m, v in [(10, 0, 200), (10, 30, 210), (11, 15, 220), (12, 0, 999)]
+    ]
+    client.post("/machines/readings/bulk", json=readings, headers=headers)
+
+    response = client.get(
+        f"/machines/{machine_id}/readings/downsample",
+        params={"reading_type": "temperature", "bucket": "hour",
+                "start": "2026-01-01T10:00:00", "end": "2026-01-01T12:00:00"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data) == 2
+    assert data[0]["count"] == 2
+    assert data[0]["min"] == 200 and data[0]["max"] == 210 and data[0]["avg"] == 205
+    assert data[1]["count"] == 1
+
+    response = client.get(
+        f"/machines/{machine_id}/readings/downsample",
+        params={"reading_type": "temperature", "bucket": "year"},
+        headers=headers
+    )
+    assert response.status_code == 400
+
+
+def test_rollup_and_retention(client, auth_token, db):
+    """Test rollups match raw aggregates and survive purging raw rows"""
+    machine_id = create_machine(client, auth_token)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    readings = [
+        {"machine_id": machine_id, "reading_type": "temperature", "value": v,
+         "timestamp": f"2026-01-01T{h:02d}:{m:02d}:{s:02d}"}
+        for h, m, s, v in [(10, 0, 5, 200), (10, 0, 40, 204), (10, 30, 0, 210), (11, 15, 0, 220)]
+    ]
+    client.post("/machines/readings/bulk", json=readings, headers=headers)
+    params = {"reading_type": "temperature", "bucket": "hour",
+              "start": "2026-01-01T00:00:00", "end": "2026-01-02T00:00:00"}
+    before = client.get(f"/machines/{machine_id}/readings/downsample", params=params, headers=headers).json()
+
+    written = run_rollups(db, now=datetime(2026, 1, 3, 0, 0))
+    assert written["minute"] == 3
+    assert written["hour"] == 2
+    assert written["day"] == 1
+    day = db.query(MachineReading1d).one()
+    assert day.sample_count == 4 and day.value_min == 200 and day.value_max == 220
+
+    # Günlük rollup'a girmiş ham satırlar silinir
+    deleted = purge_raw_readings(db, retention_days=1, batch_size=2, now=datetime(2026, 1, 3, 0, 0))
+    assert deleted == 4
+    assert db.query(MachineReading).count() == 0
+
+    after = client.get(f"/machines/{machine_id}/readings/downsample", params=params, headers=headers).json()
+    assert after["data"] == before["data"]
+
+    # Bucket verilmezse aralığa göre seçilir
+    params.pop("bucket")
+    auto = client.get(f"/machines/{machine_id}/readings/downsample", params=params, headers=headers).json()
+    assert auto["bucket"] == "hour"
+    assert sum(b["count"] for b in auto["data"]) == 4
+
+
+def test_reading_type_ids_cached_only_after_commit(db):
+    """Test new reading types reach the shared cache only when the transaction commits"""
+    from app.models import ReadingType
+    from app.utils.machine_readings import reading_type_cache
+
+    reading_type_cache.clear()
+    try:
+        reading_type_cache.resolve(db, ["Basinc"])
+        db.rollback()
+        assert "basinc" not in reading_type_cache._ids
+
+        # (pysqlite SAVEPOINT'i autocommit ettiği için SQLite'ta satır kalabilir; id yine veritabanından okunur)
+        ids = reading_type_cache.resolve(db, ["Nem"])
+        assert "nem" not in reading_type_cache._ids
+        assert reading_type_cache.resolve(db, ["nem"]) == ids  # Aynı session bekleyen id'yi kullanır
+        db.commit()
+        assert reading_type_cache._ids["nem"] == ids["nem"]
+        assert db.get(ReadingType, ids["nem"]) is not None
+    finally:
+        reading_type_cache.clear()
@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import WorkOrderMetrics
+
+
+@pytest.fixture
+def planner_token(client, test_planner):
+    """Get auth token for planner"""
+    response = client.post(
+        "/auth/login",
+        data={"username": "planner", "password": "planner123"}
+    )
+    return response.json()["access_token"]
+
+
+@pytest.fixture
+def created_work_order(client, admin_token):
+    """Create a work order with two stages through the API"""
+    response = client.post(
+        "/workorders/",
+        json={
+            "product_code": "PRD-001",
+            "lot_no": "LOT-001",
+            "qty": 100,
+            "planned_start": datetime.utcnow().isoformat(),
+            "planned_end": (datetime.utcnow() + timedelta(hours=2)).isoformat()
+        },
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    return response.json()
+
+
+def test_metrics_summary_tracks_stage_transitions(client, planner_token, created_work_order, db):
+    """Test the materialized summary follows start/pause/resume/done"""
+    headers = {"Authorization": f"Bearer {planner_token}"}
+    wo_id = created_work_order["work_order_id"]
+    stage_id = created_work_order["stages"][0]["id"]
+
+    for action in ["start", "pause", "resume", "done"]:
+        assert client.post(f"/stages/{stage_id}/{action}", headers=headers).status_code == 200
+
+    summary = db.get(WorkOrderMetrics, wo_id)
+    db.refresh(summary)
+    assert summary.total_stages == 2
+    assert summary.done_count == 1
+    assert summary.planned_count == 1
+    assert summary.in_progress_count == 0
+    assert summary.first_actual_start is not None
+    assert summary.last_actual_end is not None
+
+    metrics = client.get(f"/metrics/workorders/{wo_id}", headers=headers).json()
+    assert metrics["stages"] == {"total": 2, "completed": 1, "in_progress": 0, "paused": 0, "planned": 1}
+    assert metrics["actual_duration_minutes"] is not None
+
+
+def test_metrics_summary_computed_on_read_without_write(client, planner_token, created_work_order, db):
+    """Test metrics are computed from stages when no summary row exists, without persisting on GET"""
+    wo_id = created_work_order["work_order_id"]
+    db.query(WorkOrderMetrics).delete()
+    db.commit()
+
+    metrics = client.get(
+        f"/metrics/workorders/{wo_id}",
+        headers={"Authorization": f"Bearer {planner_token}"}
+    ).json()
+    assert metrics["stages"]["planned"] == 2
+    db.expire_all()
+    assert db.get(WorkOrderMetrics, wo_id) is None
+
+
+def test_aggregate_metrics_grouped_in_sql(client, planner_token, db):
+    """Test aggregate efficiency/delay/on-time rate per product and per day"""
+    from app.models import WorkOrder, WorkOrderStage
+
+    base = datetime(2026, 1, 5, 8, 0)
+    for product_code, actual_minutes in [("PRD-A", 30), ("PRD-A", 60), ("PRD-B", 20)]:
+        wo = WorkOrder(product_code=product_code, lot_no="LOT", qty=1)
+        db.add(wo)
+        db.flush()
+        db.add(WorkOrderStage(
+            work_order_id=wo.id,
+            stage_name="Enjeksiyon",
+            status="done",
+            planned_start=base,
+            planned_end=base + timedelta(minutes=30),
+            actual_start=base,
+            actual_end=base + timedelta(minutes=actual_minutes),
+        ))
+    db.commit()
+    headers = {"Authorization": f"Bearer {planner_token}"}
+
+    body = client.get("/metrics/aggregate?group_by=product_code", headers=headers).json()
+    by_key = {row["key"]: row for row in body["data"]}
+    assert by_key["PRD-A"]["stage_count"] == 2
+    assert by_key["PRD-A"]["efficiency_percent"] == pytest.approx(66.67, abs=0.01)
+    assert by_key["PRD-A"]["on_time_rate"] == 0.5
+    assert by_key["PRD-B"]["avg_delay_minutes"] == pytest.approx(-10, abs=0.01)
+
+    body = client.get("/metrics/aggregate?group_by=week", headers=headers).json()
+    assert [row["key"] for row in body["data"]] == ["2026-01-05"]
+
+    body = client.get(
+        "/metrics/aggregate?group_by=day&start=2026-02-01T00:00:00", headers=headers
+    ).json()
+    assert body["total"] == 0
+
+    assert client.get("/metrics/aggregate?group_by=color", headers=headers).status_code == 400
@@ -0,0 +1,33 @@
+import csv
+from datetime import datetime
+from app.models import Base
+from scripts.migrate_sqlite_to_postgres import csv_batch, tablo_seviyeleri
+
+
+def test_table_levels_put_parents_first():
+    """Test every FK parent table is copied at a lower level than its child"""
+    tables = Base.metadata.sorted_tables
+    levels = tablo_seviyeleri(tables)
+    level_of = {table.name: i for i, group in enumerate(levels) for table in group}
+    assert set(level_of) == {table.name for table in tables}
+    for table in tables:
+        for fk in table.foreign_keys:
+            parent = fk.column.table
+            if parent is not table:
+                assert level_of[parent.name] < level_of[table.name], (parent.name, table.name)
+
+
+def test_csv_batch_separates_null_from_empty_string():
+    """Test NULL becomes an unquoted empty field and text is always quoted and escaped"""
+    rows = [
+        (1, None, "", 'Kalıp "A"', datetime(2026, 1, 2, 3, 4, 5)),
+        (2, "satır\nsonu", "a,b", None, 1.5),
+    ]
+    data = csv_batch(rows).getvalue()
+    assert data.splitlines()[0] == '1,,"","Kalıp ""A""",2026-01-02T03:04:05'
+    assert data.endswith(',"a,b",,1.5\n')
+    parsed = list(csv.reader(data.splitlines(keepends=True)))
+    assert parsed == [
+        ["1", "", "", 'Kalıp "A"', "2026-01-02T03:04:05"],
+        ["2", "satır\nsonu", "a,b", "", "1.5"],
+    ]
@@ -0,0 +1,65 @@
+from app.models import Product
+from app.utils.product_import import ProductImporter
+from app.utils.text_keys import product_name_key
+
+HEADER = "Ürün Adı,Kalıp Adı,Malzeme,Parça Ağırlığı (g),Göz Adedi,Saatlik Üretim (adet),Enjeksiyon Sıcaklığı,Kalıp Sıcaklığı ,Çevrim Süresi \n"
+
+
+def _csv(*rows):
+    return (HEADER + "".join(r + "\n" for r in rows)).encode("utf-8-sig")
+
+
+def test_import_upserts_by_code(client, admin_token, db):
+    """Test CSV import inserts new codes, updates existing ones and skips blank names"""
+    db.add(Product(code="K-1", name="Eski Ad", cavity_count=1))
+    db.commit()
+
+    data = _csv(
+        "Yeni Kapak,K-1,PP,\"2,5\",4,800,230,40,18",
+        "Priz Gövdesi,K-2,ABS,12,2,300,240,50,24",
+        ",K-3,PP,1,1,1,1,1,1",
+        "Priz Gövdesi V2,K-2,ABS,13,2,300,245,50,25",
+        "İNCE Kapak,,PP,3,8,,220,35,",
+    )
+    response = client.post(
+        "/products/import?chunk_size=2&auto_train=false",
+        files={"file": ("urunler.csv", data, "text/csv")},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    ozet = response.json()
+    assert ozet["okunan"] == 5
+    assert ozet["hatali"] == 1
+    assert ozet["hatalar"][0]["satir"] == 4
+    # K-2 ikinci chunk'ta tekrar geldiği için orada güncelleme sayılır
+    assert ozet["guncellenen"] == 2
+    assert ozet["eklenen"] == 2
+    assert ozet["ai_training"] is None
+
+    db.expire_all()
+    k1 = db.query(Product).filter(Product.code == "K-1").one()
+    assert (k1.name, k1.name_key, k1.cavity_count, k1.part_weight_g) == ("Yeni Kapak", "yeni kapak", 4, 2)
+    assert k1.updated_at is not None
+    k2 = db.query(Product).filter(Product.code == "K-2").one()
+    assert (k2.name, k2.injection_temp_c, k2.cycle_time_sec) == ("Priz Gövdesi V2", 245, 25)
+    yeni = db.query(Product).filter(Product.code == "PRD-6").one()
+    assert yeni.name_key == product_name_key("ince kapak")
+    assert yeni.hourly_production is None
+
+
+def test_import_commits_every_n_chunks(db):
+    """Test commit_every groups chunk commits and the last partial group is committed"""
+    rows = [{"Ürün Adı": f"Ürün {i}", "Kalıp Adı": f"K-{i}"} for i in range(7)]
+    ozet = ProductImporter(db, chunk_size=2, commit_every=3).run(rows)
+    assert (ozet.chunk, ozet.commit, ozet.eklenen) == (4, 2, 7)
+    assert db.query(Product).count() == 7
+
+
+def test_import_requires_planner_or_admin(client, auth_token):
+    """Test worker users cannot import products"""
+    response = client.post(
+        "/products/import",
+        files={"file": ("urunler.csv", _csv("A,K-1,PP,1,1,1,1,1,1"), "text/csv")},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 403
@@ -84,3 +84,61 @@ def test_done_stage_not_started(client, auth_token, work_order_with_stage):
 
 
 
+
+def test_net_run_time_excludes_pauses():
+    """Test net run time ignores every pause/resume cycle"""
+    from app.utils.stage_events import run_and_paused_seconds
+
+    t0 = datetime(2026, 1, 1, 8, 0)
+    events = [
+        ("start", t0),
+        ("pause", t0 + timedelta(minutes=10)),
+        ("resume", t0 + timedelta(minutes=30)),
+        ("pause", t0 + timedelta(minutes=40)),
+        ("resume", t0 + timedelta(minutes=45)),
+        ("done", t0 + timedelta(minutes=60)),
+    ]
+    run, paused = run_and_paused_seconds(events)
+    assert run == 35 * 60
+    assert paused == 25 * 60
+
+
+def test_stage_transitions_write_event_log(client, auth_token, work_order_with_stage, db):
+    """Test start/pause/resume/done append to the stage event log"""
+    from app.models import WorkOrderStageEvent
+
+    wo, stage = work_order_with_stage
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for action in ["start", "pause", "resume", "done"]:
+        assert client.post(f"/stages/{stage.id}/{action}", headers=headers).status_code == 200
+
+    events = db.query(WorkOrderStageEvent).filter(
+        WorkOrderStageEvent.work_order_stage_id == stage.id
+    ).order_by(WorkOrderStageEvent.id).all()
+    assert [e.event_type for e in events] == ["start", "pause", "resume", "done"]
+    assert all(e.work_order_id == wo.id for e in events)
+
+    metrics = client.get(f"/metrics/stages/{stage.id}", headers=headers).json()
+    assert metrics["net_run_minutes"] is not None
+    assert metrics["paused_minutes"] is not None
+
+
+def test_work_order_net_run_none_with_pre_log_stage(client, auth_token, work_order_with_stage, db):
+    """Test an order with a stage that ran before the event log gets no net run time"""
+    wo, stage = work_order_with_stage
+    legacy = WorkOrderStage(
+        work_order_id=wo.id,
+        stage_name="Eski Aşama",
+        status="done",
+        actual_start=datetime.utcnow() - timedelta(hours=3),
+        actual_end=datetime.utcnow() - timedelta(hours=2),
+    )
+    db.add(legacy)
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for action in ["start", "done"]:
+        assert client.post(f"/stages/{stage.id}/{action}", headers=headers).status_code == 200
+
+    metrics = client.get(f"/metrics/workorders/{wo.id}", headers=headers).json()
+    assert metrics["net_run_minutes"] is None
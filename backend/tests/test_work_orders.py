@@ -85,3 +85,95 @@ def test_validation_qty_negative(client, admin_token):
 
 
 
+
+def test_list_work_orders_paginated(client, auth_token, test_admin, db):
+    """Test cursor pagination, filters and joined creator username"""
+    for i in range(5):
+        db.add(WorkOrder(
+            product_code="PRD-A" if i % 2 == 0 else "PRD-B",
+            lot_no=f"LOT-{i}",
+            qty=10,
+            created_by=test_admin.id,
+            planned_start=datetime.utcnow(),
+            planned_end=datetime.utcnow() + timedelta(hours=1)
+        ))
+    db.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    first = client.get("/workorders/?limit=2", headers=headers).json()
+    assert first["total"] == 2
+    assert first["data"][0]["created_by_username"] == "admin"
+    assert first["next_cursor"] == first["data"][-1]["id"]
+
+    second = client.get(f"/workorders/?limit=2&cursor={first['next_cursor']}", headers=headers).json()
+    assert second["data"][0]["id"] > first["next_cursor"]
+
+    filtered = client.get("/workorders/?product_code=PRD-A", headers=headers).json()
+    assert filtered["total"] == 3
+    assert filtered["next_cursor"] is None
+
+
+def test_work_orders_overview(client, admin_token, work_order_data):
+    """Test overview returns orders with their stages and metrics"""
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for _ in range(2):
+        client.post("/workorders/", json=work_order_data, headers=headers)
+
+    response = client.get("/workorders/overview", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2
+    for wo in body["data"]:
+        assert len(wo["stages"]) == 2
+        assert all(stage["work_order_id"] == wo["id"] for stage in wo["stages"])
+        assert wo["metrics"]["stages"]["planned"] == 2
+
+
+def test_create_work_orders_bulk(client, admin_token, auth_token, work_order_data, db):
+    """Test bulk creation matches single-create stage plans and reports invalid items"""
+    single = client.post(
+        "/workorders/",
+        json={**work_order_data, "stage_count": 3},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    ).json()
+
+    items = [
+        {**work_order_data, "stage_count": 3, "lot_no": "LOT-B1"},
+        {**work_order_data, "lot_no": "LOT-B2", "planned_end": work_order_data["planned_start"],
+         "planned_start": work_order_data["planned_end"]},
+        {**work_order_data, "lot_no": "LOT-B3", "machine_id": 999},
+        {**work_order_data, "lot_no": "LOT-B4", "stage_count": 1},
+    ]
+    response = client.post(
+        "/workorders/bulk",
+        json={"items": items},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["failed"]) == (2, 2)
+    assert [r["ok"] for r in data["results"]] == [True, False, False, True]
+    assert len(data["results"][0]["stage_ids"]) == 3
+    assert len(data["results"][3]["stage_ids"]) == 1
+
+    bulk_stages = client.get(
+        f"/workorders/{data['results'][0]['work_order_id']}/stages",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    ).json()
+    single_stages = client.get(
+        f"/workorders/{single['work_order_id']}/stages",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    ).json()
+    strip = lambda stages: [(s["stage_name"], s["planned_start"], s["planned_end"]) for s in stages]
+    assert strip(bulk_stages) == strip(single_stages)
+
+    from app.models import WorkOrderMetrics
+    summary = db.get(WorkOrderMetrics, data["results"][0]["work_order_id"])
+    assert (summary.total_stages, summary.planned_count, summary.done_count) == (3, 3, 0)
+
+    forbidden = client.post(
+        "/workorders/bulk",
+        json={"items": items[:1]},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert forbidden.status_code == 403